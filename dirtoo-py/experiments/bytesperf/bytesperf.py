@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Compares the str and bytes mode of find_files() on a tree with lots
+# of short names, printing '-0' separated paths to /dev/null:
+#
+#   ./bytesperf.py --create --entries 2000000 /tmp/bytesperf
+#   ./bytesperf.py /tmp/bytesperf
+
+
+from typing import Sequence
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+from dirtoo.find.action import Action, PrinterAction, RawPrinterAction
+from dirtoo.find.filter import SimpleFilter
+from dirtoo.find.util import find_files
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the bytes mode of find_files()")
+    parser.add_argument("DIRECTORY", nargs=1)
+    parser.add_argument("--create", action='store_true', default=False,
+                        help="Create the synthetic tree before benchmarking")
+    parser.add_argument("--entries", metavar="INT", type=int, default=2000000,
+                        help="Number of files in the synthetic tree")
+    parser.add_argument("--files", metavar="INT", type=int, default=1000,
+                        help="Number of files per directory")
+    parser.add_argument("--query", metavar="QUERY", type=str, action='append',
+                        help="Queries to benchmark")
+    return parser.parse_args(argv[1:])
+
+
+def create_tree(root: str, entries: int, files: int) -> None:
+    for d in range((entries + files - 1) // files):
+        directory = os.path.join(root, "{:x}".format(d))
+        os.makedirs(directory, exist_ok=True)
+        for i in range(files):
+            # short names, every 16th with a non-ASCII character
+            name = "{:x}{}.{}".format(i, "ä" if i % 16 == 0 else "", "txt" if i % 2 else "c")
+            with open(os.path.join(directory, name), "w"):
+                pass
+
+    print("created {} files".format(entries))
+
+
+def run(directory: str, query: str, bytes_mode: bool) -> None:
+    action: Action
+    with open(os.devnull, "wb") as devnull:
+        if bytes_mode:
+            action = RawPrinterAction(b"\0")
+            action._out = devnull
+            redirect: contextlib.AbstractContextManager[object] = contextlib.nullcontext()
+        else:
+            action = PrinterAction("{fullpath()}\0")
+            redirect = contextlib.redirect_stdout(io.TextIOWrapper(devnull, errors="surrogateescape"))
+
+        start = time.time()
+        with redirect:
+            find_files(directory, SimpleFilter.from_string(query), action,
+                       topdown=True, maxdepth=None, bytes_mode=bytes_mode)
+            action.finish()
+        print("{:<32} {:8.2f}sec".format("{} '{}'".format("bytes" if bytes_mode else "str", query),
+                                         time.time() - start))
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+    directory = args.DIRECTORY[0]
+
+    if args.create:
+        create_tree(directory, args.entries, args.files)
+
+    for query in args.query or ["*", "*.txt", "regex:^1f", "size:<1 *.txt"]:
+        for bytes_mode in [False, True]:
+            run(directory, query, bytes_mode)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+
+
+# EOF #
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Compares the line by line text search contains: used to do with the
+# current bytes search on a corpus of text files, logs and binary
+# "media" files:
+#
+#   ./contentsearch.py --create /tmp/corpus
+#   ./contentsearch.py /tmp/corpus
+#
+# With --index the searches are repeated with a trigram index of the
+# corpus, as built by dt-index --content:
+#
+#   ./contentsearch.py --index /tmp/corpus-index.sqlite /tmp/corpus
+
+
+from typing import Callable, Sequence
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from dirtoo.filter.filter_expr_parser import FilterExprParser
+from dirtoo.filter.match_func import ContainsMatchFunc
+from dirtoo.find.action import Action
+from dirtoo.find.content_index import ContentIndex
+from dirtoo.find.file_entry import FileEntry
+from dirtoo.find.filter import SimpleFilter
+from dirtoo.find.util import find_files
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark contains: searches")
+    parser.add_argument("DIRECTORY", nargs=1)
+    parser.add_argument("--create", action='store_true', default=False,
+                        help="Create the corpus in DIRECTORY")
+    parser.add_argument("-j", "--jobs", metavar="INT", type=int, default=4,
+                        help="Threads for the concurrent run")
+    parser.add_argument("--query", metavar="QUERY", type=str, action='append',
+                        help="Queries to benchmark")
+    parser.add_argument("--index", metavar="FILE", type=str, default=None,
+                        help="Also search with a content index stored in FILE")
+    return parser.parse_args(argv[1:])
+
+
+def create_corpus(directory: str) -> None:
+    rnd = random.Random(0)
+    words = ["error", "warning", "info", "request", "response", "timeout", "user", "value", "index", "file"]
+
+    os.makedirs(directory, exist_ok=True)
+    for i in range(200):
+        with open(os.path.join(directory, "log{:03d}.log".format(i)), "w") as fout:
+            for line in range(20000):
+                fout.write("{} {}\n".format(line, " ".join(rnd.choice(words) for _ in range(8))))
+
+    for i in range(2000):
+        with open(os.path.join(directory, "src{:04d}.txt".format(i)), "w") as fout:
+            for line in range(100):
+                fout.write(" ".join(rnd.choice(words) for _ in range(6)) + "\n")
+
+    for i in range(50):
+        with open(os.path.join(directory, "media{:02d}.mkv".format(i)), "wb") as fout:
+            fout.write(bytes(rnd.getrandbits(8) for _ in range(1024)) * 4096)
+
+
+class CountAction(Action):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.count = 0
+
+    def file(self, entry: FileEntry) -> None:
+        self.count += 1
+
+
+def old_contains(needle: str) -> Callable[[str], bool]:
+    """contains: as it used to be, for comparison"""
+    needle = needle.lower()
+
+    def match(path: str) -> bool:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as fin:
+                for line in fin:
+                    if needle in line.lower():
+                        return True
+        except IOError:
+            return False
+        return False
+
+    return match
+
+
+class OldFilter(SimpleFilter):
+
+    def __init__(self, needle: str) -> None:
+        match = old_contains(needle)
+        super().__init__(lambda fileinfo: match(fileinfo.abspath()))
+
+
+def run(name: str, directory: str, filter_op: SimpleFilter, jobs: int) -> None:
+    action = CountAction()
+    start = time.perf_counter()
+    find_files(directory, filter_op, action, topdown=True, maxdepth=None, jobs=jobs)
+    print("{:<40} {:>6} matches {:8.2f}sec".format(name, action.count, time.perf_counter() - start))
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+    directory = args.DIRECTORY[0]
+
+    if args.create:
+        create_corpus(directory)
+        return
+
+    content_index = None
+    if args.index is not None:
+        content_index = ContentIndex(args.index)
+        start = time.perf_counter()
+        content_index.update(directory)
+        print("{:<40} {:>6} files   {:8.2f}sec".format(
+            "update index", content_index.file_count(directory), time.perf_counter() - start))
+
+    parser = FilterExprParser()
+    for needle in args.query or ["timeout", "doesnotexist"]:
+        run("old      contains:{}".format(needle), directory, OldFilter(needle), 1)
+        run("new      contains:{}".format(needle), directory,
+            SimpleFilter(parser.parse("contains:" + needle)), 1)
+        run("new -j{}  contains:{}".format(args.jobs, needle), directory,
+            SimpleFilter(parser.parse("contains:" + needle)), args.jobs)
+        if content_index is not None:
+            ContainsMatchFunc.CONTENT_INDEX = content_index
+            run("index    contains:{}".format(needle), directory,
+                SimpleFilter(parser.parse("contains:" + needle)), 1)
+            ContainsMatchFunc.CONTENT_INDEX = None
+
+    if content_index is not None:
+        content_index.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+
+
+# EOF #
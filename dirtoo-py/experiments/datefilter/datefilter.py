@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Filters synthetic FileInfo objects by date:, time: and weekday:,
+# per file, compiled and vectorized on FileColumns:
+#
+#   ./datefilter.py -n 1000000
+
+
+from typing import Callable, Sequence
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from dirtoo.filecollection.columns import FileColumns, evaluate
+from dirtoo.filesystem.file_info import FileInfo
+from dirtoo.filesystem.location import Location
+from dirtoo.filter.filter_expr_parser import FilterExprParser
+from dirtoo.filter.match_func_compiler import CompiledMatchFunc, compile_match_func
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark date:, time: and weekday: filters")
+    parser.add_argument("-n", "--count", metavar="INT", type=int, default=1000000,
+                        help="Number of synthetic FileInfo objects")
+    parser.add_argument("--query", metavar="QUERY", type=str, action='append',
+                        help="Queries to benchmark")
+    return parser.parse_args(argv[1:])
+
+
+def make_fileinfos(count: int) -> list[FileInfo]:
+    rnd = random.Random(0)
+
+    result = []
+    for i in range(count):
+        name = "File{:07d}.txt".format(i)
+        fi = FileInfo(Location.from_path("/tmp/" + name))
+        fi._abspath = "/tmp/" + name
+        fi._basename = name
+        fi._ext = ".txt"
+        mtime = rnd.uniform(946684800, 1767225600)
+        fi._stat = os.stat_result((0o100644, i, 1, 1, 1000, 1000, 0, int(mtime), int(mtime), int(mtime)),
+                                  {"st_atime": mtime, "st_mtime": mtime, "st_ctime": mtime})
+        fi._isfile = True
+        result.append(fi)
+    return result
+
+
+def run(name: str, func: Callable[[], int]) -> None:
+    start = time.perf_counter()
+    count = func()
+    print("{:<48} {:>8} matches {:8.2f}sec".format(name, count, time.perf_counter() - start))
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+    fileinfos = make_fileinfos(args.count)
+    queries = args.query or ["date:2020", "date:>=2020-06 date:<2021", "date:2020-*-01",
+                             "weekday:>=5", "time:>=22", "time:1?:*:00"]
+
+    # compile right away, so that only the generated code is timed
+    CompiledMatchFunc.WARMUP_CALLS = 0
+
+    parser = FilterExprParser()
+    for query in queries:
+        tree = parser.parse(query)
+        compiled = compile_match_func(parser.parse(query)).function
+        run("tree       '{}'".format(query), lambda: sum(1 for fi in fileinfos if tree(fi)))
+        run("compiled   '{}'".format(query), lambda: sum(1 for fi in fileinfos if compiled(fi)))
+        # fresh columns, so that building them is part of the time
+        run("vectorized '{}'".format(query),
+            lambda: int(evaluate(parser.parse(query), FileColumns(fileinfos)).sum()))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+
+
+# EOF #
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Per-file overhead of the dt-find -f/-p expressions, comparing the
+# old eval() of raw strings with the precompiled code objects:
+#
+#   ./exprperf.py -n 200000
+
+
+from typing import Any, Callable, Dict, Sequence
+
+import argparse
+import contextlib
+import os
+import shlex
+import string
+import sys
+import time
+
+from dirtoo.find.action import PrinterAction
+from dirtoo.find.context import Context
+from dirtoo.find.file_entry import FileEntry
+from dirtoo.find.filter import ExprFilter
+
+
+FILTER_EXPR = 'regex(r"\\.txt$") and not iname("*backup*")'
+PRINT_FMT = "{_:>20} {p} {ext()}\n"
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark dt-find expression evaluation")
+    parser.add_argument("-n", "--count", metavar="INT", type=int, default=200000,
+                        help="Number of synthetic files")
+    return parser.parse_args(argv[1:])
+
+
+def legacy_filter(expr: str) -> Callable[[str, str], bool]:
+    ctx = Context()
+    global_vars: Dict[str, Any] = dict(ctx.get_hash())
+
+    def match_file(root: str, filename: str) -> bool:
+        fullpath = os.path.join(root, filename)
+        ctx.current_entry = FileEntry(root, filename)
+        local_vars = {'p': fullpath, '_': filename}
+        return bool(eval(expr, global_vars, local_vars))  # pylint: disable=W0123
+
+    return match_file
+
+
+def legacy_printer(fmt_str: str) -> Callable[[str, str], None]:
+    ctx = Context()
+    global_vars: Dict[str, Any] = dict(ctx.get_hash())
+
+    def file(root: str, filename: str) -> None:
+        fullpath = os.path.join(root, filename)
+        ctx.current_entry = FileEntry(root, filename)
+        local_vars = {
+            '_': os.path.basename(filename),
+            'p': fullpath,
+            'ap': os.path.abspath(fullpath),
+            'apq': shlex.quote(os.path.abspath(fullpath)),
+            'pq': shlex.quote(fullpath),
+            'q': shlex.quote(filename),
+        }
+        fmt = string.Formatter()
+        for (literal_text, field_name, format_spec, _) in fmt.parse(fmt_str):
+            if literal_text is not None:
+                sys.stdout.write(literal_text)
+            if field_name is not None:
+                assert format_spec is not None
+                value = eval(field_name, global_vars, local_vars)  # pylint: disable=W0123
+                sys.stdout.write(format(value, format_spec))
+
+    return file
+
+
+def run(name: str, func: Callable[..., Any], files: Sequence[Any]) -> None:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for args in files:
+            func(*args)
+        duration = time.perf_counter() - start
+
+    print("{:<20} {:8.3f}sec {:8.2f}usec/file".format(name, duration, duration / len(files) * 1000000))
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+
+    names = ["file{:07d}.{}".format(i, "txt" if i % 2 else "jpg") for i in range(args.count)]
+    files = [("some/directory", name) for name in names]
+    entries = [(FileEntry("some/directory", name),) for name in names]
+
+    run("filter (before)", legacy_filter(FILTER_EXPR), files)
+    run("filter (after)", ExprFilter(FILTER_EXPR).match_file, entries)
+
+    # Note: the old PrinterAction also did an os.lstat() per file,
+    # which is excluded here as the files don't exist.
+    run("printer (before)", legacy_printer(PRINT_FMT), files)
+    run("printer (after)", PrinterAction(PRINT_FMT).file, entries)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+
+
+# EOF #
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Memory used by a FileCollection with the ObjectFileStore and the
+# CompactFileStore, filled with synthetic files in batches the way a
+# stream:// or search:// view receives them, along with the time
+# spent in add_fileinfos() and to filter it:
+#
+#   ./filestoremem.py -n 100000 -n 1000000
+
+
+from typing import Callable, Iterator, Sequence
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from dirtoo.filecollection.compact_file_store import CompactFileStore
+from dirtoo.filecollection.file_collection import FileCollection
+from dirtoo.filecollection.file_store import FileStore, ObjectFileStore
+from dirtoo.filecollection.filter import Filter
+from dirtoo.filecollection.sorter import Sorter
+from dirtoo.filesystem.file_info import FileInfo
+from dirtoo.filesystem.location import Location
+from dirtoo.filter.filter_expr_parser import FilterExprParser
+
+
+STORES: dict[str, Callable[[Sorter], FileStore]] = {
+    "object": ObjectFileStore,
+    "compact": CompactFileStore,
+}
+
+EXTS = [".jpg", ".png", ".txt", ".mkv", ".pdf"]
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the memory use of the FileCollection stores")
+    parser.add_argument("-n", "--count", metavar="INT", type=int, action='append',
+                        help="Number of synthetic files, can be given multiple times")
+    parser.add_argument("-b", "--batch", metavar="INT", type=int, default=1000,
+                        help="Number of files added at once")
+    parser.add_argument("--store", choices=list(STORES), action='append',
+                        help="Stores to benchmark")
+    return parser.parse_args(argv[1:])
+
+
+def make_batches(count: int, batch: int) -> Iterator[list[FileInfo]]:
+    rnd = random.Random(0)
+
+    for start in range(0, count, batch):
+        result = []
+        for i in range(start, min(start + batch, count)):
+            dirname = "/home/user/Pictures/{:04d}/subdir{}".format(i // 1000, i % 7)
+            name = "IMG_{:07d}{}".format(i, EXTS[i % len(EXTS)])
+            abspath = os.path.join(dirname, name)
+            fi = FileInfo(Location.from_path(abspath))
+            fi._abspath = abspath
+            fi._dirname = dirname
+            fi._basename = name
+            fi._ext = os.path.splitext(abspath)[1]
+            mtime = rnd.uniform(946684800, 1767225600)
+            fi._stat = os.stat_result((0o100644, i, 2049, 1, 1000, 1000, rnd.randrange(1 << 24),
+                                       int(mtime), int(mtime), int(mtime)),
+                                      {"st_atime": mtime, "st_mtime": mtime, "st_ctime": mtime})
+            fi._isfile = True
+            fi._have_access = True
+            result.append(fi)
+        yield result
+
+
+def run(name: str, count: int, batch: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    # tracemalloc slows down the filling, the times are only good
+    # for comparing the stores with each other
+    collection = FileCollection(STORES[name])
+    fill_time = 0.0
+    for fileinfos in make_batches(count, batch):
+        start = time.perf_counter()
+        collection.add_fileinfos(fileinfos)
+        fill_time += time.perf_counter() - start
+    del fileinfos
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    filt = Filter()
+    filt.set_match_func(FilterExprParser().parse("*.png size:>1MB"))
+    start = time.perf_counter()
+    collection.set_filter(filt)
+    filter_time = time.perf_counter() - start
+
+    print("{:<8} {:>9} files {:9.1f}MB {:7.0f} bytes/file   fill {:6.2f}sec   filter {:6.2f}sec".format(
+        name, count, used / 1000000, used / count, fill_time, filter_time))
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+    for count in args.count or [100000, 1000000]:
+        for name in args.store or list(STORES):
+            run(name, count, args.batch)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+
+
+# EOF #
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Compares the MatchFunc tree produced by FilterExprParser against its
+# CompiledMatchFunc on synthetic FileInfo objects:
+#
+#   ./filtercompile.py -n 1000000
+
+
+from typing import Callable, Sequence
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from dirtoo.filesystem.file_info import FileInfo
+from dirtoo.filesystem.location import Location
+from dirtoo.filter.filter_expr_parser import FilterExprParser
+from dirtoo.filter.match_func_compiler import CompiledMatchFunc, compile_match_func
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark compiled filter expressions")
+    parser.add_argument("-n", "--count", metavar="INT", type=int, default=1000000,
+                        help="Number of synthetic FileInfo objects")
+    parser.add_argument("--query", metavar="QUERY", type=str, action='append',
+                        help="Queries to benchmark")
+    return parser.parse_args(argv[1:])
+
+
+def make_fileinfos(count: int) -> list[FileInfo]:
+    rnd = random.Random(0)
+    exts = [".txt", ".png", ".jpg", ".mkv", ".py", ".c"]
+
+    result = []
+    for i in range(count):
+        name = "File{:07d}{}".format(i, rnd.choice(exts))
+        fi = FileInfo(Location.from_path("/tmp/" + name))
+        fi._abspath = "/tmp/" + name
+        fi._basename = name
+        fi._ext = os.path.splitext(name)[1]
+        mtime = rnd.randrange(946684800, 1767225600)
+        fi._stat = os.stat_result((0o100644, i, 1, 1, 1000, 1000, rnd.randrange(1 << 24), mtime, mtime, mtime))
+        fi._isfile = True
+        result.append(fi)
+    return result
+
+
+def run(name: str, func: Callable[[FileInfo], bool], fileinfos: Sequence[FileInfo]) -> None:
+    start = time.perf_counter()
+    count = 0
+    for fileinfo in fileinfos:
+        if func(fileinfo):
+            count += 1
+    print("{:<48} {:>8} matches {:8.2f}sec".format(name, count, time.perf_counter() - start))
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+    fileinfos = make_fileinfos(args.count)
+    queries = args.query or ["*.txt", "*.txt OR *.png", "*.jpg size:>1000000 -*00*",
+                             "date:>2015 weekday:<5 len:<16", "regex:^file0 -glob:*.c OR size:<1000"]
+
+    # compile right away, so that only the generated code is timed
+    CompiledMatchFunc.WARMUP_CALLS = 0
+
+    parser = FilterExprParser()
+    for query in queries:
+        tree = parser.parse(query)
+        compiled = compile_match_func(parser.parse(query))
+        run("tree     '{}'".format(query), tree, fileinfos)
+        run("compiled '{}'".format(query), compiled.function, fileinfos)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+
+
+# EOF #
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Compares dt-search queries answered by walking the tree against
+# ones answered from a FileIndex:
+#
+#   ../walkperf/walkperf.py /tmp/walkperf --create --entries 1000000 --jobs 2
+#   ./indexperf.py /tmp/walkperf
+
+
+from typing import Sequence
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from dirtoo.find.action import Action
+from dirtoo.find.file_entry import FileEntry
+from dirtoo.find.file_index import FileIndex
+from dirtoo.find.filter import SimpleFilter
+from dirtoo.find.util import find_files
+
+
+class CountAction(Action):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.count = 0
+
+    def file(self, entry: FileEntry) -> None:
+        self.count += 1
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark index backed searches")
+    parser.add_argument("DIRECTORY", nargs=1)
+    parser.add_argument("--query", metavar="QUERY", type=str, action='append',
+                        help="Queries to benchmark")
+    return parser.parse_args(argv[1:])
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+    directory = args.DIRECTORY[0]
+    queries = args.query or ["*0042", "size:>0", "date:>2000 *99", "regex:^file00[0-4]"]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index = FileIndex(os.path.join(tmpdir, "index.sqlite"))
+
+        start = time.time()
+        index.update(directory)
+        print("{:<32} {:8.2f}sec".format("index build", time.time() - start))
+
+        start = time.time()
+        index.update(directory)
+        print("{:<32} {:8.2f}sec".format("index update (unchanged)", time.time() - start))
+
+        for query in queries:
+            for name, use_index in [("walk", None), ("index", index)]:
+                action = CountAction()
+                start = time.time()
+                find_files(directory, SimpleFilter.from_string(query), action,
+                           topdown=True, maxdepth=None, index=use_index)
+                print("{:<32} {:>10} files {:8.2f}sec".format(
+                    "{} '{}'".format(name, query), action.count, time.time() - start))
+
+        index.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+
+
+# EOF #
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Latency of parsing filter queries and dirtoo.expr expressions, for
+# a new parser, for queries seen for the first time and for repeated
+# ones, as when typing into the file view or calling dt-search from
+# a script:
+#
+#   ./parseperf.py -n 1000
+
+
+from typing import Callable, Sequence
+
+import argparse
+import sys
+import time
+
+from dirtoo.expr import Parser
+from dirtoo.filter.filter_expr_parser import FilterExprParser
+
+
+QUERIES = [
+    ("typical", "*.png"),
+    ("typical", "holiday size:>1MB -*.tmp"),
+    ("long", "*.jpg OR *.png OR *.gif size:>10kB date:>=2020 -thumb -'backup copy' "
+     "contains:TODO OR regex:^IMG_[0-9]+ weekday:>=5 time:<12 OR glob:*.RAW len:<40 "
+     "fuzzy:holday -size:>1GB OR \"quoted word\" glob:foo\\ bar"),
+]
+
+EXPRESSIONS = [
+    ("typical", "size > 1024"),
+    ("long", "(width * height > 1920 * 1080 && duration >= 60) || !(abs(size - 4096) < 512) "
+     "|| (framerate / 2 + 1 >= 30 && pages != 0)"),
+]
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark query and expression parsing")
+    parser.add_argument("-n", "--count", metavar="INT", type=int, default=1000,
+                        help="Number of parses per measurement")
+    return parser.parse_args(argv[1:])
+
+
+def measure(label: str, count: int, func: Callable[[int], object]) -> None:
+    start = time.perf_counter()
+    for idx in range(count):
+        func(idx)
+    elapsed = time.perf_counter() - start
+    print("{:<40} {:10.1f}us".format(label, elapsed / count * 1000000))
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+
+    measure("FilterExprParser() first", 1, lambda idx: FilterExprParser())
+    measure("FilterExprParser()", args.count, lambda idx: FilterExprParser())
+    parser = FilterExprParser()
+    for kind, query in QUERIES:
+        # a different word each time, so nothing can be reused
+        measure("filter {:<8} {:<7} first".format(kind, len(query)), args.count,
+                lambda idx: parser.parse("{} x{}".format(query, idx)))
+        measure("filter {:<8} {:<7} repeated".format(kind, len(query)), args.count,
+                lambda idx: parser.parse(query))
+
+    measure("expr Parser() first", 1, lambda idx: Parser())
+    measure("expr Parser()", args.count, lambda idx: Parser())
+    expr_parser = Parser()
+    for kind, text in EXPRESSIONS:
+        measure("expr {:<10} {:<7} first".format(kind, len(text)), args.count,
+                lambda idx: expr_parser.parse("{} + x{}".format(text, idx)))
+        measure("expr {:<10} {:<7} repeated".format(kind, len(text)), args.count,
+                lambda idx: expr_parser.parse(text))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+
+
+# EOF #
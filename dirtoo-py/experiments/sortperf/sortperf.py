@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Time to switch the sort order of a FileCollection of synthetic
+# files between name, size, date and duration, compared to
+# rebuilding a SortedList with a key function, as it was done before,
+# and to stream a duration for every video into it:
+#
+#   ./sortperf.py -n 200000
+
+
+from typing import Any, Callable, Optional, Sequence, cast
+
+import argparse
+import functools
+import os
+import random
+import sys
+import time
+
+from sortedcontainers import SortedList
+
+from dirtoo.filecollection.compact_file_store import CompactFileStore
+from dirtoo.filecollection.file_collection import FileCollection
+from dirtoo.filecollection.file_store import FileStore, ObjectFileStore
+from dirtoo.filecollection.sorter import Sorter, name_key
+from dirtoo.filesystem.file_info import FileInfo
+from dirtoo.filesystem.location import Location
+from dirtoo.sort import numeric_sort_key
+
+
+STORES: dict[str, Callable[[Sorter], FileStore]] = {
+    "object": ObjectFileStore,
+    "compact": CompactFileStore,
+}
+
+
+def duration_key(fileinfo: FileInfo) -> int:
+    return cast(int, fileinfo.get_metadata_or('duration', 0))
+
+
+KEYS: list[tuple[str, Callable[[FileInfo], Any], Optional[list[str]]]] = [
+    ("name", name_key, []),
+    ("size", FileInfo.size, []),
+    ("date", FileInfo.mtime, []),
+    ("duration", duration_key, ["duration"]),
+]
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark switching the sort order of a FileCollection")
+    parser.add_argument("-n", "--count", metavar="INT", type=int, default=200000,
+                        help="Number of synthetic files")
+    return parser.parse_args(argv[1:])
+
+
+def make_fileinfos(count: int) -> list[FileInfo]:
+    rnd = random.Random(0)
+    words = ["holiday", "IMG_", "DSC", "scan", "Report", "notes", "video"]
+
+    result = []
+    for i in range(count):
+        dirname = "/home/user/{:04d}".format(i // 1000)
+        name = "{}{}_{}{}".format(rnd.choice(words), rnd.randrange(100000), rnd.randrange(100),
+                                  rnd.choice([".jpg", ".png", ".mkv", ""]))
+        abspath = os.path.join(dirname, name)
+        fi = FileInfo(Location.from_path(abspath))
+        fi._abspath = abspath
+        fi._dirname = dirname
+        fi._basename = name
+        fi._ext = os.path.splitext(abspath)[1]
+        mtime = rnd.uniform(946684800, 1767225600)
+        fi._stat = os.stat_result((0o100644, i, 2049, 1, 1000, 1000, rnd.randrange(1 << 24),
+                                   int(mtime), int(mtime), int(mtime)),
+                                  {"st_atime": mtime, "st_mtime": mtime, "st_ctime": mtime})
+        fi._isdir = rnd.random() < 0.05
+        fi._isfile = not fi._isdir
+        if fi._ext == ".mkv":
+            fi._metadata["duration"] = rnd.randrange(3600000)
+        result.append(fi)
+    return result
+
+
+def measure(label: str, func: Callable[[], object]) -> None:
+    start = time.perf_counter()
+    func()
+    print("{:<40} {:8.1f}ms".format(label, (time.perf_counter() - start) * 1000))
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+    fileinfos = make_fileinfos(args.count)
+
+    def old_name_key(fileinfo: FileInfo) -> Any:
+        return (not fileinfo.isdir(), numeric_sort_key(fileinfo.basename().lower()))
+
+    measure("SortedList by numeric_sort_key", lambda: SortedList(fileinfos, key=old_name_key))
+
+    rnd = random.Random(1)
+    updates: list[tuple[FileInfo, dict[str, object]]] = [
+        (fi, {"duration": rnd.randrange(3600000)}) for fi in fileinfos if fi.ext() == ".mkv"]
+
+    def old_duration_key(fileinfo: FileInfo) -> Any:
+        return (not fileinfo.isdir(), duration_key(fileinfo))
+
+    def old_update_metadata(sorted_list: SortedList) -> None:
+        for fi, metadata in updates:
+            sorted_list.remove(fi)
+            fi._metadata.update(metadata)
+            sorted_list.add(fi)
+
+    measure("SortedList {} updates by duration".format(len(updates)),
+            functools.partial(old_update_metadata, SortedList(fileinfos, key=old_duration_key)))
+
+    for store_name, store in STORES.items():
+        collection = FileCollection(store)
+        measure("{} set_fileinfos".format(store_name), lambda: collection.set_fileinfos(fileinfos))
+
+        sorter = Sorter()
+        for rounds in ["first", "again"]:
+            for key_name, key_func, metadata in KEYS:
+                sorter.set_key_func(key_func, metadata)
+                measure("{} sort by {} {}".format(store_name, key_name, rounds),
+                        lambda: collection.set_sorter(sorter))
+
+        def update_metadata() -> None:
+            for fi, metadata in updates:
+                collection.update_metadata(fi.location(), metadata)
+            collection[0]
+
+        for key_name, key_func, metadata in [KEYS[0], KEYS[3]]:
+            sorter.set_key_func(key_func, metadata)
+            collection.set_sorter(sorter)
+            measure("{} {} updates by {}".format(store_name, len(updates), key_name), update_metadata)
+
+        sorter.set_directories_first(False)
+        measure("{} directories not first".format(store_name), lambda: collection.set_sorter(sorter))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+
+
+# EOF #
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Compares walk() against parallel_walk() on a synthetic tree:
+#
+#   ./walkperf.py --create --entries 1000000 /tmp/walkperf
+#   ./walkperf.py --jobs 1 2 4 8 16 /tmp/walkperf
+#
+# Drop the page cache between runs ('echo 3 > /proc/sys/vm/drop_caches')
+# to measure cold reads, which is where the threads pay off.
+
+
+from typing import Sequence
+
+import argparse
+import os
+import sys
+import time
+
+from dirtoo.find.walk import walk
+from dirtoo.find.parallel_walk import parallel_walk
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the directory walkers")
+    parser.add_argument("DIRECTORY", nargs=1)
+    parser.add_argument("--create", action='store_true', default=False,
+                        help="Create the synthetic tree before benchmarking")
+    parser.add_argument("--entries", metavar="INT", type=int, default=1000000,
+                        help="Number of entries in the synthetic tree")
+    parser.add_argument("--fanout", metavar="INT", type=int, default=32,
+                        help="Number of subdirectories per directory")
+    parser.add_argument("--files", metavar="INT", type=int, default=100,
+                        help="Number of files per directory")
+    parser.add_argument("--jobs", metavar="INT", type=int, nargs='+', default=[2, 4, 8, 16],
+                        help="Thread counts to benchmark")
+    return parser.parse_args(argv[1:])
+
+
+def create_tree(root: str, entries: int, fanout: int, files: int) -> None:
+    os.makedirs(root, exist_ok=True)
+
+    count = 0
+    todo = [root]
+    while todo and count < entries:
+        directory = todo.pop(0)
+        for i in range(files):
+            with open(os.path.join(directory, "file{:04d}".format(i)), "w"):
+                pass
+            count += 1
+
+        for i in range(fanout):
+            subdir = os.path.join(directory, "dir{:04d}".format(i))
+            os.mkdir(subdir)
+            todo.append(subdir)
+            count += 1
+
+    print("created {} entries".format(count))
+
+
+def run(name: str, walker: Sequence[object]) -> None:
+    start = time.time()
+    entries = 0
+    for root, dirs, files in walker:  # type: ignore
+        entries += len(dirs) + len(files)
+    print("{:<24} {:>10} entries {:8.2f}sec".format(name, entries, time.time() - start))
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+    directory = args.DIRECTORY[0]
+
+    if args.create:
+        create_tree(directory, args.entries, args.fanout, args.files)
+
+    run("walk", walk(directory))  # type: ignore
+    for jobs in args.jobs:
+        run("parallel_walk -j{}".format(jobs), parallel_walk(directory, jobs=jobs))  # type: ignore
+        run("parallel_walk -j{} ordered".format(jobs),
+            parallel_walk(directory, jobs=jobs, ordered=True))  # type: ignore
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+
+
+# EOF #
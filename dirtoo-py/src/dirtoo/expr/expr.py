@@ -19,6 +19,7 @@
 
 from typing import cast, Any, Dict, Sequence, Callable, Optional, Union
 
+import functools
 import operator
 from abc import ABC, abstractmethod
 from pyparsing import ParserElement
@@ -218,7 +219,8 @@ class UnaryOperator(Expr):
 
 
 def make_grammar() -> ParserElement:
-    ParserElement.enablePackrat()
+    # no packrat parsing, with pyparsing 3 it makes parsing these
+    # short expressions about twice as slow
 
     plus = pp.Literal("+")
     minus = pp.Literal("-")
@@ -258,7 +260,8 @@ def make_grammar() -> ParserElement:
     lparent = pp.Literal("(").suppress()
     rparent = pp.Literal(")").suppress()
 
-    relational_op = (lt | le | gt | ge)
+    # the longer operators first, '<' would match the start of '<='
+    relational_op = (le | lt | ge | gt)
     shift = (lshift | rshift)
     add_op = (plus | minus)
     mul_op = (mul | floordiv | div | mod)
@@ -329,18 +332,34 @@ def make_grammar() -> ParserElement:
     return expr
 
 
+@functools.lru_cache(maxsize=None)
+def _shared_grammar() -> ParserElement:
+    return make_grammar()
+
+
+# The same expressions get parsed again and again, such as the fields
+# of dt-mediainfo --print for each file
+PARSE_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(text: str) -> Expr:
+    # Expr objects are never modified, so the same one can be handed
+    # out to every Parser
+    result: ParseResults = _shared_grammar().parseString(text, parseAll=True)
+    return cast(Expr, result[0])
+
+
 class Parser:
 
     def __init__(self) -> None:
-        self.bnf = make_grammar()
+        self.bnf = _shared_grammar()
 
     def parse(self, text: str) -> Expr:
-        result: ParseResults = self.bnf.parseString(text, parseAll=True)
-        return cast(Expr, result[0])
+        return _parse(text)
 
     def eval(self, text: str, ctx: Context) -> ExprValue:
-        result: ParseResults = self.bnf.parseString(text, parseAll=True)
-        return cast(Expr, result[0]).eval(ctx)
+        return _parse(text).eval(ctx)
 
 
 # EOF #
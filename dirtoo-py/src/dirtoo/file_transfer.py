@@ -16,7 +16,6 @@
 
 
 import errno
-import hashlib
 import os
 import sys
 
@@ -26,6 +25,7 @@ import bytefmt
 
 from dirtoo.posix.filesystem import Filesystem
 from dirtoo.format import progressbar
+from dirtoo.hash_cache import default_hash_cache
 
 
 class CancellationException(Exception):
@@ -49,14 +49,8 @@ class Overwrite(Enum):
     ALWAYS = 2
 
 
-def sha1sum(filename: str, blocksize: int = 65536) -> str:
-    with open(filename, 'rb') as fin:
-        hasher = hashlib.sha1()
-        buf = fin.read(blocksize)
-        while len(buf) > 0:
-            hasher.update(buf)
-            buf = fin.read(blocksize)
-        return hasher.hexdigest()
+def sha1sum(filename: str) -> str:
+    return default_hash_cache().get(filename, "sha1")
 
 
 class Mediator(ABC):
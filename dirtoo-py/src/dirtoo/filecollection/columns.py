@@ -0,0 +1,357 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Sequence, Tuple
+
+import logging
+from collections import OrderedDict
+
+import numpy
+import numpy.typing as npt
+
+from dirtoo.filesystem.file_info import FileInfo
+from dirtoo.filter.local_time import local_days
+from dirtoo.filter.match_func import (
+    MatchFunc,
+    AndMatchFunc,
+    OrMatchFunc,
+    ExcludeMatchFunc,
+    TrueMatchFunc,
+    FalseMatchFunc,
+    FolderMatchFunc,
+    FuzzyMatchFunc,
+    GlobMatchFunc,
+    MultiGlobMatchFunc,
+    SizeMatchFunc,
+    LengthMatchFunc,
+    MetadataMatchFunc,
+    DateMatchFunc,
+    DateOpMatchFunc,
+    TimeMatchFunc,
+    TimeOpMatchFunc,
+    WeekdayMatchFunc,
+    ContainsMatchFunc,
+    RandomMatchFunc,
+)
+from dirtoo.filter.match_func_compiler import CompiledMatchFunc, compile_match_func
+from dirtoo.fuzzy import NGramIndex
+
+logger = logging.getLogger(__name__)
+
+
+Mask = npt.NDArray[numpy.bool_]
+Rows = npt.NDArray[numpy.intp]
+
+
+def _lower_ext(name: str) -> str:
+    # unlike os.path.splitext() this treats '.txt' as an extension,
+    # as that is what '*.txt' matches
+    idx = name.rfind(".")
+    return name[idx:].lower() if idx != -1 else ""
+
+
+def _metadata_value(fileinfo: FileInfo, field: str, ctor: Callable[[Any], Any]) -> float:
+    if not fileinfo.has_metadata(field):
+        return numpy.nan
+
+    try:
+        return float(ctor(fileinfo.get_metadata(field)))
+    except Exception:
+        return numpy.nan
+
+
+class FileColumns:
+    """Struct-of-arrays view of a sequence of FileInfo objects. Columns
+    are extracted on first use and are only valid as long as the
+    sequence isn't modified."""
+
+    # number of filter results kept per query text
+    RESULT_CACHE_SIZE = 16
+
+    def __init__(self, fileinfos: Sequence[FileInfo]) -> None:
+        self.fileinfos = fileinfos
+        self._columns: Dict[Hashable, npt.NDArray[Any]] = {}
+        self._ext2id: Dict[str, int] = {}
+        self._ngram_indexes: Dict[int, NGramIndex] = {}
+
+        # the flags last written by Filter.apply_many()
+        self.excluded: Optional[Mask] = None
+        self.hidden: Optional[Mask] = None
+
+        self._results: OrderedDict[str, Mask] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.fileinfos)
+
+    def _build(self, key: Hashable, dtype: Any, func: Callable[[FileInfo], Any]) -> npt.NDArray[Any]:
+        column = self._columns.get(key)
+        if column is None:
+            column = numpy.fromiter((func(fi) for fi in self.fileinfos), dtype=dtype, count=len(self.fileinfos))
+            self._columns[key] = column
+        return column
+
+    def size(self) -> npt.NDArray[numpy.int64]:
+        return self._build("size", numpy.int64, FileInfo.size)
+
+    def mtime(self) -> npt.NDArray[numpy.float64]:
+        return self._build("mtime", numpy.float64, FileInfo.mtime)
+
+    def isdir(self) -> Mask:
+        return self._build("isdir", numpy.bool_, FileInfo.isdir)
+
+    def basenames(self) -> Sequence[str]:
+        return [fi.basename() for fi in self.fileinfos]
+
+    def name_length(self) -> npt.NDArray[numpy.int32]:
+        column = self._columns.get("name_length")
+        if column is None:
+            names = self.basenames()
+            column = numpy.fromiter((len(name) for name in names), dtype=numpy.int32, count=len(names))
+            self._columns["name_length"] = column
+        return column
+
+    def local_day(self) -> npt.NDArray[numpy.intp]:
+        """The local mtime date as day of local_days(), -1 outside of it"""
+        column = self._columns.get("local_day")
+        if column is None:
+            column = local_days().days(self.mtime())
+            self._columns["local_day"] = column
+        return column
+
+    def ext_id(self) -> npt.NDArray[numpy.int32]:
+        """The lowercase extension of each file as index into ext_id_of()"""
+        column = self._columns.get("ext_id")
+        if column is None:
+            exts = [_lower_ext(name) for name in self.basenames()]
+            ext2id = self._ext2id
+            column = numpy.fromiter((ext2id.setdefault(ext, len(ext2id)) for ext in exts),
+                                    dtype=numpy.int32, count=len(exts))
+            self._columns["ext_id"] = column
+        return column
+
+    def ext_id_of(self, ext: str) -> int:
+        self.ext_id()
+        return self._ext2id.get(ext, -1)
+
+    def name_ngrams(self, n: int) -> NGramIndex:
+        """Index of the n-grams of the basenames"""
+        index = self._ngram_indexes.get(n)
+        if index is None:
+            index = NGramIndex(self.basenames(), n)
+            self._ngram_indexes[n] = index
+        return index
+
+    def write_flags(self, rows: Rows, excluded: Mask, hidden: Mask) -> None:
+        """Sets .is_excluded and .is_hidden of the files in 'rows'"""
+        fileinfos = self.fileinfos
+        for row, is_excluded, is_hidden in zip(rows.tolist(), excluded.tolist(), hidden.tolist()):
+            fi = fileinfos[row]
+            fi.is_excluded = is_excluded
+            fi.is_hidden = is_hidden
+
+    def cached_result(self, query: str) -> Optional[Mask]:
+        mask = self._results.get(query)
+        if mask is not None:
+            self._results.move_to_end(query)
+        return mask
+
+    def cached_results(self) -> Iterator[Tuple[str, Mask]]:
+        """The cached results, most recently used first"""
+        return reversed(list(self._results.items()))
+
+    def store_result(self, query: str, mask: Mask) -> None:
+        self._results[query] = mask
+        self._results.move_to_end(query)
+        while len(self._results) > FileColumns.RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+
+    def metadata(self, field: str, ctor: Callable[[Any], Any]) -> npt.NDArray[numpy.float64]:
+        """The metadata 'field' converted with 'ctor', NaN where missing"""
+        return self._build(("metadata", field, ctor), numpy.float64,
+                           lambda fi: _metadata_value(fi, field, ctor))
+
+
+def _ext_glob(func: GlobMatchFunc) -> Optional[str]:
+    """The extension for case-insensitive globs of the form '*.ext'"""
+    return func.extension() if not func.case_sensitive else None
+
+
+def _ext_globs(func: MultiGlobMatchFunc) -> Optional[Sequence[str]]:
+    """The extensions if 'func' only consists of case-insensitive '*.ext' globs"""
+    if func.rx is not None or func.lower_rx is not None or func.case_sensitive_exts:
+        return None
+    return sorted(func.exts)
+
+
+def _vectorized(func: MatchFunc, columns: FileColumns, rows: Rows) -> Optional[Mask]:
+    """Evaluates 'func' for 'rows' on the columns, None if 'func'
+    has to be evaluated per item"""
+
+    if isinstance(func, SizeMatchFunc):
+        return numpy.asarray(func.compare(columns.size()[rows], func.size))
+    elif isinstance(func, LengthMatchFunc):
+        return numpy.asarray(func.compare(columns.name_length()[rows], func.length))
+    elif isinstance(func, FolderMatchFunc):
+        return columns.isdir()[rows]
+    elif isinstance(func, MetadataMatchFunc):
+        # comparisons with NaN are False, same as a missing field
+        return numpy.asarray(func._compare(columns.metadata(func._field, func._type)[rows], func._value))
+    elif isinstance(func, DateOpMatchFunc):
+        mtime = columns.mtime()[rows]
+        return numpy.asarray((func.lower <= mtime) & (mtime < func.upper))
+    elif isinstance(func, (DateMatchFunc, TimeMatchFunc, TimeOpMatchFunc, WeekdayMatchFunc)):
+        return _local_time(func, columns, rows)
+    elif isinstance(func, GlobMatchFunc):
+        ext = _ext_glob(func)
+        if ext is None:
+            return None
+        return numpy.asarray(columns.ext_id()[rows] == columns.ext_id_of(ext))
+    elif isinstance(func, MultiGlobMatchFunc):
+        exts = _ext_globs(func)
+        if exts is None:
+            return None
+        return numpy.isin(columns.ext_id()[rows], [columns.ext_id_of(ext) for ext in exts])
+    elif isinstance(func, FuzzyMatchFunc):
+        if func.n > NGramIndex.MAX_N:
+            return None
+        return numpy.asarray(columns.name_ngrams(func.n).scores(func.fuzzy_needle)[rows] > func.threshold)
+    else:
+        return None
+
+
+def _local_time(func: MatchFunc, columns: FileColumns, rows: Rows) -> Mask:
+    days = local_days()
+    day = columns.local_day()[rows]
+
+    if isinstance(func, (TimeMatchFunc, TimeOpMatchFunc)):
+        known = days.regular(day)
+    else:
+        known = day >= 0
+
+    result = numpy.zeros(len(rows), dtype=numpy.bool_)
+    day = day[known]
+    if isinstance(func, DateMatchFunc):
+        unique, inverse = numpy.unique(day, return_inverse=True)
+        matches = numpy.fromiter((func.match_day(d) for d in unique.tolist()),
+                                 dtype=numpy.bool_, count=len(unique))
+        result[known] = matches[inverse]
+    elif isinstance(func, WeekdayMatchFunc):
+        result[known] = numpy.array(func.weekdays, dtype=numpy.bool_)[days.weekdays(day)]
+    else:
+        seconds = columns.mtime()[rows][known] - days.starts_array[day]
+        if isinstance(func, TimeOpMatchFunc):
+            result[known] = (func.lower <= seconds) & (seconds < func.upper)
+        else:
+            assert isinstance(func, TimeMatchFunc)
+            second = seconds.astype(numpy.int32)
+            unique, inverse = numpy.unique(second, return_inverse=True)
+            matches = numpy.fromiter((func.match_second(s) for s in unique.tolist()),
+                                     dtype=numpy.bool_, count=len(unique))
+            result[known] = matches[inverse]
+
+    # days outside of local_days() and DST changes
+    if not known.all():
+        unknown = ~known
+        result[unknown] = _per_item(func, columns, rows[unknown])
+    return result
+
+
+def is_cacheable(func: MatchFunc) -> bool:
+    """False if the result of 'func' can change while the FileColumns
+    stay the same, as it does with the file contents or random:"""
+
+    if isinstance(func, (ContainsMatchFunc, RandomMatchFunc)):
+        return False
+    else:
+        return all(is_cacheable(child) for child in func.children())
+
+
+def is_vectorizable(func: MatchFunc) -> bool:
+    """True if at least some part of 'func' can be evaluated on columns"""
+
+    if isinstance(func, CompiledMatchFunc):
+        return is_vectorizable(func.children()[0])
+    elif isinstance(func, (AndMatchFunc, OrMatchFunc, ExcludeMatchFunc)):
+        return any(is_vectorizable(child) for child in func.children())
+    elif isinstance(func, GlobMatchFunc):
+        return _ext_glob(func) is not None
+    elif isinstance(func, MultiGlobMatchFunc):
+        return _ext_globs(func) is not None
+    elif isinstance(func, FuzzyMatchFunc):
+        return func.n <= NGramIndex.MAX_N
+    else:
+        return isinstance(func, (SizeMatchFunc, LengthMatchFunc, FolderMatchFunc, MetadataMatchFunc,
+                                 DateMatchFunc, DateOpMatchFunc, TimeMatchFunc, TimeOpMatchFunc,
+                                 WeekdayMatchFunc))
+
+
+def _chain(funcs: Sequence[MatchFunc], columns: FileColumns, rows: Rows, is_and: bool) -> Mask:
+    # vectorized children first, so that the per item ones only see
+    # the rows that are still undecided
+    funcs = sorted(funcs, key=lambda func: not is_vectorizable(func))
+
+    result = numpy.full(len(rows), is_and, dtype=numpy.bool_)
+    for func in funcs:
+        undecided = result if is_and else ~result
+        if not undecided.any():
+            break
+
+        result[undecided] = evaluate(func, columns, rows[undecided])
+    return result
+
+
+def evaluate(func: MatchFunc, columns: FileColumns, rows: Optional[Rows] = None) -> Mask:
+    """Evaluates 'func' for the given 'rows' of 'columns', all rows by
+    default. Stat and metadata predicates are evaluated as vectorized
+    masks, everything else is called per item."""
+
+    if rows is None:
+        rows = numpy.arange(len(columns), dtype=numpy.intp)
+
+    if isinstance(func, CompiledMatchFunc):
+        if not is_vectorizable(func):
+            return _per_item(func.function, columns, rows)
+        func = func.children()[0]
+
+    if isinstance(func, AndMatchFunc):
+        return _chain(func.children(), columns, rows, True)
+    elif isinstance(func, OrMatchFunc):
+        return _chain(func.children(), columns, rows, False)
+    elif isinstance(func, ExcludeMatchFunc):
+        return ~evaluate(func.children()[0], columns, rows)
+    elif isinstance(func, TrueMatchFunc):
+        return numpy.ones(len(rows), dtype=numpy.bool_)
+    elif isinstance(func, FalseMatchFunc):
+        return numpy.zeros(len(rows), dtype=numpy.bool_)
+
+    mask = _vectorized(func, columns, rows)
+    if mask is not None:
+        return mask
+    else:
+        return _per_item(func, columns, rows)
+
+
+def _per_item(func: Callable[[FileInfo], bool], columns: FileColumns, rows: Rows) -> Mask:
+    if isinstance(func, MatchFunc):
+        func = compile_match_func(func).function
+
+    fileinfos = columns.fileinfos
+    return numpy.fromiter((func(fileinfos[row]) for row in rows.tolist()),
+                          dtype=numpy.bool_, count=len(rows))
+
+
+# EOF #
@@ -0,0 +1,423 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import overload, Any, Callable, Dict, Iterator, Optional, Sequence, Tuple, TypeVar, Union
+
+import math
+import os
+import weakref
+
+import numpy
+import numpy.typing as npt
+
+from dirtoo.filecollection.columns import FileColumns, Mask, Rows
+from dirtoo.filecollection.file_store import FileStore
+from dirtoo.filecollection.grouper import Grouper
+from dirtoo.filecollection.sort_order import SortOrder
+from dirtoo.filecollection.sorter import Sorter
+from dirtoo.filesystem.file_info import FileInfo, FileInfoError
+from dirtoo.filesystem.location import Location
+
+
+T = TypeVar('T')
+
+
+# the fields of os.stat_result kept per row
+STAT_FIELDS = [
+    ("st_mode", numpy.uint32),
+    ("st_ino", numpy.uint64),
+    ("st_dev", numpy.uint64),
+    ("st_nlink", numpy.uint32),
+    ("st_uid", numpy.uint32),
+    ("st_gid", numpy.uint32),
+    ("st_size", numpy.int64),
+    ("st_atime", numpy.float64),
+    ("st_mtime", numpy.float64),
+    ("st_ctime", numpy.float64),
+]
+
+FLAG_FIELDS = ["has_stat", "isdir", "isfile", "issymlink", "have_access", "is_excluded", "is_hidden"]
+
+
+class CompactFileStore(FileStore):
+    """Keeps files as rows of NumPy arrays for the stat fields and
+    flags, with the directory names interned and only the basenames as
+    separate strings, which takes a fraction of the memory of a FileInfo
+    object per file. FileInfo objects are created when asked for and
+    reused as long as they are referenced elsewhere. Rows are only
+    appended, removed files leave a dead row behind until
+    SortOrder.compact() drops them and the rows are numbered anew.
+
+    .is_excluded, .is_hidden and .group are stored per row by
+    FileCollection.set_filter() and set_grouper(), setting them
+    directly on a FileInfo only lasts as long as that object does."""
+
+    def __init__(self, sorter: Sorter) -> None:
+        self._order = SortOrder(sorter, lambda rows: map(self._fileinfo, rows))
+        self.clear()
+
+    def clear(self) -> None:
+        self._count = 0
+        self._capacity = 0
+        self._arrays: Dict[str, npt.NDArray[Any]] = {}
+        for field, dtype in STAT_FIELDS:
+            self._arrays[field] = numpy.zeros(0, dtype=dtype)
+        for field in FLAG_FIELDS:
+            self._arrays[field] = numpy.zeros(0, dtype=numpy.bool_)
+        self._arrays["error"] = numpy.zeros(0, dtype=numpy.uint8)
+        self._arrays["dir_id"] = numpy.zeros(0, dtype=numpy.int32)
+
+        self._dirs: list[str] = []
+        self._dir2id: Dict[str, int] = {}
+        self._names: list[str] = []
+        self._groups: list[Any] = []
+
+        # sparse per row values, only present where they differ from
+        # what would be derived from the directory and basename
+        self._locations: Dict[int, Location] = {}
+        self._abspaths: Dict[int, Tuple[str, str]] = {}
+        self._metadata: Dict[int, Dict[str, Any]] = {}
+
+        # hash(location) -> row or list of rows
+        self._location_rows: Dict[int, Union[int, list[int]]] = {}
+
+        self._order.clear()
+        self._live: weakref.WeakValueDictionary[int, FileInfo] = weakref.WeakValueDictionary()
+
+    def _reserve(self, count: int) -> None:
+        if count <= self._capacity:
+            return
+
+        capacity = max(count, self._capacity * 2, 1024)
+        for field, array in self._arrays.items():
+            grown = numpy.zeros(capacity, dtype=array.dtype)
+            grown[:self._count] = array[:self._count]
+            self._arrays[field] = grown
+        self._capacity = capacity
+
+    def _rows(self, location: Location) -> list[int]:
+        rows = self._location_rows.get(hash(location))
+        if rows is None:
+            return []
+        elif isinstance(rows, int):
+            rows = [rows]
+        return [row for row in rows if self._location(row) == location]
+
+    def _add_location_row(self, location: Location, row: int) -> None:
+        key = hash(location)
+        rows = self._location_rows.get(key)
+        if rows is None:
+            self._location_rows[key] = row
+        elif isinstance(rows, int):
+            self._location_rows[key] = [rows, row]
+        else:
+            rows.append(row)
+
+    def _remove_location_row(self, location: Location, row: int) -> None:
+        key = hash(location)
+        rows = self._location_rows[key]
+        if isinstance(rows, int) or rows == [row]:
+            del self._location_rows[key]
+        else:
+            rows.remove(row)
+
+    def _abspath(self, row: int) -> str:
+        override = self._abspaths.get(row)
+        if override is not None:
+            return override[0]
+        return os.path.join(self._dirs[self._arrays["dir_id"][row]], self._names[row])
+
+    def _location(self, row: int) -> Location:
+        location = self._locations.get(row)
+        if location is not None:
+            return location
+        return Location("file", self._abspath(row), [])
+
+    def _fileinfo(self, row: int) -> FileInfo:
+        fi = self._live.get(row)
+        if fi is not None:
+            return fi
+
+        arrays = self._arrays
+        fi = FileInfo(self._location(row))
+        fi._dirname = self._dirs[arrays["dir_id"][row]]
+        fi._basename = self._names[row]
+        override = self._abspaths.get(row)
+        if override is not None:
+            fi._abspath, fi._ext = override
+        else:
+            fi._abspath = os.path.join(fi._dirname, fi._basename)
+            fi._ext = os.path.splitext(fi._abspath)[1]
+
+        fi._isdir = bool(arrays["isdir"][row])
+        fi._isfile = bool(arrays["isfile"][row])
+        fi._issymlink = bool(arrays["issymlink"][row])
+        fi._have_access = bool(arrays["have_access"][row])
+        fi._error = FileInfoError(int(arrays["error"][row]))
+
+        if arrays["has_stat"][row]:
+            values = [arrays[field][row].item() for field, _ in STAT_FIELDS]
+            atime, mtime, ctime = values[7:]
+            # like the OS, the integer fields hold the whole seconds
+            fi._stat = os.stat_result(values[:7] + [math.floor(atime), math.floor(mtime), math.floor(ctime)],
+                                      {"st_atime": atime, "st_mtime": mtime, "st_ctime": ctime})
+
+        metadata = self._metadata.get(row)
+        if metadata is not None:
+            fi._metadata = metadata
+
+        fi.is_excluded = bool(arrays["is_excluded"][row])
+        fi.is_hidden = bool(arrays["is_hidden"][row])
+        fi.group = self._groups[row]
+
+        self._live[row] = fi
+        return fi
+
+    def add_fileinfos(self, fileinfos: Sequence[FileInfo]) -> None:
+        start = self._count
+        end = start + len(fileinfos)
+        self._reserve(end)
+
+        arrays = self._arrays
+        stats = [fi._stat for fi in fileinfos]
+        arrays["has_stat"][start:end] = [st is not None for st in stats]
+        for field, _ in STAT_FIELDS:
+            arrays[field][start:end] = [getattr(st, field) if st is not None else 0 for st in stats]
+
+        for field, attr in [("isdir", "_isdir"), ("isfile", "_isfile"), ("issymlink", "_issymlink"),
+                            ("have_access", "_have_access"), ("is_excluded", "is_excluded"),
+                            ("is_hidden", "is_hidden")]:
+            arrays[field][start:end] = [getattr(fi, attr) for fi in fileinfos]
+        arrays["error"][start:end] = [fi._error.value for fi in fileinfos]
+
+        dir2id = self._dir2id
+        for row, fi in enumerate(fileinfos, start):
+            dir_id = dir2id.get(fi._dirname)
+            if dir_id is None:
+                dir_id = dir2id[fi._dirname] = len(self._dirs)
+                self._dirs.append(fi._dirname)
+            arrays["dir_id"][row] = dir_id
+            self._names.append(fi._basename)
+
+            if os.path.join(fi._dirname, fi._basename) != fi._abspath or \
+               os.path.splitext(fi._abspath)[1] != fi._ext:
+                self._abspaths[row] = (fi._abspath, fi._ext)
+
+            location = fi.location()
+            if location.protocol() != "file" or location.has_payload() or location.get_path() != fi._abspath:
+                self._locations[row] = location
+            self._add_location_row(location, row)
+
+            if fi._metadata:
+                self._metadata[row] = fi._metadata
+
+            self._live[row] = fi
+
+        self._groups.extend(fi.group for fi in fileinfos)
+        self._count = end
+        self._order.add(fileinfos)
+
+    def _remove_row(self, row: int) -> None:
+        self._order.remove(row)
+        self._remove_location_row(self._location(row), row)
+        self._groups[row] = None
+        self._metadata.pop(row, None)
+        self._live.pop(row, None)
+
+    def _compact(self) -> None:
+        live = self._order.compact()
+        if live is None:
+            return
+
+        renumber = numpy.full(self._count, -1, dtype=numpy.intp)
+        renumber[live] = numpy.arange(len(live))
+
+        for field, array in self._arrays.items():
+            self._arrays[field] = array[live]
+        live_rows = live.tolist()
+        self._names = [self._names[row] for row in live_rows]
+        self._groups = [self._groups[row] for row in live_rows]
+        self._count = self._capacity = len(live_rows)
+
+        def renumbered(values: Dict[int, T]) -> Dict[int, T]:
+            return {int(renumber[row]): value for row, value in values.items() if renumber[row] >= 0}
+
+        self._locations = renumbered(self._locations)
+        self._abspaths = renumbered(self._abspaths)
+        self._metadata = renumbered(self._metadata)
+        self._location_rows = {key: int(renumber[rows]) if isinstance(rows, int) else renumber[rows].tolist()
+                               for key, rows in self._location_rows.items()}
+        self._live = weakref.WeakValueDictionary(renumbered(dict(self._live.items())))
+
+    def remove_location(self, location: Location) -> bool:
+        rows = self._rows(location)
+        for row in rows:
+            self._remove_row(row)
+        self._compact()
+        return bool(rows)
+
+    def replace_fileinfo(self, fileinfo: FileInfo) -> None:
+        rows = self._rows(fileinfo.location())
+        if not rows:
+            raise KeyError("location not in store: {}".format(fileinfo.location()))
+
+        if any(self._live.get(row) is fileinfo for row in rows):
+            return
+
+        for row in rows:
+            self._remove_row(row)
+        self._compact()
+        self.add_fileinfos([fileinfo])
+
+    def update_metadata(self, location: Location, metadata: Dict[str, Any]) -> Optional[FileInfo]:
+        rows = self._rows(location)
+        if not rows:
+            return None
+
+        row = rows[0]
+        fileinfo = self._fileinfo(row)
+
+        fileinfo._metadata.update(metadata)
+        self._metadata[row] = fileinfo._metadata
+        self._order.update(row, fileinfo, metadata.keys())
+        return fileinfo
+
+    def get_fileinfo(self, location: Location) -> Optional[FileInfo]:
+        rows = self._rows(location)
+        return self._fileinfo(rows[0]) if rows else None
+
+    def index(self, fileinfo: FileInfo) -> int:
+        for row in self._rows(fileinfo.location()):
+            if self._live.get(row) is fileinfo:
+                return self._order.index(row)
+        raise ValueError("{} not in store".format(fileinfo))
+
+    @overload
+    def __getitem__(self, key: int) -> FileInfo:
+        ...
+
+    @overload
+    def __getitem__(self, key: slice) -> list[FileInfo]:
+        ...
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[FileInfo, list[FileInfo]]:
+        if isinstance(key, slice):
+            return [self._fileinfo(row) for row in self._order[key]]
+        else:
+            return self._fileinfo(self._order[key])
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self) -> Iterator[FileInfo]:
+        return (self._fileinfo(row) for row in self._order)
+
+    def set_sorter(self, sorter: Sorter) -> None:
+        self._order.set_sorter(sorter)
+
+    def set_grouper(self, grouper: Grouper) -> None:
+        for row in self._order:
+            fi = self._fileinfo(row)
+            grouper(fi)
+            self._groups[row] = fi.group
+
+    def columns(self) -> FileColumns:
+        return CompactFileColumns(self)
+
+    def verify(self) -> None:
+        for row in self._order:
+            assert self._fileinfo(row).location() == self._location(row)
+            assert row in self._rows(self._location(row))
+
+
+class _RowSequence(Sequence[FileInfo]):
+    """The FileInfo of every row of a CompactFileStore, dead rows included"""
+
+    def __init__(self, store: CompactFileStore) -> None:
+        self._store = store
+        self._count = store._count
+
+    @overload
+    def __getitem__(self, key: int) -> FileInfo:
+        ...
+
+    @overload
+    def __getitem__(self, key: slice) -> Sequence[FileInfo]:
+        ...
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[FileInfo, Sequence[FileInfo]]:
+        if isinstance(key, slice):
+            return [self._store._fileinfo(row) for row in range(self._count)[key]]
+        else:
+            return self._store._fileinfo(range(self._count)[key])
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class CompactFileColumns(FileColumns):
+    """FileColumns that take the stat fields, names and metadata
+    straight from the arrays of a CompactFileStore, rows are the rows
+    of the store, including the dead ones"""
+
+    def __init__(self, store: CompactFileStore) -> None:
+        super().__init__(_RowSequence(store))
+        self._store = store
+        self._count = store._count
+
+    def _array(self, field: str) -> npt.NDArray[Any]:
+        return self._store._arrays[field][:self._count]
+
+    def size(self) -> npt.NDArray[numpy.int64]:
+        return self._array("st_size")
+
+    def mtime(self) -> npt.NDArray[numpy.float64]:
+        return self._array("st_mtime")
+
+    def isdir(self) -> Mask:
+        return self._array("isdir")
+
+    def basenames(self) -> Sequence[str]:
+        return self._store._names[:self._count]
+
+    def metadata(self, field: str, ctor: Callable[[Any], Any]) -> npt.NDArray[numpy.float64]:
+        key = ("metadata", field, ctor)
+        column = self._columns.get(key)
+        if column is None:
+            column = numpy.full(self._count, numpy.nan, dtype=numpy.float64)
+            for row, metadata in self._store._metadata.items():
+                if field in metadata:
+                    try:
+                        column[row] = float(ctor(metadata[field]))
+                    except Exception:
+                        pass
+            self._columns[key] = column
+        return column
+
+    def write_flags(self, rows: Rows, excluded: Mask, hidden: Mask) -> None:
+        self._store._arrays["is_excluded"][rows] = excluded
+        self._store._arrays["is_hidden"][rows] = hidden
+
+        live = self._store._live
+        for row, is_excluded, is_hidden in zip(rows.tolist(), excluded.tolist(), hidden.tolist()):
+            fi = live.get(row)
+            if fi is not None:
+                fi.is_excluded = is_excluded
+                fi.is_hidden = is_hidden
+
+
+# EOF #
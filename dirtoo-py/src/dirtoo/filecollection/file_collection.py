@@ -15,16 +15,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import cast, overload, Iterable, Optional, Dict, Sequence, Union
+from typing import overload, Callable, Iterable, Optional, Dict, Sequence, Union
 
 import logging
 
-from collections import defaultdict
-from sortedcontainers import SortedList
-
 from PyQt6.QtCore import QObject, pyqtSignal
 
 from dirtoo.filesystem.file_info import FileInfo
+from dirtoo.filecollection.columns import FileColumns
+from dirtoo.filecollection.file_store import FileStore, ObjectFileStore
 from dirtoo.filecollection.filter import Filter
 from dirtoo.filecollection.grouper import Grouper, NoGrouper
 from dirtoo.filecollection.sorter import Sorter
@@ -38,6 +37,9 @@ class FileCollection(QObject):
     # A new file entry has been added
     sig_file_added = pyqtSignal(int, FileInfo)
 
+    # A batch of new file entries has been added
+    sig_files_added = pyqtSignal(list)
+
     # An existing file entry has been removed
     sig_file_removed = pyqtSignal(Location)
 
@@ -64,58 +66,73 @@ class FileCollection(QObject):
     # The file list has been grouped, .group has been set
     sig_files_grouped = pyqtSignal()
 
-    def __init__(self) -> None:
+    def __init__(self, store: Optional[Callable[[Sorter], FileStore]] = None) -> None:
+        """'store' creates the FileStore for a Sorter, ObjectFileStore
+        by default"""
+
         super().__init__()
 
         self._grouper: Grouper = NoGrouper()
         self._filter: Filter = Filter()
         self._sorter: Sorter = Sorter()
 
-        self._location2fileinfo: Dict[Location, list[FileInfo]] = defaultdict(list)
-        self._fileinfos: SortedList[FileInfo] = SortedList(key=self._sorter.get_key_func())
+        self._store: FileStore = (store or ObjectFileStore)(self._sorter)
+
+        # columnar copy of the stat and metadata fields of the store,
+        # built on demand and dropped whenever a file is added, removed
+        # or modified, the sort order doesn't matter for filtering
+        self._columns: Optional[FileColumns] = None
+
+    def _invalidate_columns(self) -> None:
+        self._columns = None
+
+    def columns(self) -> FileColumns:
+        if self._columns is None:
+            self._columns = self._store.columns()
+        return self._columns
 
     def clear(self) -> None:
         logger.debug("FileCollection.clear")
 
-        self._location2fileinfo.clear()
-        self._fileinfos.clear()
+        self._store.clear()
+        self._invalidate_columns()
 
         self.sig_files_set.emit()
 
     def set_fileinfos(self, fileinfos_iter: Iterable[FileInfo]) -> None:
         logger.debug("FileCollection.set_fileinfos")
 
-        # force to list, as we iterate over it twice
-        fileinfos = list(fileinfos_iter)
-
-        for fi in fileinfos:
-            self._location2fileinfo[fi.location()].append(fi)
-
-        self._fileinfos.clear()
-        self._fileinfos.update(fileinfos)
+        self._store.set_fileinfos(list(fileinfos_iter))
+        self._invalidate_columns()
 
         self.sig_files_set.emit()
 
     def add_fileinfo(self, fi: FileInfo) -> None:
         logger.debug("FileCollection.add_fileinfos: %s", fi)
 
-        self._location2fileinfo[fi.location()].append(fi)
-
-        self._fileinfos.add(fi)
+        self._store.add_fileinfos([fi])
+        self._invalidate_columns()
 
-        idx = self._fileinfos.index(fi)
+        idx = self._store.index(fi)
         self.sig_file_added.emit(idx, fi)
 
+    def add_fileinfos(self, fis: Sequence[FileInfo]) -> None:
+        """Same as add_fileinfo() for a whole batch of files, with
+        only a single insert into the sorted list and a single signal"""
+
+        logger.debug("FileCollection.add_fileinfos: %d files", len(fis))
+
+        self._store.add_fileinfos(fis)
+        self._invalidate_columns()
+
+        self.sig_files_added.emit(list(fis))
+
     def remove_file(self, location: Location) -> None:
-        if location not in self._location2fileinfo:
+        if not self._store.remove_location(location):
             logger.error("FileCollection.remove_file: %s: KeyError", location)
         else:
             logger.debug("FileCollection.remove_file: %s", location)
-            fis = self._location2fileinfo[location]
-
-            del self._location2fileinfo[location]
-            for fi in fis:
-                self._fileinfos.remove(fi)
+            self._invalidate_columns()
 
             self.sig_file_removed.emit(location)
 
@@ -129,17 +146,12 @@ class FileCollection(QObject):
             self.sig_file_modified.emit(fileinfo)
 
     def update_metadata(self, location: Location, metadata: Dict[str, object]) -> None:
-        fileinfo = self.get_fileinfo(location)
+        fileinfo = self._store.update_metadata(location, metadata)
         if fileinfo is None:
             logger.error("Controller.receive_metadata: not found fileinfo for %s", location)
             return
 
-        # FIXME: filedata must not be updated while it is inside
-        # SortedList, as otherwise SortedList corrupts due to the sort
-        # order being invalid. This is an ugly workaround
-        self._fileinfos.remove(fileinfo)
-        fileinfo._metadata.update(metadata)
-        self._fileinfos.add(fileinfo)
+        self._invalidate_columns()
 
         self.sig_fileinfo_updated.emit(fileinfo)
 
@@ -153,20 +165,16 @@ class FileCollection(QObject):
             self.sig_file_closed.emit(fileinfo)
 
     def get_fileinfos(self) -> Sequence[FileInfo]:
+        fileinfos = list(self._store)
         if self._sorter.reverse:
-            return list(reversed(self._fileinfos))
-        else:
-            return list(self._fileinfos)
+            fileinfos.reverse()
+        return fileinfos
 
     def get_fileinfo(self, location: Location) -> Optional[FileInfo]:
-        if location not in self._location2fileinfo:
-            return None
-        else:
-            fis = self._location2fileinfo[location]
-            return fis[0]  # FIXME: this is fishy
+        return self._store.get_fileinfo(location)
 
     def index(self, fileinfo: FileInfo) -> int:
-        return cast(int, self._fileinfos.index(fileinfo))
+        return self._store.index(fileinfo)
 
     @overload
     def __getitem__(self, key: int) -> FileInfo:
@@ -177,32 +185,29 @@ class FileCollection(QObject):
         ...
 
     def __getitem__(self, key: Union[int, slice]) -> Union[FileInfo, list[FileInfo]]:
-        return cast(Union[FileInfo, list[FileInfo]],
-                    self._fileinfos[key])
+        return self._store[key]
 
     def __len__(self) -> int:
-        return len(self._fileinfos)
+        return len(self._store)
 
     def set_grouper(self, grouper: Grouper) -> None:
         self._grouper = grouper
 
-        for fi in self._fileinfos:
-            self._grouper(fi)
+        self._store.set_grouper(self._grouper)
 
         self.sig_files_grouped.emit()
 
     def set_filter(self, filt: Filter) -> None:
         self._filter = filt
 
-        for fi in self._fileinfos:
-            self._filter.apply(fi)
+        columns = self.columns()
+        self._filter.apply_many(columns.fileinfos, columns)
 
         self.sig_files_filtered.emit()
 
     def set_sorter(self, sorter: Sorter) -> None:
-        print("rebuilding fileinfos")
         self._sorter = sorter
-        self._fileinfos = SortedList(self._fileinfos, key=self._sorter.get_key_func())
+        self._store.set_sorter(self._sorter)
         self.sig_files_reordered.emit()
 
     # def sort(self, key, reverse: bool=False) -> None:
@@ -214,33 +219,11 @@ class FileCollection(QObject):
     #     self.sig_files_reordered.emit()
 
     def _replace_fileinfo(self, fileinfo: FileInfo) -> None:
-        if fileinfo in self._fileinfos:
-            return
-
-        location = fileinfo.location()
-
-        if location not in self._location2fileinfo:
-            raise KeyError("location not in location2fileinfo: {}".format(location))
-
-        fis = self._location2fileinfo[location]
-
-        self._location2fileinfo[location] = [fileinfo]
-
-        for fi in fis:
-            self._fileinfos.remove(fi)
-
-        self._fileinfos.add(fileinfo)
+        self._store.replace_fileinfo(fileinfo)
+        self._invalidate_columns()
 
     def verify(self) -> None:
-        for item in self._fileinfos:
-            print(item)
-        print("------------------")
-        for k, v in self._location2fileinfo.items():
-            print(f"{k} {v}")
-        print("------------------")
-        for loc, fis in self._location2fileinfo.items():
-            for fi in fis:
-                self._fileinfos.index(fi)
+        self._store.verify()
 
     # def shuffle(self) -> None:
     #     logger.debug("FileCollection.sort")
@@ -254,7 +237,7 @@ class FileCollection(QObject):
 
     def save_as(self, filename: str) -> None:
         with open(filename, "w") as fout:
-            for fi in self._fileinfos:
+            for fi in self._store:
                 fout.write(fi.abspath())
                 fout.write("\n")
 
@@ -0,0 +1,243 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import cast, overload, Any, Dict, Iterable, Iterator, Optional, Sequence, Union
+
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from dirtoo.filecollection.columns import FileColumns
+from dirtoo.filecollection.grouper import Grouper
+from dirtoo.filecollection.sort_order import SortOrder
+from dirtoo.filecollection.sorter import Sorter
+from dirtoo.filesystem.file_info import FileInfo
+from dirtoo.filesystem.location import Location
+
+
+class FileStore(ABC):
+    """The files of a FileCollection, kept in the order given by a
+    Sorter. Stores may create FileInfo objects on demand, a
+    FileInfo only stays the same object as long as it is referenced."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    def set_fileinfos(self, fileinfos: Sequence[FileInfo]) -> None:
+        self.clear()
+        self.add_fileinfos(fileinfos)
+
+    @abstractmethod
+    def add_fileinfos(self, fileinfos: Sequence[FileInfo]) -> None:
+        pass
+
+    @abstractmethod
+    def remove_location(self, location: Location) -> bool:
+        """Removes all files at 'location', False if there were none"""
+        pass
+
+    @abstractmethod
+    def replace_fileinfo(self, fileinfo: FileInfo) -> None:
+        """Replaces the files at the location of 'fileinfo' with it,
+        raises KeyError if there are none"""
+        pass
+
+    @abstractmethod
+    def update_metadata(self, location: Location, metadata: Dict[str, Any]) -> Optional[FileInfo]:
+        """Adds 'metadata' to the file at 'location' and returns it,
+        None if there is no such file"""
+        pass
+
+    @abstractmethod
+    def get_fileinfo(self, location: Location) -> Optional[FileInfo]:
+        pass
+
+    @abstractmethod
+    def index(self, fileinfo: FileInfo) -> int:
+        """The position of 'fileinfo' in sort order, raises ValueError
+        if it isn't in the store"""
+        pass
+
+    @overload
+    def __getitem__(self, key: int) -> FileInfo:
+        ...
+
+    @overload
+    def __getitem__(self, key: slice) -> list[FileInfo]:
+        ...
+
+    @abstractmethod
+    def __getitem__(self, key: Union[int, slice]) -> Union[FileInfo, list[FileInfo]]:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[FileInfo]:
+        """The files in sort order"""
+        pass
+
+    @abstractmethod
+    def set_sorter(self, sorter: Sorter) -> None:
+        """Sorts the files by 'sorter' from now on"""
+        pass
+
+    @abstractmethod
+    def set_grouper(self, grouper: Grouper) -> None:
+        """Sets the .group of all files"""
+        pass
+
+    @abstractmethod
+    def columns(self) -> FileColumns:
+        """A FileColumns of all files, only valid until the next
+        modification, rows are not in sort order"""
+        pass
+
+    def verify(self) -> None:
+        pass
+
+
+class ObjectFileStore(FileStore):
+    """Keeps a FileInfo object per file"""
+
+    def __init__(self, sorter: Sorter) -> None:
+        # indexed by row, None once the file was removed, until
+        # SortOrder.compact() drops the removed rows
+        self._fileinfos: list[Optional[FileInfo]] = []
+        self._location2rows: Dict[Location, list[int]] = defaultdict(list)
+        # SortOrder only asks for live rows
+        self._order = SortOrder(sorter, lambda rows: cast(Iterable[FileInfo], map(self._fileinfos.__getitem__, rows)))
+
+    def _fileinfo(self, row: int) -> FileInfo:
+        fileinfo = self._fileinfos[row]
+        assert fileinfo is not None
+        return fileinfo
+
+    def _rows(self, location: Location) -> list[int]:
+        return self._location2rows.get(location, [])
+
+    def clear(self) -> None:
+        self._fileinfos.clear()
+        self._location2rows.clear()
+        self._order.clear()
+
+    def add_fileinfos(self, fileinfos: Sequence[FileInfo]) -> None:
+        self._fileinfos.extend(fileinfos)
+        rows = self._order.add(fileinfos)
+        for row, fi in zip(rows, fileinfos):
+            self._location2rows[fi.location()].append(row)
+
+    def remove_location(self, location: Location) -> bool:
+        rows = self._location2rows.pop(location, None)
+        if rows is None:
+            return False
+
+        for row in rows:
+            self._order.remove(row)
+            self._fileinfos[row] = None
+        self._compact()
+        return True
+
+    def _compact(self) -> None:
+        live = self._order.compact()
+        if live is None:
+            return
+
+        self._fileinfos = [self._fileinfos[row] for row in live.tolist()]
+        self._location2rows.clear()
+        for row, fi in enumerate(self._fileinfos):
+            assert fi is not None
+            self._location2rows[fi.location()].append(row)
+
+    def replace_fileinfo(self, fileinfo: FileInfo) -> None:
+        location = fileinfo.location()
+        rows = self._rows(location)
+
+        if not rows:
+            raise KeyError("location not in location2rows: {}".format(location))
+
+        if any(self._fileinfos[row] is fileinfo for row in rows):
+            return
+
+        self.remove_location(location)
+        self.add_fileinfos([fileinfo])
+
+    def update_metadata(self, location: Location, metadata: Dict[str, Any]) -> Optional[FileInfo]:
+        rows = self._rows(location)
+        if not rows:
+            return None
+
+        fileinfo = self._fileinfo(rows[0])
+        fileinfo._metadata.update(metadata)
+        self._order.update(rows[0], fileinfo, metadata.keys())
+        return fileinfo
+
+    def get_fileinfo(self, location: Location) -> Optional[FileInfo]:
+        rows = self._rows(location)
+        return self._fileinfo(rows[0]) if rows else None  # FIXME: this is fishy
+
+    def index(self, fileinfo: FileInfo) -> int:
+        for row in self._rows(fileinfo.location()):
+            if self._fileinfos[row] is fileinfo:
+                return self._order.index(row)
+        raise ValueError("{} not in store".format(fileinfo))
+
+    @overload
+    def __getitem__(self, key: int) -> FileInfo:
+        ...
+
+    @overload
+    def __getitem__(self, key: slice) -> list[FileInfo]:
+        ...
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[FileInfo, list[FileInfo]]:
+        if isinstance(key, slice):
+            return [self._fileinfo(row) for row in self._order[key]]
+        else:
+            return self._fileinfo(self._order[key])
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self) -> Iterator[FileInfo]:
+        return (self._fileinfo(row) for row in self._order)
+
+    def set_sorter(self, sorter: Sorter) -> None:
+        self._order.set_sorter(sorter)
+
+    def set_grouper(self, grouper: Grouper) -> None:
+        for fi in self:
+            grouper(fi)
+
+    def columns(self) -> FileColumns:
+        return FileColumns([fi for fi in self._fileinfos if fi is not None])
+
+    def verify(self) -> None:
+        for item in self:
+            print(item)
+        print("------------------")
+        for k, v in self._location2rows.items():
+            print(f"{k} {v}")
+        print("------------------")
+        for loc, rows in self._location2rows.items():
+            for row in rows:
+                self._order.index(row)
+
+
+# EOF #
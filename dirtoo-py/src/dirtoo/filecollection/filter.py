@@ -15,12 +15,17 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import Optional
+from typing import Optional, Sequence
+
+import numpy
 
 # FIXME: this breaks encapsulation
 # from dirtoo.fileview.settings import settings
 
+from dirtoo.filecollection.columns import FileColumns, Mask, evaluate, is_cacheable
+from dirtoo.filter.filter_expr_parser import FilterExprParser
 from dirtoo.filter.match_func import MatchFunc
+from dirtoo.filter.match_func_compiler import compile_match_func
 from dirtoo.filesystem.file_info import FileInfo
 
 
@@ -31,12 +36,84 @@ class Filter:
         self.show_inaccessible = True
         self.match_func: Optional[MatchFunc] = None
 
+        # the text 'match_func' was parsed from, used to look up and
+        # refine earlier results
+        self.query: Optional[str] = None
+        # False when the result of 'match_func' can't be reused
+        self._cacheable = True
+        self._parser: Optional[FilterExprParser] = None
+
     def apply(self, fileinfo: FileInfo) -> None:
         fileinfo.is_excluded = self._is_excluded(fileinfo)
         fileinfo.is_hidden = self._is_hidden(fileinfo)
 
-    def set_match_func(self, match_func: Optional[MatchFunc]) -> None:
-        self.match_func = match_func
+    def apply_many(self, fileinfos: Sequence[FileInfo], columns: Optional[FileColumns] = None) -> None:
+        """Same as apply() for all 'fileinfos', with the match function
+        evaluated on the 'columns' of them where possible"""
+
+        if columns is None:
+            columns = FileColumns(fileinfos)
+
+        if self.match_func is None:
+            excluded = numpy.zeros(len(columns), dtype=numpy.bool_)
+        else:
+            excluded = ~self._evaluate(self.match_func, columns)
+
+        if self.show_hidden:
+            hidden = numpy.zeros(len(columns), dtype=numpy.bool_)
+        else:
+            names = columns.basenames()
+            hidden = numpy.fromiter((name.startswith(".") for name in names),
+                                    dtype=numpy.bool_, count=len(names))
+
+        # only touch the FileInfo objects whose flags changed since
+        # the last time these columns were filtered
+        if columns.excluded is None or columns.hidden is None:
+            changed = numpy.arange(len(columns))
+        else:
+            changed = numpy.flatnonzero((excluded != columns.excluded) | (hidden != columns.hidden))
+
+        columns.write_flags(changed, excluded[changed], hidden[changed])
+
+        columns.excluded = excluded
+        columns.hidden = hidden
+
+    def _evaluate(self, match_func: MatchFunc, columns: FileColumns) -> Mask:
+        if self.query is None:
+            return evaluate(match_func, columns)
+
+        if self._cacheable:
+            mask = columns.cached_result(self.query)
+            if mask is not None:
+                return mask
+
+        # When the query refines an earlier one only the files
+        # matched by that one need to be looked at. Only results that
+        # can be reused get cached, so that also holds for queries
+        # whose own result can't be.
+        if self._parser is None:
+            self._parser = FilterExprParser()
+
+        for query, previous in columns.cached_results():
+            if self._parser.is_refinement(query, self.query):
+                rows = numpy.flatnonzero(previous)
+                mask = numpy.zeros(len(columns), dtype=numpy.bool_)
+                mask[rows] = evaluate(match_func, columns, rows)
+                break
+        else:
+            mask = evaluate(match_func, columns)
+
+        if self._cacheable:
+            columns.store_result(self.query, mask)
+        return mask
+
+    def set_match_func(self, match_func: Optional[MatchFunc], query: Optional[str] = None) -> None:
+        """'query' is the text 'match_func' was parsed from, if given
+        results are cached and refined by it"""
+
+        self.match_func = compile_match_func(match_func) if match_func is not None else None
+        self.query = query if match_func is not None else None
+        self._cacheable = match_func is None or is_cacheable(match_func)
 
     def _is_hidden(self, fileinfo: FileInfo) -> bool:
         if not self.show_hidden:
@@ -0,0 +1,370 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import overload, Any, Callable, Collection, Dict, Iterable, Iterator, Optional, Sequence, Union
+
+import itertools
+from collections import OrderedDict
+
+import numpy
+import numpy.typing as npt
+from sortedcontainers import SortedKeyList
+
+from dirtoo.filecollection.sorter import Sorter
+from dirtoo.filesystem.file_info import FileInfo
+
+
+KeyFunc = Callable[[FileInfo], Any]
+Rows = npt.NDArray[numpy.intp]
+
+
+def _grow(array: npt.NDArray[Any], count: int) -> npt.NDArray[Any]:
+    if count <= len(array):
+        return array
+    grown = numpy.zeros(max(count, len(array) * 2, 1024), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _numeric_column(values: list[Any]) -> Optional[npt.NDArray[Any]]:
+    """'values' as an array that sorts the same way, None unless they
+    are all numbers that fit into int64 or float64"""
+
+    if not values or isinstance(values[0], str):
+        return None
+
+    try:
+        column = numpy.array(values)
+    except (TypeError, ValueError):
+        return None
+
+    if column.ndim != 1 or column.dtype.kind not in "biuf":
+        return None
+    elif column.dtype.kind == "f" and column.tolist() != values:
+        # large ints mixed with floats, NaN
+        return None
+    else:
+        return column
+
+
+def _take(values: list[Any], rows: list[int]) -> list[Any]:
+    return list(map(values.__getitem__, rows))
+
+
+class _KeyCache:
+    """The values of one key function for every row, None for removed
+    rows, and the rows sorted by them"""
+
+    def __init__(self, metadata: Optional[frozenset[str]]) -> None:
+        # the metadata keys the key function depends on, None if unknown
+        self.metadata = metadata
+
+        self.values: list[Any] = []
+
+        # sorted live rows, stays valid when rows are removed, but not
+        # when rows are added or values change
+        self.order: Optional[Rows] = None
+
+    def depends_on(self, metadata_keys: Collection[str]) -> bool:
+        return self.metadata is None or not self.metadata.isdisjoint(metadata_keys)
+
+
+class _RowList(SortedKeyList):
+    """SortedKeyList of rows that can be filled with rows that are
+    already in order without sorting them again"""
+
+    def load_sorted(self, rows: list[int]) -> None:
+        """Same as clear() and update(rows) for 'rows' that are sorted
+        by the key already"""
+
+        # same as the end of SortedKeyList.update()
+        self._clear()
+        self._lists.extend(rows[pos:pos + self._load] for pos in range(0, len(rows), self._load))
+        self._keys.extend(list(map(self._key, sublist)) for sublist in self._lists)
+        self._maxes.extend(keys[-1] for keys in self._keys)
+        self._len = len(rows)
+
+
+class SortOrder:
+    """The rows of a FileStore in the order given by a Sorter. The
+    values of the key function are computed once per row and kept for
+    the last few key functions, so that switching back and forth
+    between them doesn't call them again. A full re-sort is an argsort
+    over the cached values, or a Python sort where they aren't
+    numbers, the SortedKeyLists are only used for incremental inserts.
+    With directories first, directories and files are kept in separate
+    lists, so that the keys are the plain values and not tuples.
+
+    Metadata updates only recompute the keys that depend on the
+    updated metadata. Rows whose key changed are moved all at once
+    when the order is needed the next time, so that a stream of
+    metadata updates doesn't move every row on its own.
+
+    Removed rows stay behind until compact() numbers the rows anew,
+    which the FileStore calls after removing rows."""
+
+    # number of key functions whose values are kept
+    CACHE_SIZE = 4
+
+    # with more than 1/REPOSITION_RATIO of the rows waiting to be
+    # moved, the lists are rebuilt instead of moving them one by one
+    REPOSITION_RATIO = 16
+
+    # compact() only renumbers the rows once there are more removed
+    # rows than live ones and at least this many
+    COMPACT_MIN_DEAD = 1024
+
+    def __init__(self, sorter: Sorter, fileinfos: Callable[[Iterable[int]], Iterable[FileInfo]]) -> None:
+        """'fileinfos' returns the FileInfo objects of the given rows"""
+
+        self._fileinfos = fileinfos
+        self._key_func = sorter.key_func
+        self._key_metadata = sorter.key_metadata
+        self._directories_first = sorter.directories_first
+        self._caches: OrderedDict[KeyFunc, _KeyCache] = OrderedDict()
+        self.clear()
+
+    def clear(self) -> None:
+        self._count = 0
+        self._isdir = numpy.zeros(0, dtype=numpy.bool_)
+        self._alive = numpy.zeros(0, dtype=numpy.bool_)
+        self._caches.clear()
+        self._caches[self._key_func] = _KeyCache(self._key_metadata)
+
+        # new values of the current key function for rows that are
+        # still at the place of their old value
+        self._pending: Dict[int, Any] = {}
+
+        self._new_lists()
+
+    def _new_lists(self) -> None:
+        values = self._caches[self._key_func].values
+        self._dirs = _RowList(key=values.__getitem__)
+        self._files = _RowList(key=values.__getitem__)
+
+    def _list(self, row: int) -> '_RowList':
+        return self._dirs if self._directories_first and self._isdir[row] else self._files
+
+    def add(self, fileinfos: Sequence[FileInfo]) -> range:
+        """Adds 'fileinfos' as the next rows and returns them"""
+
+        self._reposition()
+
+        rows = range(self._count, self._count + len(fileinfos))
+        self._isdir = _grow(self._isdir, rows.stop)
+        self._alive = _grow(self._alive, rows.stop)
+        self._isdir[rows.start:rows.stop] = [fi.isdir() for fi in fileinfos]
+        self._alive[rows.start:rows.stop] = True
+        self._count = rows.stop
+
+        for key_func, cache in self._caches.items():
+            cache.values.extend(map(key_func, fileinfos))
+            cache.order = None
+
+        # same threshold as SortedKeyList.update() uses for a full sort
+        if len(rows) * 4 >= len(self):
+            self._rebuild()
+        else:
+            for row in rows:
+                self._list(row).add(row)
+        return rows
+
+    def remove(self, row: int) -> None:
+        self._list(row).remove(row)
+        self._pending.pop(row, None)
+        self._alive[row] = False
+        for cache in self._caches.values():
+            cache.values[row] = None
+
+    def update(self, row: int, fileinfo: FileInfo, metadata_keys: Collection[str]) -> None:
+        """Recomputes the keys of 'row' that depend on 'metadata_keys'
+        after they changed in 'fileinfo'"""
+
+        current = self._caches[self._key_func]
+        for key_func, cache in self._caches.items():
+            if not cache.depends_on(metadata_keys):
+                continue
+
+            value = key_func(fileinfo)
+            if cache is current:
+                old_value = self._pending[row] if row in self._pending else cache.values[row]
+                if value != old_value:
+                    self._pending[row] = value
+            elif value != cache.values[row]:
+                cache.values[row] = value
+                cache.order = None
+
+    def _apply_pending(self) -> None:
+        """Stores the pending values without moving the rows"""
+
+        if not self._pending:
+            return
+
+        cache = self._caches[self._key_func]
+        for row, value in self._pending.items():
+            cache.values[row] = value
+        cache.order = None
+        self._pending.clear()
+
+    def _reposition(self) -> None:
+        """Moves the rows with pending values to their new place"""
+
+        if not self._pending:
+            return
+
+        if len(self._pending) * SortOrder.REPOSITION_RATIO >= len(self):
+            self._apply_pending()
+            self._rebuild()
+        else:
+            cache = self._caches[self._key_func]
+            for row, value in self._pending.items():
+                rowlist = self._list(row)
+                rowlist.remove(row)
+                cache.values[row] = value
+                rowlist.add(row)
+            cache.order = None
+            self._pending.clear()
+
+    def set_sorter(self, sorter: Sorter) -> None:
+        if sorter.key_func is self._key_func and \
+           sorter.key_metadata == self._key_metadata and \
+           sorter.directories_first == self._directories_first:
+            return
+
+        self._apply_pending()
+
+        self._key_func = sorter.key_func
+        self._key_metadata = sorter.key_metadata
+        self._directories_first = sorter.directories_first
+
+        if self._key_func in self._caches:
+            self._caches.move_to_end(self._key_func)
+            self._caches[self._key_func].metadata = self._key_metadata
+        else:
+            cache = _KeyCache(self._key_metadata)
+            rows = self._live_rows().tolist()
+            values = list(map(self._key_func, self._fileinfos(rows)))
+            if len(rows) == self._count:
+                cache.values = values
+            else:
+                cache.values = [None] * self._count
+                for row, value in zip(rows, values):
+                    cache.values[row] = value
+            self._caches[self._key_func] = cache
+            while len(self._caches) > SortOrder.CACHE_SIZE:
+                self._caches.popitem(last=False)
+
+        self._rebuild()
+
+    def compact(self) -> Optional[Rows]:
+        """Drops the removed rows once there are enough of them and
+        numbers the live rows anew from 0 in their current order.
+        Returns the old number of each new row, or None when the rows
+        are left as they are."""
+
+        dead = self._count - len(self)
+        if dead <= max(len(self), SortOrder.COMPACT_MIN_DEAD):
+            return None
+
+        self._reposition()
+
+        live = self._live_rows()
+        renumber = numpy.full(self._count, -1, dtype=numpy.intp)
+        renumber[live] = numpy.arange(len(live))
+
+        for cache in self._caches.values():
+            cache.values = _take(cache.values, live.tolist())
+            if cache.order is not None:
+                cache.order = renumber[cache.order[self._alive[cache.order]]]
+
+        dirs = renumber[numpy.fromiter(self._dirs, dtype=numpy.intp, count=len(self._dirs))]
+        files = renumber[numpy.fromiter(self._files, dtype=numpy.intp, count=len(self._files))]
+        self._isdir = self._isdir[live]
+        self._alive = numpy.ones(len(live), dtype=numpy.bool_)
+        self._count = len(live)
+
+        # the rows keep their order, so the lists don't need sorting
+        self._new_lists()
+        self._dirs.load_sorted(dirs.tolist())
+        self._files.load_sorted(files.tolist())
+        return live
+
+    def _live_rows(self) -> Rows:
+        return numpy.flatnonzero(self._alive[:self._count])
+
+    def _sorted_rows(self, cache: _KeyCache) -> Rows:
+        if cache.order is None:
+            rows = self._live_rows()
+            if len(rows) == self._count:
+                values = cache.values
+            else:
+                values = _take(cache.values, rows.tolist())
+            column = _numeric_column(values)
+            if column is None:
+                cache.order = rows[sorted(range(len(values)), key=values.__getitem__)]
+            else:
+                cache.order = rows[numpy.argsort(column, kind="stable")]
+            return cache.order
+        else:
+            return cache.order[self._alive[cache.order]]
+
+    def _rebuild(self) -> None:
+        rows = self._sorted_rows(self._caches[self._key_func])
+
+        self._new_lists()
+        if self._directories_first:
+            isdir = self._isdir[rows]
+            self._dirs.load_sorted(rows[isdir].tolist())
+            self._files.load_sorted(rows[~isdir].tolist())
+        else:
+            self._files.load_sorted(rows.tolist())
+
+    def index(self, row: int) -> int:
+        self._reposition()
+        if self._directories_first and self._isdir[row]:
+            return int(self._dirs.index(row))
+        else:
+            return len(self._dirs) + int(self._files.index(row))
+
+    @overload
+    def __getitem__(self, key: int) -> int:
+        ...
+
+    @overload
+    def __getitem__(self, key: slice) -> list[int]:
+        ...
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[int, list[int]]:
+        self._reposition()
+        if isinstance(key, slice):
+            return [self[idx] for idx in range(*key.indices(len(self)))]
+
+        idx = range(len(self))[key]
+        if idx < len(self._dirs):
+            return int(self._dirs[idx])
+        else:
+            return int(self._files[idx - len(self._dirs)])
+
+    def __len__(self) -> int:
+        return len(self._dirs) + len(self._files)
+
+    def __iter__(self) -> Iterator[int]:
+        self._reposition()
+        return itertools.chain(self._dirs, self._files)
+
+
+# EOF #
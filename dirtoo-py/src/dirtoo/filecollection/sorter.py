@@ -15,18 +15,25 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import Callable, Any
+from typing import Callable, Any, Iterable, Optional
 
-from dirtoo.sort import numeric_sort_key
+from dirtoo.sort import numeric_sort_text
 from dirtoo.filesystem.file_info import FileInfo
 
 
+def name_key(fileinfo: FileInfo) -> str:
+    return numeric_sort_text(fileinfo.basename().lower())
+
+
 class Sorter:
 
     def __init__(self) -> None:
         self.directories_first = True
         self.reverse = False
-        self.key_func: Callable[[FileInfo], Any] = lambda x: numeric_sort_key(x.basename().lower())
+        self.key_func: Callable[[FileInfo], Any] = name_key
+
+        # the metadata keys that key_func looks at, None if unknown
+        self.key_metadata: Optional[frozenset[str]] = frozenset()
 
     def set_directories_first(self, v: bool) -> None:
         self.directories_first = v
@@ -34,8 +41,14 @@ class Sorter:
     def set_sort_reversed(self, rev: bool) -> None:
         self.reverse = rev
 
-    def set_key_func(self, key_func: Callable[[FileInfo], Any]) -> None:
+    def set_key_func(self, key_func: Callable[[FileInfo], Any],
+                     metadata: Optional[Iterable[str]] = None) -> None:
+        """'metadata' are the metadata keys 'key_func' depends on,
+        metadata updates that don't touch them leave the order alone.
+        With None every metadata update might change the order."""
+
         self.key_func = key_func
+        self.key_metadata = None if metadata is None else frozenset(metadata)
 
     def get_key_func(self) -> Callable[[FileInfo], Any]:
         if self.directories_first:
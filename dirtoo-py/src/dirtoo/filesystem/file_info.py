@@ -24,6 +24,7 @@ import errno
 from enum import Enum
 
 from dirtoo.filesystem.location import Location
+from dirtoo.find.file_entry import FileEntry
 import dirtoo.file_type as file_type
 
 
@@ -44,17 +45,23 @@ class FileInfo:
     @staticmethod
     def from_path(path: str) -> 'FileInfo':
         logger.debug("FileInfo.from_path: %s", path)
+        return FileInfo.from_file_entry(FileEntry.from_path(path))
 
-        fi = FileInfo(Location.from_path(path))
+    @staticmethod
+    def from_file_entry(entry: FileEntry) -> 'FileInfo':
+        """Same as from_path(), but reuses what the walk already knows
+        about the file instead of calling lstat() and access() again"""
+
+        fi = FileInfo(Location.from_path(entry.path))
 
-        fi._abspath = os.path.abspath(path)
+        fi._abspath = entry.abspath()
         fi._dirname = os.path.dirname(fi._abspath)
         fi._basename = os.path.basename(fi._abspath)
         fi._ext = os.path.splitext(fi._abspath)[1]
 
         try:
-            fi._stat = os.lstat(fi._abspath)
-            fi._have_access = os.access(fi._abspath, os.R_OK)
+            fi._stat = entry.lstat()
+            fi._have_access = entry.access()
             fi._error = FileInfoError.NO_ERROR
         except (FileNotFoundError, NotADirectoryError):
             fi._error = FileInfoError.FILENOTFOUND
@@ -68,7 +75,7 @@ class FileInfo:
         except Exception:
             fi._error = FileInfoError.UNKNOWN
         else:
-            fi._isdir = os.path.isdir(fi._abspath)
+            fi._isdir = entry.is_dir()
             fi._isfile = stat.S_ISREG(fi._stat.st_mode)
             fi._issymlink = stat.S_ISLNK(fi._stat.st_mode)
 
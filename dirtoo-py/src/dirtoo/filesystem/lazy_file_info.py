@@ -15,7 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, Optional, Sequence
 import logging
 
 import os
@@ -24,12 +24,18 @@ import stat
 from dirtoo.filesystem.location import Location
 import dirtoo.file_type as file_type
 
+if TYPE_CHECKING:
+    from dirtoo.find.file_entry import FileEntry
+    from dirtoo.metadata.metadata_provider import MetaDataProvider
 
 logger = logging.getLogger(__name__)
 
 
 class LazyFileInfo:
 
+    # where metadata() comes from, without one files have no metadata
+    METADATA_PROVIDER: Optional['MetaDataProvider'] = None
+
     @staticmethod
     def from_path(path: str) -> 'LazyFileInfo':
         logger.debug("LazyFileInfo.from_path: %s", path)
@@ -37,8 +43,15 @@ class LazyFileInfo:
         fi = LazyFileInfo(path)
         return fi
 
-    def __init__(self, path: str) -> None:
-        self._abspath: str = os.path.abspath(path)
+    @staticmethod
+    def from_file_entry(entry: 'FileEntry') -> 'LazyFileInfo':
+        """Create a LazyFileInfo that gets its stat data from the given
+        FileEntry, so that it is shared with the rest of find_files()"""
+        return LazyFileInfo(entry.path, entry)
+
+    def __init__(self, path: str, entry: Optional['FileEntry'] = None) -> None:
+        self._entry = entry
+        self._abspath: str = entry.abspath() if entry is not None else os.path.abspath(path)
 
         self._location: Optional[Location] = None
 
@@ -58,11 +71,17 @@ class LazyFileInfo:
 
     def _collect_stat(self) -> None:
         if self._stat is None:
-            self._stat = os.lstat(self._abspath)
-            self._have_access = os.access(self._abspath, os.R_OK)
+            if self._entry is not None:
+                self._stat = self._entry.lstat()
+            else:
+                self._stat = os.lstat(self._abspath)
 
     def have_access(self) -> Optional[bool]:
-        self._collect_stat()
+        if self._have_access is None:
+            if self._entry is not None:
+                self._have_access = self._entry.access()
+            else:
+                self._have_access = os.access(self._abspath, os.R_OK)
         return self._have_access
 
     def abspath(self) -> str:
@@ -81,9 +100,17 @@ class LazyFileInfo:
         return self._basename
 
     def isdir(self) -> bool:
-        return os.path.isdir(self._abspath)
+        if self._isdir is None:
+            if self._entry is not None:
+                self._isdir = self._entry.is_dir()
+            else:
+                self._isdir = os.path.isdir(self._abspath)
+        return self._isdir
 
     def isfile(self) -> Optional[bool]:
+        if self._entry is not None:
+            return self._entry.is_file()
+
         self._collect_stat()
         assert self._stat is not None
         return stat.S_ISREG(self._stat.st_mode)
@@ -126,7 +153,33 @@ class LazyFileInfo:
         return self._stat.st_mtime
 
     def metadata(self) -> Dict[str, Any]:
-        return {}  # FIXME: fetch metadata
+        """Fetched from the METADATA_PROVIDER on first use, so only the
+        files that get that far in a filter pay for it"""
+
+        if self._metadata is None:
+            provider = LazyFileInfo.METADATA_PROVIDER
+            if provider is None:
+                self._metadata = {}
+            else:
+                try:
+                    self._metadata = provider.metadata(self._abspath, self.mtime())
+                except OSError as err:
+                    logger.debug("LazyFileInfo.metadata: %s: %s", self._abspath, err)
+                    self._metadata = {}
+        return self._metadata
+
+    def get_metadata_keys(self) -> Sequence[str]:
+        return list(self.metadata().keys())
+
+    def get_metadata(self, name: str) -> Any:
+        return self.metadata()[name]
+
+    def get_metadata_or(self, name: str, fallback: Any) -> Any:
+        """Retrieve the given metadata or return the fallback value"""
+        return self.metadata().get(name, fallback)
+
+    def has_metadata(self, name: str) -> bool:
+        return name in self.metadata()
 
     def __str__(self) -> str:
         return "LazyFileInfo({})".format(self._abspath)
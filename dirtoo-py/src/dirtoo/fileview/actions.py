@@ -29,9 +29,9 @@ from PyQt6.QtWidgets import (
 )
 
 from dirtoo.filesystem.file_info import FileInfo
+from dirtoo.filecollection.sorter import name_key
 from dirtoo.fileview.settings import settings
 from dirtoo.image.icon import load_icon
-from dirtoo.sort import numeric_sort_key
 
 if TYPE_CHECKING:
     from dirtoo.fileview.controller import Controller
@@ -242,29 +242,28 @@ class Actions(QObject):
 
         self.sort_by_name = QAction("Sort by Name")
         self.sort_by_name.setCheckable(True)
-        self.sort_by_name.triggered.connect(lambda:
-                                            self.controller.set_sort_key_func(
-                                                lambda x: numeric_sort_key(x.basename().lower())))
+        self.sort_by_name.triggered.connect(lambda: self.controller.set_sort_key_func(name_key, ()))
         self.sort_by_name.setChecked(True)
 
         self.sort_by_size = QAction("Sort by Size")
         self.sort_by_size.setCheckable(True)
-        self.sort_by_size.triggered.connect(lambda: self.controller.set_sort_key_func(FileInfo.size))
+        self.sort_by_size.triggered.connect(lambda: self.controller.set_sort_key_func(FileInfo.size, ()))
 
         self.sort_by_ext = QAction("Sort by Extension")
         self.sort_by_ext.setCheckable(True)
-        self.sort_by_ext.triggered.connect(lambda: self.controller.set_sort_key_func(FileInfo.ext))
+        self.sort_by_ext.triggered.connect(lambda: self.controller.set_sort_key_func(FileInfo.ext, ()))
 
         self.sort_by_date = QAction("Sort by Date")
         self.sort_by_date.setCheckable(True)
-        self.sort_by_date.triggered.connect(lambda: self.controller.set_sort_key_func(FileInfo.mtime))
+        self.sort_by_date.triggered.connect(lambda: self.controller.set_sort_key_func(FileInfo.mtime, ()))
 
         def framerate_key(fileinfo: FileInfo) -> float:
             return cast(float, fileinfo.get_metadata_or('framerate', 0.0))
 
         self.sort_by_framerate = QAction("Sort by Framerate")
         self.sort_by_framerate.setCheckable(True)
-        self.sort_by_framerate.triggered.connect(lambda: self.controller.set_sort_key_func(framerate_key))
+        self.sort_by_framerate.triggered.connect(
+            lambda: self.controller.set_sort_key_func(framerate_key, ['framerate']))
 
         def aspect_ratio_key(fileinfo: FileInfo) -> float:
             if fileinfo.has_metadata('width') and fileinfo.has_metadata('height'):
@@ -283,7 +282,8 @@ class Actions(QObject):
 
         self.sort_by_aspect_ratio = QAction("Sort by Aspect Ratio")
         self.sort_by_aspect_ratio.setCheckable(True)
-        self.sort_by_aspect_ratio.triggered.connect(lambda: self.controller.set_sort_key_func(aspect_ratio_key))
+        self.sort_by_aspect_ratio.triggered.connect(
+            lambda: self.controller.set_sort_key_func(aspect_ratio_key, ['width', 'height']))
 
         def resolution_key(fileinfo: FileInfo) -> int:
             width = cast(int, fileinfo.get_metadata_or('width', 0))
@@ -292,14 +292,15 @@ class Actions(QObject):
 
         self.sort_by_resolution = QAction("Sort by Resolution")
         self.sort_by_resolution.setCheckable(True)
-        self.sort_by_resolution.triggered.connect(lambda: self.controller.set_sort_key_func(resolution_key))
+        self.sort_by_resolution.triggered.connect(
+            lambda: self.controller.set_sort_key_func(resolution_key, ['width', 'height']))
 
         def duration_key(fileinfo: FileInfo) -> int:
             return cast(int, fileinfo.get_metadata_or('duration', 0))
 
         self.sort_by_duration = QAction("Sort by Duration")
         self.sort_by_duration.setCheckable(True)
-        self.sort_by_duration.triggered.connect(lambda: self.controller.set_sort_key_func(duration_key))
+        self.sort_by_duration.triggered.connect(lambda: self.controller.set_sort_key_func(duration_key, ['duration']))
 
         self.sort_by_user = QAction("Sort by User")
         self.sort_by_user.setCheckable(True)
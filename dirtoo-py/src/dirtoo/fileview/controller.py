@@ -15,7 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import TYPE_CHECKING, cast, Any, Sequence, Dict, Optional, Callable
+from typing import TYPE_CHECKING, cast, Any, Sequence, Dict, Iterable, Optional, Callable
 
 import io
 import logging
@@ -175,7 +175,7 @@ class Controller(QObject):
         parser = FilterParser()
         match_func = parser.parse(pattern)
         if match_func is not None:
-            self._filter.set_match_func(match_func)
+            self._filter.set_match_func(match_func, pattern)
             self.file_collection.set_filter(self._filter)
         self._update_info()
 
@@ -257,6 +257,9 @@ class Controller(QObject):
         if hasattr(self._directory_watcher, 'sig_file_added'):
             self._directory_watcher.sig_file_added.connect(self.file_collection.add_fileinfo)
 
+        if hasattr(self._directory_watcher, 'sig_files_added'):
+            self._directory_watcher.sig_files_added.connect(self.file_collection.add_fileinfos)
+
         if hasattr(self._directory_watcher, 'sig_file_removed'):
             self._directory_watcher.sig_file_removed.connect(self.file_collection.remove_file)
 
@@ -302,8 +305,9 @@ class Controller(QObject):
         self._sorter.set_sort_reversed(sort_reversed)
         self.file_collection.set_sorter(self._sorter)
 
-    def set_sort_key_func(self, func: Callable[[FileInfo], Any]) -> None:
-        self._sorter.set_key_func(func)
+    def set_sort_key_func(self, func: Callable[[FileInfo], Any],
+                          metadata: Optional[Iterable[str]] = None) -> None:
+        self._sorter.set_key_func(func, metadata)
         self.file_collection.set_sorter(self._sorter)
 
     def new_controller(self, clone: bool = False) -> 'Controller':
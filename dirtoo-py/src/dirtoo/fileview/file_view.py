@@ -244,6 +244,7 @@ class FileView(QGraphicsView):
         self._file_collection.sig_files_grouped.connect(self.on_file_collection_grouped)
 
         self._file_collection.sig_file_added.connect(self.on_file_added)
+        self._file_collection.sig_files_added.connect(self.on_files_added)
         self._file_collection.sig_file_removed.connect(self.on_file_removed)
         self._file_collection.sig_file_modified.connect(self.on_file_modified)
         self._file_collection.sig_fileinfo_updated.connect(self.on_fileinfo_updated)
@@ -267,6 +268,23 @@ class FileView(QGraphicsView):
             self._layout.append_item(item)
             self.refresh_bounding_rect()
 
+    def on_files_added(self, fileinfos: Sequence[FileInfo]) -> None:
+        logger.debug("FileView.on_files_added: %d files", len(fileinfos))
+
+        items = []
+        for fileinfo in fileinfos:
+            item = FileItem(fileinfo, self._controller, self)
+            item._new = True
+            self._location2item[fileinfo.location()].append(item)
+            self._scene.addItem(item)
+            self.style_item(item)
+            items.append(item)
+        self._items += items
+
+        if self._layout is not None:
+            self._layout.append_items(items)
+            self.refresh_bounding_rect()
+
     def on_file_removed(self, location: Location) -> None:
         logger.debug("FileView.on_file_removed: %s", location)
         items = self._location2item.get(location, [])
@@ -103,6 +103,14 @@ class RootLayout(Layout):
         self.append_layout.append_item(item)
         self.root.layout(self.width, self.height)
 
+    def append_items(self, items: Sequence['FileItem']) -> None:
+        assert self.root is not None
+        assert self.append_layout is not None
+
+        for item in items:
+            self.append_layout.append_item(item)
+        self.root.layout(self.width, self.height)
+
 
 class HBoxLayout(Layout):
 
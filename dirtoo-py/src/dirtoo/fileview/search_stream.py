@@ -15,16 +15,21 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import cast, Any, Optional
+from typing import cast, Any, Iterator, Optional
 
 import logging
 import os
+import time
 
 from PyQt6.QtCore import QObject, pyqtSignal, QThread, Qt
 
 from dirtoo.filesystem.file_info import FileInfo
+from dirtoo.fileview.settings import settings
 from dirtoo.find.action import Action
+from dirtoo.find.file_entry import FileEntry
+from dirtoo.find.file_index import FileIndex
 from dirtoo.find.filter import Filter, SimpleFilter
+from dirtoo.find.util import match_concurrently, root_pruner
 from dirtoo.find.walk import walk
 
 logger = logging.getLogger(__name__)
@@ -32,19 +37,26 @@ logger = logging.getLogger(__name__)
 
 class SearchStreamWorker(QObject):
 
-    sig_file_added = pyqtSignal(FileInfo)
+    # Results are delivered in batches, so that a search with lots
+    # of hits doesn't flood the GUI thread with signals
+    sig_files_added = pyqtSignal(list)
     sig_finished = pyqtSignal()
     sig_error = pyqtSignal()
     sig_message = pyqtSignal(str)
 
-    def __init__(self, abspath: str, pattern: str) -> None:
+    # threads reading files for contains: and the like
+    CONTENT_JOBS = min(8, os.cpu_count() or 1)
+
+    def __init__(self, abspath: str, pattern: str, use_index: bool = False) -> None:
         super().__init__()
         self._abspath = abspath
         self._pattern = pattern
+        self._use_index = use_index
         self._close = False
 
         self._action: Optional[SearchStreamAction] = None
         self._filter: Optional[SimpleFilter] = None
+        self._index: Optional[FileIndex] = None
 
     def close(self) -> None:
         pass
@@ -53,10 +65,21 @@ class SearchStreamWorker(QObject):
         self._action = SearchStreamAction(self)
         self._filter = SimpleFilter.from_string(self._pattern)
 
+        # The index is only as fresh as the last dt-index run, so it's
+        # only used when asked for. It has to be opened in the worker
+        # thread, as SQLite connections can't be shared across threads.
+        if self._use_index:
+            self._index = FileIndex.open_default()
+
         self._find_files(self._abspath, True,
                          filter_op=self._filter,
                          action=self._action,
                          topdown=False, maxdepth=None)
+        self._action.finish()
+
+        if self._index is not None:
+            self._index.close()
+            self._index = None
 
         if self._action.found_count() == 0:
             self.sig_message.emit("Search did not give any results")
@@ -65,19 +88,54 @@ class SearchStreamWorker(QObject):
 
     def _find_files(self, directory: str, recursive: bool, filter_op: Filter, action: Action,
                     topdown: bool, maxdepth: Optional[int]) -> None:
-        for root, dirs, files in walk(directory, topdown=topdown, maxdepth=maxdepth):
-            for f in files:
-                if filter_op.match_file(cast(str, root), cast(str, f)):
-                    action.file(cast(str, root), cast(str, f))
+        prune_func = filter_op.prune_func()
+
+        def prune(root: str, name: str) -> bool:
+            assert prune_func is not None
+            return prune_func(FileEntry(root, name))
+
+        if self._index is not None and self._index.covers(directory):
+            query = self._index.query(directory, filter_op.match_func(),
+                                      maxdepth=maxdepth if recursive else 1)
+            is_pruned = root_pruner(directory, prune) if prune_func is not None else None
+            for file_entry in query:
+                if is_pruned is not None and is_pruned(file_entry.root):
+                    continue
+
+                if query.exact or filter_op.match_file(file_entry):
+                    action.file(file_entry)
 
                 if self._close:
                     return
+            return
+
+        def file_entries() -> Iterator[FileEntry]:
+            for root, dirs, files in walk(directory, topdown=topdown, maxdepth=maxdepth, entries=True,
+                                          prune=prune if prune_func is not None else None):
+                for entry in cast(list['os.DirEntry[str]'], files):
+                    if self._close:
+                        return
+                    yield FileEntry(cast(str, root), entry.name, entry)
+
+                if not recursive:
+                    del dirs[:]
 
-            if not recursive:
-                del dirs[:]
+        if filter_op.reads_content():
+            matches = match_concurrently(filter_op, file_entries(), SearchStreamWorker.CONTENT_JOBS)
+        else:
+            matches = (entry for entry in file_entries() if filter_op.match_file(entry))
+
+        for file_entry in matches:
+            action.file(file_entry)
 
 
 class SearchStreamAction(Action):
+    """Collects the results and hands them to the worker in batches of
+    at most BATCH_SIZE files or every BATCH_INTERVAL seconds, whatever
+    comes first"""
+
+    BATCH_SIZE = 1000
+    BATCH_INTERVAL = 0.05
 
     def __init__(self, worker: SearchStreamWorker) -> None:
         super().__init__()
@@ -85,20 +143,33 @@ class SearchStreamAction(Action):
         self._found_count = 0
         self._worker = worker
 
-    def file(self, root: str, filename: str) -> None:
-        self._found_count += 1
-        fullpath = os.path.join(root, filename)
-        fileinfo = FileInfo.from_path(fullpath)
-        self._worker.sig_file_added.emit(fileinfo)
+        self._batch: list[FileInfo] = []
+        self._batch_start = time.monotonic()
+
+    def file(self, entry: FileEntry) -> None:
+        self._add(FileInfo.from_file_entry(entry))
+
+    def directory(self, entry: FileEntry) -> None:
+        self._add(FileInfo.from_file_entry(entry))
 
-    def directory(self, root: str, filename: str) -> None:
+    def _add(self, fileinfo: FileInfo) -> None:
         self._found_count += 1
-        fullpath = os.path.join(root, filename)
-        fileinfo = FileInfo.from_path(fullpath)
-        self._worker.sig_file_added.emit(fileinfo)
+
+        if not self._batch:
+            self._batch_start = time.monotonic()
+        self._batch.append(fileinfo)
+
+        if len(self._batch) >= SearchStreamAction.BATCH_SIZE or \
+           time.monotonic() - self._batch_start >= SearchStreamAction.BATCH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._batch:
+            self._worker.sig_files_added.emit(self._batch)
+            self._batch = []
 
     def finish(self) -> None:
-        pass
+        self.flush()
 
     def found_count(self) -> int:
         return self._found_count
@@ -110,7 +181,8 @@ class SearchStream(QObject):
 
     def __init__(self, abspath: str, pattern: str) -> None:
         super().__init__()
-        self._worker = SearchStreamWorker(abspath, pattern)
+        self._worker = SearchStreamWorker(abspath, pattern,
+                                          use_index=settings.value("globals/search_index", False, bool))
         self._thread = QThread(self)
         self._worker.moveToThread(self._thread)
 
@@ -133,8 +205,8 @@ class SearchStream(QObject):
         self._thread.wait()
 
     @property
-    def sig_file_added(self) -> Any:
-        return self._worker.sig_file_added
+    def sig_files_added(self) -> Any:
+        return self._worker.sig_files_added
 
     @property
     def sig_finished(self) -> Any:
@@ -0,0 +1,351 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Any, Callable, Iterator, Optional, Sequence, Tuple, Union
+from abc import ABC, abstractmethod
+
+import contextlib
+import io
+import mmap
+import os
+import re
+import sys
+
+if sys.version_info >= (3, 11):
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+else:
+    import sre_parse
+    import sre_constants
+
+
+# File contents as handed to ContentPattern.search()
+Buffer = Union[bytes, mmap.mmap]
+
+
+# Files smaller than this are read() instead of mmap()'ed, as setting
+# up the mapping costs more than copying a few pages
+MMAP_THRESHOLD = 64 * 1024
+
+# Largest piece that case-insensitive searches lowercase at once
+SEARCH_CHUNK_SIZE = 1024 * 1024
+
+# Files with a NUL byte within this many bytes count as binary
+BINARY_CHECK_SIZE = 8192
+
+# Regex constructs that match the same in a bytes regex over the whole
+# file as in a str regex over each line, as long as what they contain
+# does too. Left out are '.' and negated classes, which match a single
+# byte of a UTF-8 character or a newline, \w and friends, which only
+# know ASCII in bytes, and \A and \Z, which would mean the whole file.
+# '^' and '$' only hold for files without '\r', as lines end at '\r\n'
+# and '\r' as well, while re.MULTILINE only knows '\n'.
+_SUBPATTERN_OPS = {sre_constants.SUBPATTERN, sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+                   sre_constants.BRANCH, sre_constants.ASSERT, sre_constants.ASSERT_NOT,
+                   sre_constants.GROUPREF_EXISTS}
+_BYTES_SAFE_AT = {sre_constants.AT_BEGINNING, sre_constants.AT_END}
+
+# the characters lines end at, '\r\n' and '\r' are read as '\n'
+_LINE_BREAKS = [ord("\n"), ord("\r")]
+
+
+class ContentPattern(ABC):
+    """Something to search for in the contents of a file"""
+
+    @abstractmethod
+    def search(self, data: Buffer) -> bool:
+        pass
+
+    def required_literals(self) -> Sequence[bytes]:
+        """Byte strings that every matching file contains, ignoring the
+        case of ASCII letters. Used to rule out files by their
+        trigrams, an empty result rules out nothing."""
+        return []
+
+
+class LiteralPattern(ContentPattern):
+    """A plain substring, searched with bytes.find() where possible"""
+
+    def __init__(self, text: str, case_sensitive: bool) -> None:
+        self.text = text
+        self.case_sensitive = case_sensitive
+        self.needle = text.encode("utf-8")
+
+        self._ignore_case = False
+        self._lines: Optional[LinePattern] = None
+        if "\n" in text or "\r" in text:
+            # the file might end its lines differently
+            if case_sensitive:
+                self._lines = LinePattern(lambda line: text in line)
+            else:
+                lower_text = text.lower()
+                self._lines = LinePattern(lambda line: lower_text in line.lower())
+        elif not case_sensitive and text.lower() != text.upper():
+            if text.isascii():
+                self._ignore_case = True
+                self.needle = self.needle.lower()
+            else:
+                # bytes.lower() only folds the case of ASCII
+                needle = text.lower()
+                self._lines = LinePattern(lambda line: needle in line.lower())
+
+    def search(self, data: Buffer) -> bool:
+        if self._ignore_case:
+            # lowercasing chunks and using find() is a lot faster than
+            # a regex with re.IGNORECASE, the chunks start small as
+            # matches are often found early
+            overlap = len(self.needle) - 1
+            start, chunk_size = 0, 4096
+            while True:
+                if data[start:start + chunk_size + overlap].lower().find(self.needle) != -1:
+                    return True
+                start += chunk_size
+                if start + overlap >= len(data):
+                    return False
+                chunk_size = min(chunk_size * 2, SEARCH_CHUNK_SIZE)
+        elif self._lines is not None:
+            return self._lines.search(data)
+        else:
+            return data.find(self.needle) != -1
+
+    def required_literals(self) -> Sequence[bytes]:
+        # str.lower() can turn non-ASCII into ASCII, so the line by
+        # line search can match files bytes.lower() doesn't
+        return [self.needle] if self._lines is None else []
+
+
+class RegexPattern(ContentPattern):
+    """A regex matched against each line of the file. Patterns that
+    can neither match part of a UTF-8 character nor reach across a
+    newline are matched against the whole file as bytes instead, with
+    re.MULTILINE, so that '^' and '$' keep working per line, except
+    in files with '\r' line endings."""
+
+    def __init__(self, pattern: str, case_sensitive: bool) -> None:
+        self.pattern = pattern
+        self.case_sensitive = case_sensitive
+
+        flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+
+        self._parsed: Any = None
+        if pattern.isascii():
+            try:
+                self._parsed = sre_parse.parse(pattern)
+            except re.error:
+                pass
+
+        rx = re.compile(pattern, flags)
+        self._lines = LinePattern(lambda line: rx.search(line) is not None)
+
+        self._rx: Optional['re.Pattern[bytes]'] = None
+        self._anchored = False
+        if self._parsed is not None and _is_bytes_safe(self._parsed):
+            self._rx = re.compile(pattern.encode("ascii"), flags)
+            self._anchored = _is_anchored(self._parsed)
+
+    def search(self, data: Buffer) -> bool:
+        if self._rx is not None and not (self._anchored and data.find(b"\r") != -1):
+            return self._rx.search(data) is not None
+        else:
+            return self._lines.search(data)
+
+    def required_literals(self) -> Sequence[bytes]:
+        if self._parsed is None:
+            return []
+
+        result: list[bytes] = []
+        _collect_literals(self._parsed, result)
+        return result
+
+
+def _is_bytes_safe(items: Any) -> bool:
+    """True if the parsed regex 'items' is made only of constructs
+    from which a bytes regex over the whole file gives the same
+    result as a str regex line by line"""
+
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            if av in _LINE_BREAKS:
+                return False
+        elif op is sre_constants.IN:
+            for item_op, item_av in av:
+                if item_op is sre_constants.LITERAL:
+                    if item_av in _LINE_BREAKS:
+                        return False
+                elif item_op is sre_constants.RANGE:
+                    if any(item_av[0] <= c <= item_av[1] for c in _LINE_BREAKS):
+                        return False
+                else:
+                    # NEGATE, CATEGORY
+                    return False
+        elif op is sre_constants.AT:
+            if av not in _BYTES_SAFE_AT:
+                return False
+        elif op is sre_constants.GROUPREF:
+            pass
+        elif op in _SUBPATTERN_OPS:
+            if not all(_is_bytes_safe(p) for p in _subpatterns(op, av)):
+                return False
+        else:
+            # ANY, NOT_LITERAL and whatever else
+            return False
+
+    return True
+
+
+def _is_anchored(items: Any) -> bool:
+    """True if the parsed regex 'items' contains '^' or '$'"""
+
+    return any(op is sre_constants.AT or
+               (op in _SUBPATTERN_OPS and any(_is_anchored(p) for p in _subpatterns(op, av)))
+               for op, av in items)
+
+
+def _subpatterns(op: Any, av: Any) -> list[Any]:
+    if op is sre_constants.SUBPATTERN:
+        return [av[-1]]
+    elif op is sre_constants.BRANCH:
+        return list(av[1])
+    elif op is sre_constants.GROUPREF_EXISTS:
+        return [p for p in av[1:] if p is not None]
+    else:
+        # repeats and lookarounds
+        return [av[-1]]
+
+
+def _collect_literals(items: Any, result: list[bytes]) -> None:
+    """Collects the runs of literal characters in the parsed regex
+    'items' that any match has to contain. Alternatives, classes and
+    optional parts end a run and contribute nothing."""
+
+    run = bytearray()
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            run.append(av)
+            continue
+
+        if run:
+            result.append(bytes(run))
+            run = bytearray()
+
+        if op is sre_constants.SUBPATTERN:
+            _collect_literals(av[-1], result)
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            _collect_literals(av[2], result)
+
+    if run:
+        result.append(bytes(run))
+
+
+class LinePattern(ContentPattern):
+    """Calls 'line_match_func' for each line of the decoded text. Lines
+    are split and end the same as when reading the file in text mode,
+    with '\r\n' and '\r' turned into '\n'."""
+
+    def __init__(self, line_match_func: Callable[[str], bool]) -> None:
+        self._line_match_func = line_match_func
+
+    def search(self, data: Buffer) -> bool:
+        text = bytes(data).decode("utf-8", errors="replace")
+        return any(self._line_match_func(line) for line in io.StringIO(text, newline=None))
+
+
+class MultiPattern:
+    """Searches for several patterns in a single pass over the data
+    and tells which of them were found. The literals are looked for
+    chunk by chunk while the chunk is hot in the cache, each chunk is
+    lowercased only once for all case-insensitive literals. The search
+    stops as soon as all literals were found. Other patterns are
+    searched in the same data afterwards."""
+
+    def __init__(self, patterns: Sequence[ContentPattern]) -> None:
+        self.patterns = list(patterns)
+
+        self._literals: list[Tuple[int, bytes, bool]] = []
+        self._others: list[int] = []
+        for idx, pattern in enumerate(self.patterns):
+            if isinstance(pattern, LiteralPattern) and pattern._lines is None:
+                self._literals.append((idx, pattern.needle, pattern._ignore_case))
+            else:
+                self._others.append(idx)
+
+        self._overlap = max((len(needle) - 1 for _, needle, _ in self._literals), default=0)
+
+    def search(self, data: Buffer) -> list[bool]:
+        results = [False] * len(self.patterns)
+
+        pending = self._literals
+        start, chunk_size = 0, 4096
+        while pending:
+            chunk = data[start:start + chunk_size + self._overlap]
+            lower_chunk: Optional[bytes] = None
+
+            remaining = []
+            for literal in pending:
+                idx, needle, ignore_case = literal
+                if ignore_case:
+                    if lower_chunk is None:
+                        lower_chunk = chunk.lower()
+                    found = lower_chunk.find(needle) != -1
+                else:
+                    found = chunk.find(needle) != -1
+
+                if found:
+                    results[idx] = True
+                else:
+                    remaining.append(literal)
+            pending = remaining
+
+            start += chunk_size
+            if start + self._overlap >= len(data):
+                break
+            chunk_size = min(chunk_size * 2, SEARCH_CHUNK_SIZE)
+
+        for idx in self._others:
+            results[idx] = self.patterns[idx].search(data)
+
+        return results
+
+
+def is_binary(data: Buffer) -> bool:
+    return data.find(b"\0", 0, BINARY_CHECK_SIZE) != -1
+
+
+@contextlib.contextmanager
+def open_content(path: str, max_size: Optional[int]) -> Iterator[Optional[Buffer]]:
+    """Yields the contents of 'path', memory-mapped for larger files,
+    or None when the file is larger than 'max_size'"""
+
+    with open(path, "rb") as fin:
+        size = os.fstat(fin.fileno()).st_size
+        if max_size is not None and size > max_size:
+            yield None
+        elif size < MMAP_THRESHOLD:
+            # files in /proc and the like report a size of 0
+            content = fin.read(max_size + 1 if max_size is not None else -1)
+            yield content if max_size is None or len(content) <= max_size else None
+        else:
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                # start reading ahead right away, the search itself holds
+                # the GIL while it waits for page faults
+                if hasattr(mmap, "MADV_WILLNEED"):
+                    data.madvise(mmap.MADV_SEQUENTIAL)
+                    data.madvise(mmap.MADV_WILLNEED)
+                yield data
+
+
+# EOF #
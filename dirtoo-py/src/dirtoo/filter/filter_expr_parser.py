@@ -15,13 +15,17 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import cast
+from typing import cast, Optional, Tuple, Union
 
+import functools
 import logging
+import re
 from pyparsing import ParserElement
 from pyparsing.results import ParseResults
 
-from dirtoo.filter.match_func import MatchFunc, AndMatchFunc, OrMatchFunc, ExcludeMatchFunc
+from dirtoo.glob import is_glob_pattern
+from dirtoo.filter.match_func import (MatchFunc, AndMatchFunc, OrMatchFunc, ExcludeMatchFunc,
+                                      merge_globs, share_content_scan)
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +62,9 @@ class CommandExpr(Expr):
     def __repr__(self) -> str:
         return f"Command({self.command}:{self.arg})"
 
+    def text(self) -> str:
+        return f"{self.command}:{self.arg}"
+
 
 class OrKeywordExpr(Expr):
 
@@ -79,110 +86,206 @@ class AndKeywordExpr(Expr):
         return "AND"
 
 
+def _child_text(child: Union[str, CommandExpr]) -> str:
+    return child.text() if isinstance(child, CommandExpr) else child
+
+
+def _substring(token: Expr) -> Optional[str]:
+    # plain words are searched as case-insensitive substrings
+    if isinstance(token, (IncludeExpr, ExcludeExpr)) and \
+       isinstance(token.child, str) and not is_glob_pattern(token.child):
+        return token.child.lower()
+    else:
+        return None
+
+
+def _implies(new: Expr, old: Expr) -> bool:
+    """True if every file matched by the term 'new' is matched by 'old'"""
+
+    if type(new) is not type(old):
+        return False
+
+    if repr(new) == repr(old):
+        return True
+
+    new_text = _substring(new)
+    old_text = _substring(old)
+    if new_text is None or old_text is None:
+        return False
+
+    if isinstance(new, IncludeExpr):
+        return old_text in new_text
+    elif isinstance(new, ExcludeExpr):
+        return new_text in old_text
+    else:
+        return False
+
+
+# Escapes other than these just stand for the escaped character
+ESCAPES = {"f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+_ESCAPE_RX = re.compile(r"\\(.)")
+
+
+def unescape(text: str) -> str:
+    return _ESCAPE_RX.sub(lambda m: ESCAPES.get(m.group(1), m.group(1)), text)
+
+
+@functools.lru_cache(maxsize=None)
+def _make_grammar() -> ParserElement:
+    """The grammar is only built once per process, building it takes
+    longer than parsing a typical query"""
+
+    from pyparsing import (QuotedString, ZeroOrMore, Combine,
+                           Literal, Optional, OneOrMore,
+                           Regex, CaselessKeyword)
+
+    # a single regex for the whole word, instead of a token per escape
+    # and per run of characters in between, is a lot faster to parse
+    word = Regex(r'(?:\\.|[^\s\\])+').setParseAction(lambda s, loc, toks: unescape(toks[0]))
+    whitespace = Regex(r'\s+').suppress()
+    quotedstring = Combine(OneOrMore(QuotedString('"', escChar='\\') | QuotedString("'", escChar='\\')))
+    command = Regex(r'[^\s:]+') + Literal(":").suppress() + (quotedstring | word)
+    include = quotedstring | command | word
+    exclude = (Literal("-") | Literal("^")).suppress() + (quotedstring | command | word)
+    or_keyword = CaselessKeyword("or")
+    and_keyword = CaselessKeyword("and")
+    keyword = or_keyword | and_keyword
+
+    argument = (keyword | exclude | include)
+    expr = ZeroOrMore(Optional(whitespace) + argument)
+
+    # arguments.leaveWhitespace()
+
+    command.setParseAction(CommandExpr)
+    include.setParseAction(IncludeExpr)
+    exclude.setParseAction(ExcludeExpr)
+    or_keyword.setParseAction(OrKeywordExpr)
+    and_keyword.setParseAction(AndKeywordExpr)
+
+    # or_expr.setParseAction(lambda s, loc, toks: OrOperator(toks[0], toks[2]))
+    # and_expr.setParseAction(lambda s, loc, toks: AndOperator(toks[0], toks[2]))
+    # no_expr.setParseAction(lambda s, loc, toks: AndOperator(toks[0], toks[1]))
+    # expr.setParseAction(Operator)
+
+    return expr
+
+
+# Parsed queries, the file view parses the same query over and over
+# while the user types and refines it
+PARSE_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_groups(text: str) -> Tuple[Tuple[Expr, ...], ...]:
+    """The terms of 'text' split into the groups joined by OR. The Expr
+    objects aren't modified afterwards, so they can be shared between
+    all parses of the same text."""
+
+    tokens = _make_grammar().parseString(text, parseAll=True)
+
+    groups: list[list[Expr]] = [[]]
+    for token in tokens:
+        if isinstance(token, AndKeywordExpr):
+            pass  # ignore
+        elif isinstance(token, OrKeywordExpr):
+            groups.append([])
+        elif isinstance(token, (IncludeExpr, ExcludeExpr, CommandExpr)):
+            groups[-1].append(token)
+        else:
+            assert False, "unknown token: {}".format(token)
+
+    # Remove empty lists that result from unterminated OR keywords
+    return tuple(tuple(group) for group in groups if group)
+
+
 class FilterExprParser:
 
     def __init__(self) -> None:
         from dirtoo.filter.match_func_factory import MatchFuncFactory
 
-        self._grammar = self._make_grammar()
+        self._grammar = _make_grammar()
         self._func_factory = MatchFuncFactory()
 
-    def _make_grammar(self) -> ParserElement:
-        from pyparsing import (QuotedString, ZeroOrMore, Combine,
-                               Literal, Optional, OneOrMore,
-                               Regex, CaselessKeyword)
-
-        def escape_handler(s: str, loc: int, toks: ParseResults) -> str:
-            if toks[0] == '\\\\':
-                return "\\"
-            elif toks[0] == '\\\'':
-                return "'"
-            elif toks[0] == '\\"':
-                return '"'
-            elif toks[0] == '\\f':
-                return "\f"
-            elif toks[0] == '\\n':
-                return "\n"
-            elif toks[0] == '\\r':
-                return "\r"
-            elif toks[0] == '\\t':
-                return "\t"
-            elif toks[0] == '\\ ':
-                return " "
-            else:
-                return cast(str, toks[0][1:])
-
-        escape = Combine(Regex(r'\\.')).setParseAction(escape_handler)
-        word = Combine(OneOrMore(escape | Regex(r'[^\s\\]+')))
-        whitespace = Regex(r'\s+').suppress()
-        quotedstring = Combine(OneOrMore(QuotedString('"', escChar='\\') | QuotedString("'", escChar='\\')))
-        command = Regex(r'[^\s:]+') + Literal(":").suppress() + (quotedstring | word)
-        include = quotedstring | command | word
-        exclude = (Literal("-") | Literal("^")).suppress() + (quotedstring | command | word)
-        or_keyword = CaselessKeyword("or")
-        and_keyword = CaselessKeyword("and")
-        keyword = or_keyword | and_keyword
-
-        argument = (keyword | exclude | include)
-        expr = ZeroOrMore(Optional(whitespace) + argument)
-
-        # arguments.leaveWhitespace()
-
-        command.setParseAction(CommandExpr)
-        include.setParseAction(IncludeExpr)
-        exclude.setParseAction(ExcludeExpr)
-        or_keyword.setParseAction(OrKeywordExpr)
-        and_keyword.setParseAction(AndKeywordExpr)
-
-        # or_expr.setParseAction(lambda s, loc, toks: OrOperator(toks[0], toks[2]))
-        # and_expr.setParseAction(lambda s, loc, toks: AndOperator(toks[0], toks[2]))
-        # no_expr.setParseAction(lambda s, loc, toks: AndOperator(toks[0], toks[1]))
-        # expr.setParseAction(Operator)
-
-        return expr
-
-    def _parse_tokens(self, tokens: ParseResults) -> list[ParseResults]:
-        result: list[ParseResults] = [ParseResults()]
-
-        for token in tokens:
-            if isinstance(token, AndKeywordExpr):
-                pass  # ignore
-            elif isinstance(token, OrKeywordExpr):
-                result.append(ParseResults())
-            elif isinstance(token, (IncludeExpr, ExcludeExpr, CommandExpr)):
-                result[-1].append(token)
-            else:
-                assert False, "unknown token: {}".format(token)
-
-        # Remove empty lists that result from unterminated OR keywords
-        result = [x for x in result if x]
-
-        return result
+    def is_refinement(self, old: str, new: str) -> bool:
+        """True if 'new' can only match a subset of the files matched
+        by 'old', such as when a term was appended or a search word
+        got longer. False when that can't be proven."""
+
+        try:
+            old_groups = _parse_groups(old)
+            new_groups = _parse_groups(new)
+        except Exception:
+            return False
+
+        # each OR group of 'new' has to be covered by one of 'old',
+        # which holds when every term of the old group is implied by
+        # a term of the new one
+        return all(any(all(any(_implies(new_term, old_term) for new_term in new_group)
+                           for old_term in old_group)
+                       for old_group in old_groups)
+                   for new_group in new_groups)
 
     def parse(self, text: str) -> MatchFunc:
-        tokens = self._grammar.parseString(text, parseAll=True)
-        parsed_tokens = self._parse_tokens(tokens)
+        return self.parse_with_prune(text)[0]
+
+    def parse_with_prune(self, text: str) -> Tuple[MatchFunc, Optional[MatchFunc]]:
+        """Returns the MatchFunc for the files along with the one for
+        the directories to prune, the latter is built from all
+        'prune:' commands, no matter in which OR group they appear."""
+
+        # only the parse is cached, the MatchFuncs keep statistics and
+        # other state, so each call gets its own
+        parsed_tokens = _parse_groups(text)
+
+        def is_prune(token: Expr) -> bool:
+            return isinstance(token, IncludeExpr) and \
+                isinstance(token.child, CommandExpr) and token.child.command == "prune"
 
+        prune_funcs: list[MatchFunc] = [self._make_func(token)
+                                        for group in parsed_tokens
+                                        for token in group if is_prune(token)]
+        groups = [[token for token in group if not is_prune(token)] for group in parsed_tokens]
+
+        # 'prune:foo' on its own matches all files, but 'prune:foo OR
+        # *.txt' shouldn't
+        if any(groups):
+            groups = [group for group in groups if group]
+
+        # AndMatchFunc and OrMatchFunc order their children by cost
+        # and reorder them at runtime based on their selectivity
         or_funcs: list[MatchFunc] = []
-        for tokens in parsed_tokens:
+        for group in groups:
             and_funcs: list[MatchFunc] = []
-            for token in tokens:
+            for token in group:
                 and_funcs.append(self._make_func(token))
-            and_funcs = sorted(and_funcs, key=lambda x: x.cost())
             or_funcs.append(AndMatchFunc(and_funcs))
 
-        or_funcs = sorted(or_funcs, key=lambda x: x.cost())
-        return OrMatchFunc(or_funcs)
+        # 'a* OR *.png OR *.jpg' is checked with a single regex
+        or_funcs = merge_globs(or_funcs)
+
+        func = OrMatchFunc(or_funcs)
+        share_content_scan(func)
+
+        if not prune_funcs:
+            return func, None
+        else:
+            return func, OrMatchFunc(merge_globs(prune_funcs))
 
     def _make_func(self, token: Expr) -> MatchFunc:
+        func: MatchFunc
         if isinstance(token, IncludeExpr):
-            return self._func_factory.make_match_func(token.child)
+            func = self._func_factory.make_match_func(token.child)
+            func.label = _child_text(token.child)
         elif isinstance(token, ExcludeExpr):
-            return ExcludeMatchFunc(self._func_factory.make_match_func(token.child))
+            func = ExcludeMatchFunc(self._func_factory.make_match_func(token.child))
+            func.label = "-" + _child_text(token.child)
         elif isinstance(token, CommandExpr):
-            return self._func_factory.make_match_func(token)
+            func = self._func_factory.make_match_func(token)
+            func.label = token.text()
         else:
             assert False, "unknown token: {}".format(token)
+        return func
 
 
 # EOF #
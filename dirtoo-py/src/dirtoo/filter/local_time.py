@@ -0,0 +1,149 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import bisect
+import datetime
+import functools
+import math
+
+import numpy
+import numpy.typing as npt
+
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def local_timestamp(date: datetime.date) -> float:
+    """The timestamp of local midnight at the start of 'date'"""
+    return datetime.datetime(date.year, date.month, date.day).timestamp()
+
+
+def seconds_of_day(dt: datetime.datetime) -> float:
+    return dt.hour * 3600 + dt.minute * 60 + dt.second + dt.microsecond / 1000000
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _utc_offset(timestamp: int) -> int:
+    """The offset of local time from UTC at 'timestamp' in seconds"""
+    local = datetime.datetime.fromtimestamp(timestamp) - _EPOCH
+    return local.days * SECONDS_PER_DAY + local.seconds - timestamp
+
+
+def _offset_change(start: float, end: float, offset: int) -> float:
+    """The first whole second in (start, end] with a UTC offset of
+    'offset', given that 'start' has a different one and 'end' has it"""
+    lo, hi = math.floor(start), math.ceil(end)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if _utc_offset(mid) == offset:
+            hi = mid
+        else:
+            lo = mid
+    return float(hi)
+
+
+class LocalDays:
+    """Table of the timestamps of local midnight for a range of days,
+    used to find the local day of whole numpy arrays of timestamps at
+    once. Single timestamps are looked up in the few points in time
+    at which the UTC offset changes instead, see local_clock().
+    Timestamps outside of the table have a day of -1 and have to go
+    through datetime instead."""
+
+    def __init__(self, first: datetime.date, last: datetime.date) -> None:
+        self.first = first
+        self.count = (last - first).days + 1
+
+        # one more, so that the end of the last day is in there too
+        self.starts = [local_timestamp(first + datetime.timedelta(days=idx)) for idx in range(self.count + 1)]
+        self.starts_array = numpy.array(self.starts, dtype=numpy.float64)
+
+        self.first_weekday = first.weekday()
+
+        # days from 1970-01-01 to 'first'
+        self.first_day = (first - _EPOCH.date()).days
+
+        # the UTC offset is offsets[bisect_right(offset_bounds, mtime)],
+        # NaN outside of the table, it can only change where a day
+        # isn't 24 hours long
+        self.offset_bounds: list[float] = []
+        self.offsets: list[float] = [math.nan]
+        for day in range(self.count + 1):
+            offset = (self.first_day + day) * SECONDS_PER_DAY - int(self.starts[day])
+            if offset != self.offsets[-1]:
+                if day == 0:
+                    self.offset_bounds.append(self.starts[0])
+                else:
+                    self.offset_bounds.append(_offset_change(self.starts[day - 1], self.starts[day], offset))
+                self.offsets.append(offset)
+        self.offset_bounds.append(self.starts[self.count])
+        self.offsets.append(math.nan)
+
+    def days(self, mtimes: npt.NDArray[numpy.float64]) -> npt.NDArray[numpy.intp]:
+        idx = numpy.searchsorted(self.starts_array, mtimes, side="right") - 1
+        idx[idx >= self.count] = -1
+        return idx
+
+    def date(self, day: int) -> datetime.date:
+        return self.first + datetime.timedelta(days=day)
+
+    def weekdays(self, days: npt.NDArray[numpy.intp]) -> npt.NDArray[numpy.intp]:
+        return (self.first_weekday + days) % 7
+
+    def regular(self, days: npt.NDArray[numpy.intp]) -> npt.NDArray[numpy.bool_]:
+        """Mask of the 'days' that are 24 hours long, on the others the
+        seconds since midnight differ from the clock time"""
+        lengths = numpy.diff(self.starts_array)
+        return numpy.asarray((days >= 0) & (lengths[days] == SECONDS_PER_DAY))
+
+
+@functools.lru_cache(maxsize=None)
+def local_days() -> LocalDays:
+    """The days from 1970 until the end of next year, built on first use"""
+    return LocalDays(datetime.date(1970, 1, 1), datetime.date(datetime.date.today().year + 1, 12, 31))
+
+
+def local_clock(mtime: float) -> float:
+    """The local time of 'mtime' as seconds since 1970-01-01 local
+    time, so that the day is int(local) // SECONDS_PER_DAY and the
+    time of day local % SECONDS_PER_DAY. NaN outside of local_days(),
+    never negative inside of it."""
+    days = local_days()
+    return mtime + days.offsets[bisect.bisect_right(days.offset_bounds, mtime)]
+
+
+def local_weekday(mtime: float) -> int:
+    local = local_clock(mtime)
+    if local == local:
+        # 1970-01-01 was a Thursday
+        return (int(local) // SECONDS_PER_DAY + 3) % 7
+    else:
+        return datetime.date.fromtimestamp(mtime).weekday()
+
+
+def local_seconds(mtime: float) -> float:
+    """The seconds since local midnight, as shown by the clock"""
+    local = local_clock(mtime)
+    if local == local:
+        return local % SECONDS_PER_DAY
+    else:
+        return seconds_of_day(datetime.datetime.fromtimestamp(mtime))
+
+
+# EOF #
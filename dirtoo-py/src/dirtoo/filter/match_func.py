@@ -15,34 +15,157 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import TYPE_CHECKING, Callable, Any, Sequence, Union, Tuple
+from typing import TYPE_CHECKING, cast, Callable, Any, Dict, Optional, Sequence, TypeVar, Union, Tuple
 from abc import ABC, abstractmethod
 
 import logging
+import math
+import operator
 import random
 import re
-from fnmatch import fnmatchcase
+import os
+import threading
+from fnmatch import fnmatchcase, translate
 import datetime
 
-from dirtoo.fuzzy import fuzzy
+from dirtoo.fuzzy import FuzzyNeedle
+from dirtoo.filter.content import Buffer, ContentPattern, LinePattern, MultiPattern, is_binary, open_content
+from dirtoo.filter.local_time import (
+    SECONDS_PER_DAY, local_clock, local_days, local_seconds, local_timestamp, local_weekday)
 
 if TYPE_CHECKING:
     from dirtoo.filesystem.file_info import FileInfo
+    from dirtoo.find.content_index import ContentCandidates, ContentIndex
 
 logger = logging.getLogger(__name__)
 
 
 CompareCallable = Callable[[Any, Any], bool]
 
+T = TypeVar("T")
+
+# Decides a match from the undecoded basename, a truthy result counts
+# as match, so that re.Pattern.match can be used directly
+BytesNameFunc = Callable[[bytes], Any]
+
+
+# Rough relative cost of the different kinds of predicates, used to
+# order the children of AndMatchFunc and OrMatchFunc
+COST_NAME = 1
+COST_FUZZY = 5
+COST_STAT = 10
+COST_METADATA = 50
+COST_CONTENT = 100
+
 
 class MatchFunc(ABC):
 
+    # Human readable description used by explain()
+    label: Optional[str] = None
+
     @abstractmethod
     def __call__(self, fileinfo: 'FileInfo') -> bool:
         pass
 
     def cost(self) -> float:
-        return 1
+        return COST_NAME
+
+    def children(self) -> Sequence['MatchFunc']:
+        return []
+
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        """Returns an equivalent function working on the raw bytes of
+        the basename, None when the basename alone doesn't decide
+        the match"""
+        return None
+
+
+class _ChildStats:
+    """Observed selectivity of a child of AndMatchFunc/OrMatchFunc"""
+
+    __slots__ = ("func", "cost", "evaluated", "passed")
+
+    def __init__(self, func: MatchFunc) -> None:
+        self.func = func
+        self.cost = func.cost()
+        self.evaluated = 0
+        self.passed = 0
+
+    def pass_rate(self) -> float:
+        # Laplace smoothing, so that unobserved children count as 50%
+        return (self.passed + 1) / (self.evaluated + 2)
+
+
+class _AdaptiveMatchFunc(MatchFunc):
+    """Base class for AndMatchFunc and OrMatchFunc. The children are
+    initially ordered by cost() and get reordered every
+    REPLAN_INTERVAL calls based on how often they passed, so that
+    cheap predicates that decide the result run first."""
+
+    REPLAN_INTERVAL = 1024
+
+    def __init__(self, funcs: Sequence[MatchFunc], adaptive: bool = True) -> None:
+        self._children = [_ChildStats(func) for func in funcs]
+        self._children.sort(key=lambda child: child.cost)
+        self._adaptive = adaptive and len(self._children) > 1
+        self._calls = 0
+
+    @abstractmethod
+    def _rank(self, child: _ChildStats) -> float:
+        pass
+
+    def _replan(self) -> None:
+        # children that look at more than the directory entry, like
+        # metadata or the contents, stay behind the others, their cost
+        # varies far too much for the rank to be trusted. The tree can
+        # be shared between threads, so the list is replaced in one
+        # step instead of sorted in place, which leaves it empty while
+        # it is sorted.
+        self._children = sorted(self._children, key=lambda child: (child.cost >= COST_METADATA, self._rank(child)))
+
+    def is_adaptive(self) -> bool:
+        return self._adaptive
+
+    def replan(self) -> None:
+        """Reorders the children by what was observed so far, unless
+        the order is fixed"""
+        if self._adaptive:
+            self._replan()
+
+    def cost(self) -> float:
+        return sum(child.cost for child in self._children)
+
+    def children(self) -> Sequence[MatchFunc]:
+        return [child.func for child in self._children]
+
+    def child_stats(self) -> Sequence[_ChildStats]:
+        return self._children
+
+    def _children_bytes_name_funcs(self) -> Optional[list[BytesNameFunc]]:
+        funcs = [child.func.bytes_name_func() for child in self._children]
+        if any(func is None for func in funcs):
+            return None
+        return cast(list[BytesNameFunc], funcs)
+
+
+def _bytes_name_func(pattern: str, flags: int, method: str,
+                     fallback: Callable[[str], Any]) -> Optional[BytesNameFunc]:
+    """Compiles 'pattern' for bytes. ASCII names are matched with that
+    directly, the others are decoded and go through 'fallback', as
+    case-folding, '?' and '.' only work per character on str."""
+
+    if not pattern.isascii():
+        return None
+
+    match_bytes = getattr(re.compile(pattern.encode("ascii"), flags), method)
+
+    def match(name: bytes) -> Any:
+        if name.isascii():
+            return match_bytes(name)
+        else:
+            return fallback(os.fsdecode(name))
+
+    return match
 
 
 class FalseMatchFunc(MatchFunc):
@@ -50,36 +173,76 @@ class FalseMatchFunc(MatchFunc):
     def __call__(self, fileinfo: 'FileInfo') -> bool:
         return False
 
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        return lambda name: False
+
 
 class TrueMatchFunc(MatchFunc):
 
     def __call__(self, fileinfo: 'FileInfo') -> bool:
         return True
 
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        return lambda name: True
 
-class OrMatchFunc(MatchFunc):
 
-    def __init__(self, funcs: Sequence[MatchFunc]) -> None:
-        self._funcs = funcs
+class OrMatchFunc(_AdaptiveMatchFunc):
+
+    def _rank(self, child: _ChildStats) -> float:
+        # cheap children that are likely to match first
+        return child.cost / child.pass_rate()
 
     def __call__(self, fileinfo: 'FileInfo') -> bool:
-        for func in self._funcs:
-            if func(fileinfo):
+        if self._adaptive:
+            self._calls += 1
+            if self._calls % self.REPLAN_INTERVAL == 0:
+                self._replan()
+
+        for child in self._children:
+            child.evaluated += 1
+            if child.func(fileinfo):
+                child.passed += 1
                 return True
         return False
 
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        funcs = self._children_bytes_name_funcs()
+        if funcs is None:
+            return None
+        elif len(funcs) == 1:
+            return funcs[0]
+        else:
+            return lambda name: any(func(name) for func in funcs)
 
-class AndMatchFunc(MatchFunc):
 
-    def __init__(self, funcs: Sequence[MatchFunc]) -> None:
-        self._funcs = funcs
+class AndMatchFunc(_AdaptiveMatchFunc):
+
+    def _rank(self, child: _ChildStats) -> float:
+        # cheap children that are likely to reject first
+        return child.cost / (1.0 - child.pass_rate())
 
     def __call__(self, fileinfo: 'FileInfo') -> bool:
-        for func in self._funcs:
-            if not func(fileinfo):
+        if self._adaptive:
+            self._calls += 1
+            if self._calls % self.REPLAN_INTERVAL == 0:
+                self._replan()
+
+        for child in self._children:
+            child.evaluated += 1
+            if not child.func(fileinfo):
                 return False
+            child.passed += 1
         return True
 
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        funcs = self._children_bytes_name_funcs()
+        if funcs is None:
+            return None
+        elif len(funcs) == 1:
+            return funcs[0]
+        else:
+            return lambda name: all(func(name) for func in funcs)
+
 
 class ExcludeMatchFunc(MatchFunc):
 
@@ -89,6 +252,19 @@ class ExcludeMatchFunc(MatchFunc):
     def __call__(self, fileinfo: 'FileInfo') -> bool:
         return not self._func(fileinfo)
 
+    def cost(self) -> float:
+        return self._func.cost()
+
+    def children(self) -> Sequence[MatchFunc]:
+        return [self._func]
+
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        func = self._func.bytes_name_func()
+        if func is None:
+            return None
+        else:
+            return lambda name: not func(name)
+
 
 class FolderMatchFunc(MatchFunc):
 
@@ -109,11 +285,102 @@ class GlobMatchFunc(MatchFunc):
             self.pattern = pattern.lower()
 
     def __call__(self, fileinfo: 'FileInfo') -> bool:
+        return self._match_name(fileinfo.basename())
+
+    def _match_name(self, name: str) -> bool:
         if self.case_sensitive:
-            return fnmatchcase(fileinfo.basename(), self.pattern)
+            return fnmatchcase(name, self.pattern)
         else:
-            filename = fileinfo.basename().lower()
-            return fnmatchcase(filename, self.pattern)
+            return fnmatchcase(name.lower(), self.pattern)
+
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        return _bytes_name_func(translate(self.pattern), 0 if self.case_sensitive else re.IGNORECASE,
+                                "match", self._match_name)
+
+    def extension(self) -> Optional[str]:
+        """The extension including the dot if the pattern is of the
+        form '*.ext', that is any name ending in '.ext'"""
+        m = _EXTENSION_GLOB_RX.match(self.pattern)
+        return m.group(1) if m else None
+
+
+# '*' followed by a dot and anything without wildcards or further dots
+_EXTENSION_GLOB_RX = re.compile(r"\*(\.[^*?\[\]./]+)\Z")
+
+
+def _extension(name: str) -> str:
+    # everything from the last dot, what GlobMatchFunc.extension()
+    # returns for the globs matching 'name'
+    return name[name.rfind("."):] if "." in name else ""
+
+
+class MultiGlobMatchFunc(MatchFunc):
+    """The union of multiple GlobMatchFuncs, see merge_globs(). '*.ext'
+    patterns are checked with a set lookup of the extension, all other
+    patterns are combined into a single regex alternation."""
+
+    def __init__(self, globs: Sequence[GlobMatchFunc]) -> None:
+        self._globs = list(globs)
+        self.label = " OR ".join(glob.label or glob.pattern for glob in self._globs)
+
+        # insensitive patterns are lowercase already and are matched
+        # against the lowercase name, same as GlobMatchFunc does
+        self.exts = frozenset(ext for ext in (glob.extension() for glob in self._globs if not glob.case_sensitive)
+                              if ext is not None)
+        self.case_sensitive_exts = frozenset(ext for ext in (glob.extension() for glob in self._globs
+                                                             if glob.case_sensitive)
+                                             if ext is not None)
+
+        def combine(case_sensitive: bool) -> Optional['re.Pattern[str]']:
+            patterns = [glob.pattern for glob in self._globs
+                        if glob.case_sensitive == case_sensitive and glob.extension() is None]
+            if not patterns:
+                return None
+            return re.compile("|".join(translate(pattern) for pattern in patterns))
+
+        self.rx = combine(True)
+        self.lower_rx = combine(False)
+
+    def __call__(self, fileinfo: 'FileInfo') -> bool:
+        return self._match_name(fileinfo.basename())
+
+    def _match_name(self, name: str) -> bool:
+        if self.exts or self.lower_rx is not None:
+            lname = name.lower()
+            if _extension(lname) in self.exts:
+                return True
+            if self.lower_rx is not None and self.lower_rx.match(lname):
+                return True
+
+        if self.case_sensitive_exts and _extension(name) in self.case_sensitive_exts:
+            return True
+
+        return self.rx is not None and self.rx.match(name) is not None
+
+    def children(self) -> Sequence[MatchFunc]:
+        return self._globs
+
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        pattern = "|".join(translate(glob.pattern) if glob.case_sensitive else "(?i:{})".format(translate(glob.pattern))
+                           for glob in self._globs)
+        return _bytes_name_func(pattern, 0, "match", self._match_name)
+
+
+def merge_globs(funcs: Sequence[MatchFunc]) -> list[MatchFunc]:
+    """Replaces the GlobMatchFuncs among the children of an OR,
+    including those wrapped in a single element AndMatchFunc, with
+    a single MultiGlobMatchFunc"""
+
+    def as_glob(func: MatchFunc) -> Optional[GlobMatchFunc]:
+        if isinstance(func, AndMatchFunc) and len(func.children()) == 1:
+            func = func.children()[0]
+        return func if isinstance(func, GlobMatchFunc) else None
+
+    globs = [glob for glob in (as_glob(func) for func in funcs) if glob is not None]
+    if len(globs) < 2:
+        return list(funcs)
+
+    return [MultiGlobMatchFunc(globs)] + [func for func in funcs if as_glob(func) is None]
 
 
 class RegexMatchFunc(MatchFunc):
@@ -124,6 +391,9 @@ class RegexMatchFunc(MatchFunc):
     def __call__(self, fileinfo: 'FileInfo') -> bool:
         return bool(self.rx.search(fileinfo.basename()))
 
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        return _bytes_name_func(self.rx.pattern, self.rx.flags & ~re.UNICODE, "search", self.rx.search)
+
 
 class FuzzyMatchFunc(MatchFunc):
 
@@ -131,10 +401,13 @@ class FuzzyMatchFunc(MatchFunc):
         self.needle = needle
         self.n = n
         self.threshold = threshold
+        self.fuzzy_needle = FuzzyNeedle(needle, n)
 
     def __call__(self, fileinfo: 'FileInfo') -> bool:
-        result = fuzzy(self.needle, fileinfo.basename(), self.n)
-        return result > self.threshold
+        return self.fuzzy_needle.score(fileinfo.basename()) > self.threshold
+
+    def cost(self) -> float:
+        return COST_FUZZY
 
 
 class SizeMatchFunc(MatchFunc):
@@ -146,6 +419,9 @@ class SizeMatchFunc(MatchFunc):
     def __call__(self, fileinfo: 'FileInfo') -> bool:
         return self.compare(fileinfo.size(), self.size)
 
+    def cost(self) -> float:
+        return COST_STAT
+
 
 class MetadataMatchFunc(MatchFunc):
 
@@ -166,7 +442,7 @@ class MetadataMatchFunc(MatchFunc):
             return False
 
     def cost(self) -> float:
-        return 50
+        return COST_METADATA
 
 
 class LengthMatchFunc(MatchFunc):
@@ -228,31 +504,86 @@ class CharsetMatchFunc(MatchFunc):
             return True
 
 
+def _period_bounds(start: float, end: float, compare: CompareCallable) -> Tuple[float, float]:
+    """The interval [lower, upper) of the values that compare to the
+    period [start, end) like 'compare' says"""
+
+    if compare is operator.lt:
+        return -math.inf, start
+    elif compare is operator.le:
+        return -math.inf, end
+    elif compare is operator.gt:
+        return end, math.inf
+    elif compare is operator.ge:
+        return start, math.inf
+    elif compare is operator.eq:
+        return start, end
+    else:
+        raise RuntimeError("unsupported comparison: {}".format(compare))
+
+
 class DateMatchFunc(MatchFunc):
+    """Matches the local date as YYYY-MM-DD against a glob pattern,
+    the result is remembered per day of local_days()"""
 
     def __init__(self, pattern: str) -> None:
         self._pattern = pattern
+        self._dates: Dict[datetime.date, bool] = {}
+        self._days: Dict[int, bool] = {}
+
+    def match_date(self, date: datetime.date) -> bool:
+        result = self._dates.get(date)
+        if result is None:
+            result = fnmatchcase(date.strftime("%Y-%m-%d"), self._pattern)
+            self._dates[date] = result
+        return result
+
+    def match_day(self, day: int) -> bool:
+        """Same as match_date() for a day of local_days()"""
+        result = self._days.get(day)
+        if result is None:
+            result = self.match_date(local_days().date(day))
+            self._days[day] = result
+        return result
 
     def __call__(self, fileinfo: 'FileInfo') -> bool:
         mtime = fileinfo.mtime()
-        dt = datetime.datetime.fromtimestamp(mtime)
-        dtstr = dt.strftime("%Y-%m-%d")
-        return fnmatchcase(dtstr, self._pattern)
+        local = local_clock(mtime)
+        if local == local:
+            return self.match_day(int(local) // SECONDS_PER_DAY - local_days().first_day)
+        else:
+            return self.match_date(datetime.date.fromtimestamp(mtime))
+
+    def cost(self) -> float:
+        return COST_STAT
 
 
 class TimeMatchFunc(MatchFunc):
+    """Matches the local time as HH:MM:SS against a glob pattern, the
+    result is remembered per second of the day"""
 
     def __init__(self, pattern: str) -> None:
         self._pattern = pattern
+        self._seconds: Dict[int, bool] = {}
+
+    def match_second(self, second: int) -> bool:
+        result = self._seconds.get(second)
+        if result is None:
+            text = "{:02d}:{:02d}:{:02d}".format(second // 3600, second // 60 % 60, second % 60)
+            result = fnmatchcase(text, self._pattern)
+            self._seconds[second] = result
+        return result
 
     def __call__(self, fileinfo: 'FileInfo') -> bool:
-        mtime = fileinfo.mtime()
-        dt = datetime.datetime.fromtimestamp(mtime)
-        dtstr = dt.strftime("%H:%M:%S")
-        return fnmatchcase(dtstr, self._pattern)
+        return self.match_second(int(local_seconds(fileinfo.mtime())))
+
+    def cost(self) -> float:
+        return COST_STAT
 
 
 class TimeOpMatchFunc(MatchFunc):
+    """Compares the local time of day, the comparison is turned into
+    an interval [lower, upper) of seconds since midnight"""
 
     def __init__(self, text: str, compare: CompareCallable) -> None:
         self._compare = compare
@@ -266,23 +597,27 @@ class TimeOpMatchFunc(MatchFunc):
         else:
             raise RuntimeError("TimeOpMatchFunc: couldn't parse text: {}".format(text))
 
-    def _snip_it(self, time: datetime.time) -> Union[datetime.time, Tuple[int, int], int]:
+        start = self._time.hour * 3600 + self._time.minute * 60 + self._time.second
         if self._snip == 0:
-            return time
+            # the time of the file has sub-second precision, so
+            # '<=10:00:00' doesn't include 10:00:00.5
+            end = math.nextafter(start, math.inf)
         elif self._snip == 1:
-            return (time.hour, time.minute)
-        elif self._snip == 2:
-            return time.hour
+            end = start + 60
         else:
-            assert False
+            end = start + 3600
+        self.lower, self.upper = _period_bounds(start, end, compare)
 
     def __call__(self, fileinfo: 'FileInfo') -> bool:
-        mtime = fileinfo.mtime()
-        dt = datetime.datetime.fromtimestamp(mtime)
-        return self._compare(self._snip_it(dt.time()), self._snip_it(self._time))
+        return self.lower <= local_seconds(fileinfo.mtime()) < self.upper
+
+    def cost(self) -> float:
+        return COST_STAT
 
 
 class DateOpMatchFunc(MatchFunc):
+    """Compares the local date, the comparison is turned into an
+    interval [lower, upper) of timestamps"""
 
     def __init__(self, text: str, compare: CompareCallable) -> None:
         self._compare = compare
@@ -296,20 +631,20 @@ class DateOpMatchFunc(MatchFunc):
         else:
             raise RuntimeError("DateOpMatchFunc: couldn't parse text: {}".format(text))
 
-    def _snip_it(self, date: datetime.date) -> Union[datetime.date, Tuple[int, int], int]:
+        date = self._date
         if self._snip == 0:
-            return date
+            end = date + datetime.timedelta(days=1)
         elif self._snip == 1:
-            return (date.year, date.month)
-        elif self._snip == 2:
-            return date.year
+            end = datetime.date(date.year + date.month // 12, date.month % 12 + 1, 1)
         else:
-            assert False
+            end = datetime.date(date.year + 1, 1, 1)
+        self.lower, self.upper = _period_bounds(local_timestamp(date), local_timestamp(end), compare)
 
     def __call__(self, fileinfo: 'FileInfo') -> bool:
-        mtime = fileinfo.mtime()
-        dt = datetime.datetime.fromtimestamp(mtime)
-        return self._compare(self._snip_it(dt.date()), self._snip_it(self._date))
+        return self.lower <= fileinfo.mtime() < self.upper
+
+    def cost(self) -> float:
+        return COST_STAT
 
 
 WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
@@ -336,34 +671,161 @@ class WeekdayMatchFunc(MatchFunc):
         self._weekday = text2weekday(text)
         self._compare = compare
 
+        # whether each weekday matches, Monday first
+        self.weekdays = tuple(bool(compare(weekday, self._weekday)) for weekday in range(7))
+
     def __call__(self, fileinfo: 'FileInfo') -> bool:
-        mtime = fileinfo.mtime()
-        dt = datetime.datetime.fromtimestamp(mtime)
-        return self._compare(dt.weekday(), self._weekday)
+        return self.weekdays[local_weekday(fileinfo.mtime())]
+
+    def cost(self) -> float:
+        return COST_STAT
+
+
+def read_content(fileinfo: 'FileInfo', search: Callable[[Buffer], T], fallback: T) -> T:
+    """Calls 'search' with the contents of the file, returns 'fallback'
+    for files that can't be read or are skipped, see ContainsMatchFunc"""
+
+    location = fileinfo.location()
+
+    if location.has_payload():
+        return fallback
+
+    try:
+        with open_content(location.get_path(), ContainsMatchFunc.MAX_FILE_SIZE) as data:
+            if data is None:
+                return fallback
+            if ContainsMatchFunc.SKIP_BINARY and is_binary(data):
+                return fallback
+            return search(data)
+    except (OSError, ValueError) as err:
+        logger.warning(str(err))
+        return fallback
 
 
 class ContainsMatchFunc(MatchFunc):
+    """Searches the contents of the file for 'pattern'. Files larger
+    than MAX_FILE_SIZE and, with SKIP_BINARY, files that look binary
+    never match. With a CONTENT_INDEX only the files that the index
+    can't rule out are read."""
 
-    def __init__(self, line_match_func: Callable[[str], bool]) -> None:
-        self._line_match_func = line_match_func
+    MAX_FILE_SIZE: Optional[int] = 1024 * 1024 * 1024
+    SKIP_BINARY = True
+    CONTENT_INDEX: Optional['ContentIndex'] = None
+
+    def __init__(self, pattern: Union[ContentPattern, Callable[[str], bool]]) -> None:
+        if isinstance(pattern, ContentPattern):
+            self.pattern = pattern
+        else:
+            self.pattern = LinePattern(pattern)
+
+        # set by share_content_scan()
+        self._scan: Optional[Tuple[ContentScan, int]] = None
+
+        # the CONTENT_INDEX they were looked up in and the candidates
+        self._candidates: Optional[Tuple['ContentIndex', Optional['ContentCandidates']]] = None
 
     def __call__(self, fileinfo: 'FileInfo') -> bool:
-        location = fileinfo.location()
+        if self._scan is not None:
+            scan, idx = self._scan
+            return scan.results(fileinfo)[idx]
+        elif not self.may_match(fileinfo):
+            return False
+        else:
+            return read_content(fileinfo, self.pattern.search, False)
 
-        if not location.has_payload():
-            try:
-                with open(location.get_path(), "r", encoding="utf-8", errors="replace") as fin:
-                    for line in fin:
-                        if self._line_match_func(line):
-                            return True
-            except IOError as err:
-                logger.warning(str(err))
-                return False
+    def may_match(self, fileinfo: 'FileInfo') -> bool:
+        """False if the CONTENT_INDEX tells that the file doesn't contain 'pattern'"""
 
-        return False
+        index = ContainsMatchFunc.CONTENT_INDEX
+        if index is None:
+            return True
+
+        if self._candidates is None or self._candidates[0] is not index:
+            self._candidates = (index, index.candidates(self.pattern))
+
+        candidates = self._candidates[1]
+        return candidates is None or candidates.may_match(fileinfo, ContainsMatchFunc.SKIP_BINARY)
 
     def cost(self) -> float:
-        return 100
+        return COST_CONTENT
+
+
+class ContentScan:
+    """Evaluates the patterns of multiple ContainsMatchFuncs with a
+    single read of the file. The first of them to be called for a
+    file searches for all patterns, the others reuse its results."""
+
+    def __init__(self, funcs: Sequence[ContainsMatchFunc]) -> None:
+        self._funcs = funcs
+        self._multi = MultiPattern([func.pattern for func in funcs])
+
+        # the results for the last file, per thread as files are
+        # evaluated concurrently by match_concurrently()
+        self._last = threading.local()
+
+        for idx, func in enumerate(funcs):
+            func._scan = (self, idx)
+
+    def results(self, fileinfo: 'FileInfo') -> Sequence[bool]:
+        last = getattr(self._last, "value", None)
+        if last is not None and last[0] is fileinfo:
+            return cast(Sequence[bool], last[1])
+
+        if any(func.may_match(fileinfo) for func in self._funcs):
+            results = read_content(fileinfo, self._multi.search, [False] * len(self._funcs))
+        else:
+            results = [False] * len(self._funcs)
+        self._last.value = (fileinfo, results)
+        return results
+
+
+def share_content_scan(func: MatchFunc) -> None:
+    """Lets all ContainsMatchFuncs in the tree share a single read of
+    the file, so that 'contains:foo contains:bar' doesn't read each
+    file twice"""
+
+    funcs: list[ContainsMatchFunc] = []
+
+    def collect(func: MatchFunc) -> None:
+        if isinstance(func, ContainsMatchFunc):
+            funcs.append(func)
+        for child in func.children():
+            collect(child)
+
+    collect(func)
+
+    if len(funcs) > 1:
+        ContentScan(funcs)
+
+
+def explain(func: MatchFunc, indent: int = 0) -> str:
+    """Returns the evaluation plan of 'func' as text, including the
+    observed pass rate of the children of AndMatchFunc/OrMatchFunc"""
+
+    lines: list[str] = []
+
+    def name(func: MatchFunc) -> str:
+        if isinstance(func, AndMatchFunc):
+            return "AND"
+        elif isinstance(func, OrMatchFunc):
+            return "OR"
+        elif func.label is not None:
+            return func.label
+        else:
+            return type(func).__name__
+
+    def recurse(func: MatchFunc, indent: int, stats: Optional[_ChildStats]) -> None:
+        line = "{}{}  cost={:g}".format("  " * indent, name(func), func.cost())
+        if stats is not None and stats.evaluated > 0:
+            line += "  passed={}/{}".format(stats.passed, stats.evaluated)
+        lines.append(line)
+
+        if isinstance(func, _AdaptiveMatchFunc):
+            for child in func.child_stats():
+                recurse(child.func, indent + 1, child)
+
+    recurse(func, indent, None)
+    return "\n".join(lines) + "\n"
 
 
 # EOF #
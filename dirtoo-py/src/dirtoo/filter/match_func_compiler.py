@@ -0,0 +1,292 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Optional, Sequence, Tuple, Union
+
+import bisect
+import logging
+import math
+import operator
+import re
+from fnmatch import translate
+
+from dirtoo.filter.local_time import SECONDS_PER_DAY, local_days
+from dirtoo.filter.match_func import (
+    MatchFunc,
+    BytesNameFunc,
+    AndMatchFunc,
+    OrMatchFunc,
+    ExcludeMatchFunc,
+    TrueMatchFunc,
+    FalseMatchFunc,
+    FolderMatchFunc,
+    GlobMatchFunc,
+    MultiGlobMatchFunc,
+    RegexMatchFunc,
+    SizeMatchFunc,
+    LengthMatchFunc,
+    DateMatchFunc,
+    DateOpMatchFunc,
+    TimeOpMatchFunc,
+    WeekdayMatchFunc,
+)
+
+if TYPE_CHECKING:
+    from dirtoo.filesystem.file_info import FileInfo
+
+logger = logging.getLogger(__name__)
+
+
+OPERATOR2TEXT = {
+    operator.lt: "<",
+    operator.le: "<=",
+    operator.gt: ">",
+    operator.ge: ">=",
+    operator.eq: "==",
+}
+
+
+# Values shared between predicates, they are computed on first use
+# with ':=' and reused afterwards
+HOISTED = {
+    "name": "fileinfo.basename()",
+    "lname": "{name}.lower()",
+    "size": "fileinfo.size()",
+    "mtime": "fileinfo.mtime()",
+    "local": "({mtime} + _offsets[_bisect(_offset_bounds, {mtime})])",
+}
+
+
+class _Generator:
+    """Turns a MatchFunc tree into the source of a single expression.
+    A hoisted value can only be reused where it is certain to have
+    been computed already, that is after it was used by an earlier
+    operand of the same and/or chain or of one enclosing it."""
+
+    def __init__(self) -> None:
+        self.namespace: Dict[str, Any] = {
+            "_bisect": bisect.bisect_right,
+        }
+
+    def constant(self, value: Any) -> str:
+        if type(value) in (int, str):
+            return repr(value)
+
+        name = "_k{}".format(len(self.namespace))
+        self.namespace[name] = value
+        return name
+
+    def var(self, name: str, bound: FrozenSet[str]) -> Tuple[str, FrozenSet[str]]:
+        if name in bound:
+            return name, bound
+
+        dependencies = {}
+        for dep in dict.fromkeys(re.findall(r"{(\w+)}", HOISTED[name])):
+            dependencies[dep], bound = self.var(dep, bound)
+        return "({} := {})".format(name, HOISTED[name].format(**dependencies)), bound | {name}
+
+    def local(self, func: MatchFunc, expr: str, bound: FrozenSet[str]) -> Tuple[str, FrozenSet[str]]:
+        """'expr' on the local time as from local_clock(), timestamps
+        outside of local_days() are left to 'func'. local_days() is
+        only built when a predicate needs it."""
+        days = local_days()
+        self.namespace["_offset_bounds"] = days.offset_bounds
+        self.namespace["_offsets"] = days.offsets
+
+        # the condition is evaluated first and binds 'local'
+        local, bound = self.var("local", bound)
+        return "({} if {} == local else {}(fileinfo))".format(expr, local, self.constant(func)), bound
+
+    def interval(self, value: str, lower: float, upper: float) -> str:
+        if lower == -math.inf:
+            return "{} < {!r}".format(value, upper)
+        elif upper == math.inf:
+            return "{} >= {!r}".format(value, lower)
+        else:
+            return "{!r} <= {} < {!r}".format(lower, value, upper)
+
+    def compare(self, lhs: str, compare: Callable[[Any, Any], bool], rhs: Any) -> str:
+        op = OPERATOR2TEXT.get(compare)
+        if op is not None:
+            return "{} {} {}".format(lhs, op, self.constant(rhs))
+        else:
+            return "{}({}, {})".format(self.constant(compare), lhs, self.constant(rhs))
+
+    def chain(self, funcs: Sequence[MatchFunc], keyword: str, empty: str,
+              bound: FrozenSet[str]) -> Tuple[str, FrozenSet[str]]:
+        if not funcs:
+            return empty, bound
+
+        # Only the first operand is always evaluated, so only the
+        # values it computes are certain to be bound afterwards
+        parts = []
+        inner_bound = first_bound = bound
+        for idx, func in enumerate(funcs):
+            part, inner_bound = self.expr(func, inner_bound)
+            parts.append(part)
+            if idx == 0:
+                first_bound = inner_bound
+
+        if len(parts) == 1:
+            return parts[0], first_bound
+        else:
+            return "(" + " {} ".format(keyword).join(parts) + ")", first_bound
+
+    def expr(self, func: MatchFunc, bound: FrozenSet[str]) -> Tuple[str, FrozenSet[str]]:
+        if isinstance(func, AndMatchFunc):
+            return self.chain(func.children(), "and", "True", bound)
+        elif isinstance(func, OrMatchFunc):
+            return self.chain(func.children(), "or", "False", bound)
+        elif isinstance(func, ExcludeMatchFunc):
+            child, bound = self.expr(func.children()[0], bound)
+            return "not ({})".format(child), bound
+        elif isinstance(func, TrueMatchFunc):
+            return "True", bound
+        elif isinstance(func, FalseMatchFunc):
+            return "False", bound
+        elif isinstance(func, FolderMatchFunc):
+            return "fileinfo.isdir()", bound
+        elif isinstance(func, GlobMatchFunc):
+            name, bound = self.var("name" if func.case_sensitive else "lname", bound)
+            rx = self.constant(re.compile(translate(func.pattern)).match)
+            return "{}({}) is not None".format(rx, name), bound
+        elif isinstance(func, MultiGlobMatchFunc):
+            parts = []
+            variants: Sequence[Tuple[str, FrozenSet[str], Optional['re.Pattern[str]']]] = [
+                ("lname", func.exts, func.lower_rx),
+                ("name", func.case_sensitive_exts, func.rx)]
+            for var, exts, regex in variants:
+                if exts:
+                    value, bound = self.var(var, bound)
+                    parts.append("{}[{}.rfind('.'):] in {}".format(value, var, self.constant(exts)))
+                    value = var
+                if regex is not None:
+                    value, bound = self.var(var, bound)
+                    parts.append("{}({}) is not None".format(self.constant(regex.match), value))
+            return "(" + " or ".join(parts) + ")", bound
+        elif isinstance(func, RegexMatchFunc):
+            name, bound = self.var("name", bound)
+            return "{}({}) is not None".format(self.constant(func.rx.search), name), bound
+        elif isinstance(func, LengthMatchFunc):
+            name, bound = self.var("name", bound)
+            return self.compare("len({})".format(name), func.compare, func.length), bound
+        elif isinstance(func, SizeMatchFunc):
+            size, bound = self.var("size", bound)
+            return self.compare(size, func.compare, func.size), bound
+        elif isinstance(func, DateOpMatchFunc):
+            mtime, bound = self.var("mtime", bound)
+            return self.interval(mtime, func.lower, func.upper), bound
+        elif isinstance(func, TimeOpMatchFunc):
+            return self.local(func, self.interval("local % {}".format(SECONDS_PER_DAY), func.lower, func.upper),
+                              bound)
+        elif isinstance(func, DateMatchFunc):
+            return self.local(func, "{}(int(local) // {} - {})".format(
+                self.constant(func.match_day), SECONDS_PER_DAY, local_days().first_day), bound)
+        elif isinstance(func, WeekdayMatchFunc):
+            # 1970-01-01 was a Thursday
+            return self.local(func, "{}[(int(local) // {} + 3) % 7]".format(
+                self.constant(func.weekdays), SECONDS_PER_DAY), bound)
+        else:
+            # everything else is called as is
+            return "{}(fileinfo)".format(self.constant(func)), bound
+
+
+def _adaptive_funcs(func: MatchFunc) -> list[Union[AndMatchFunc, OrMatchFunc]]:
+    """The AndMatchFunc/OrMatchFunc in 'func' that reorder their children"""
+
+    result: list[Union[AndMatchFunc, OrMatchFunc]] = []
+    if isinstance(func, (AndMatchFunc, OrMatchFunc)) and func.is_adaptive():
+        result.append(func)
+    for child in func.children():
+        result.extend(_adaptive_funcs(child))
+    return result
+
+
+class CompiledMatchFunc(MatchFunc):
+    """A MatchFunc tree compiled into a single generated function,
+    without the per node dispatch and with values like the lowercased
+    basename or the size computed only once. The order of the
+    children is fixed at compile time, so when the tree adapts to the
+    observed selectivity, it is evaluated as is for the first
+    WARMUP_CALLS calls and compiled in the order it arrived at
+    afterwards. 'function' changes then, so callers have to look it
+    up for each call."""
+
+    # calls evaluated by the tree before it is compiled
+    WARMUP_CALLS = 4 * AndMatchFunc.REPLAN_INTERVAL
+
+    def __init__(self, func: MatchFunc) -> None:
+        self._func = func
+        self.label = func.label
+
+        self._adaptive_funcs = _adaptive_funcs(func)
+        self._calls = 0
+        self.source: Optional[str] = None
+        self.function: Callable[['FileInfo'], bool] = self._warm_up
+        if not self._adaptive_funcs or CompiledMatchFunc.WARMUP_CALLS <= 0:
+            self._compile()
+
+    def _warm_up(self, fileinfo: 'FileInfo') -> bool:
+        if self.source is not None:
+            # called through an earlier value of 'function'
+            return self.function(fileinfo)
+
+        self._calls += 1
+        if self._calls >= CompiledMatchFunc.WARMUP_CALLS:
+            self._compile()
+        return self._func(fileinfo)
+
+    def _compile(self) -> None:
+        # the children that were evaluated less than REPLAN_INTERVAL
+        # times haven't been reordered yet
+        for func in self._adaptive_funcs:
+            func.replan()
+
+        generator = _Generator()
+        expr, _ = generator.expr(self._func, frozenset())
+        source = "def match(fileinfo):\n    return {}\n".format(expr)
+
+        logger.debug("CompiledMatchFunc:\n%s", source)
+
+        namespace = generator.namespace
+        exec(compile(source, "<filter>", "exec"), namespace)  # pylint: disable=W0122
+
+        # the generated function, calling it directly saves a frame
+        self.function = namespace["match"]
+        self.source = source
+
+    def __call__(self, fileinfo: 'FileInfo') -> bool:
+        return self.function(fileinfo)
+
+    def cost(self) -> float:
+        return self._func.cost()
+
+    def children(self) -> Sequence[MatchFunc]:
+        return [self._func]
+
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        return self._func.bytes_name_func()
+
+
+def compile_match_func(func: MatchFunc) -> CompiledMatchFunc:
+    if isinstance(func, CompiledMatchFunc):
+        return func
+    else:
+        return CompiledMatchFunc(func)
+
+
+# EOF #
@@ -26,8 +26,9 @@ import bytefmt
 
 import dirtoo.duration as duration
 import dirtoo.file_type as file_type
-from dirtoo.fuzzy import fuzzy
+from dirtoo.fuzzy import FuzzyNeedle
 from dirtoo.glob import is_glob_pattern
+from dirtoo.filter.content import LiteralPattern, RegexPattern
 from dirtoo.filter.match_func import (
     MatchFunc,
     FalseMatchFunc,
@@ -273,6 +274,17 @@ class MatchFuncFactory:
                                Example: 'pages:>100'
                                """)
 
+        self.register_function(["prune"], self.make_prune,
+                               """\
+                               {GLOB}
+
+                               Doesn't descend into directories whose
+                               name matches GLOB, case-sensitive. Applies
+                               to the walk, not to the files themselves.
+
+                               Example: 'prune:.git prune:node_modules'
+                               """)
+
         # self.register_function(["pick"], self.make_pick,
         #                        """\
         #                        {COUNT}
@@ -358,6 +370,9 @@ class MatchFuncFactory:
     def make_Glob(self, argument: str) -> GlobMatchFunc:
         return GlobMatchFunc(argument, case_sensitive=True)
 
+    def make_prune(self, argument: str) -> GlobMatchFunc:
+        return GlobMatchFunc(argument, case_sensitive=True)
+
     def make_type(self, argument: str) -> MatchFunc:
         if argument == "video":
             return RegexMatchFunc(file_type.VIDEO_REGEX, re.IGNORECASE)
@@ -407,44 +422,23 @@ class MatchFuncFactory:
             return FalseMatchFunc()
 
     def make_contains(self, argument: str) -> MatchFunc:
-        needle = argument.lower()
-
-        def line_match_func(line: str, needle: str = needle) -> bool:
-            return needle in line.lower()
-
-        return ContainsMatchFunc(line_match_func)
+        return ContainsMatchFunc(LiteralPattern(argument, case_sensitive=False))
 
     def make_Contains(self, argument: str) -> MatchFunc:
-        needle = argument
-
-        def line_match_func(line: str, needle: str = needle) -> bool:
-            return needle in line
-
-        return ContainsMatchFunc(line_match_func)
+        return ContainsMatchFunc(LiteralPattern(argument, case_sensitive=True))
 
     def make_contains_regex(self, argument: str) -> MatchFunc:
-        rx = re.compile(argument, re.IGNORECASE)
-
-        def line_match_func(line: str, rx: re.Pattern[str] = rx) -> bool:
-            return bool(rx.search(line))
-
-        return ContainsMatchFunc(line_match_func)
+        return ContainsMatchFunc(RegexPattern(argument, case_sensitive=False))
 
     def make_Contains_Regex(self, argument: str) -> MatchFunc:
-        rx = re.compile(argument)
-
-        def line_match_func(line: str, rx: re.Pattern[str] = rx) -> bool:
-            return bool(rx.search(line))
-
-        return ContainsMatchFunc(line_match_func)
+        return ContainsMatchFunc(RegexPattern(argument, case_sensitive=True))
 
     def make_contains_fuzzy(self, argument: str) -> MatchFunc:
-        needle = argument
-        n = 3
+        needle = FuzzyNeedle(argument, n=3)
         threshold = 0.5
 
-        def line_match_func(line: str, needle: str = needle, n: int = n, threshold: float = threshold) -> bool:
-            return fuzzy(needle, line, n) > threshold
+        def line_match_func(line: str) -> bool:
+            return needle.score(line) > threshold
 
         return ContainsMatchFunc(line_match_func)
 
@@ -15,32 +15,70 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import Tuple
+from typing import IO, Any, Dict, Iterable, Iterator, Optional, Tuple
+from types import CodeType
 
+import heapq
 import os
+import pickle
 import shlex
 import string
 import subprocess
 import sys
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from dirtoo.find.context import Context
+from dirtoo.find.file_entry import FileEntry
 from dirtoo.find.util import replace_item
 
 
+FormatSegment = Tuple[str, Optional[CodeType], str]
+
+
+def compile_format(fmt_str: str) -> list[FormatSegment]:
+    """Split a format string into (literal_text, field_code, format_spec)
+    segments, with the field names compiled to code objects"""
+
+    segments: list[FormatSegment] = []
+    fmt = string.Formatter()
+    for (literal_text, field_name, format_spec, _) in fmt.parse(fmt_str):
+        if field_name is not None:
+            assert format_spec is not None
+            code = compile(field_name, "<format>", "eval")
+            segments.append((literal_text, code, format_spec))
+        else:
+            segments.append((literal_text, None, ""))
+    return segments
+
+
 class Action:
 
+    # Set by actions that implement raw_file() without file()
+    accepts_bytes = False
+
     def __init__(self) -> None:
         pass
 
-    def file(self, root: str, filename: str) -> None:
+    def raw_file(self, path: bytes) -> None:
+        """Same as file(), but with the undecoded path, only called in
+        the bytes mode of find_files() when 'accepts_bytes' is set"""
+        self.file(FileEntry(*os.path.split(os.fsdecode(path))))
+
+    def file(self, entry: FileEntry) -> None:
         pass
 
-    def directory(self, root: str, filename: str) -> None:
+    def directory(self, entry: FileEntry) -> None:
         pass
 
     def finish(self) -> None:
         pass
 
+    def exit_status(self) -> int:
+        """Non-zero when the action failed for some of the files"""
+        return 0
+
 
 class PrinterAction(Action):
 
@@ -48,6 +86,10 @@ class PrinterAction(Action):
         super().__init__()
 
         self.fmt_str = fmt_str
+        self.fmt_segments = compile_format(fmt_str)
+        self.fmt_names = {name
+                          for _, code, _ in self.fmt_segments if code is not None
+                          for name in code.co_names}
         self.finisher = finisher
 
         self.file_count = 0
@@ -56,41 +98,69 @@ class PrinterAction(Action):
         self.ctx = Context()
         self.global_vars = globals().copy()
         self.global_vars.update(self.ctx.get_hash())
+        self.local_vars: Dict[str, Any] = {}
 
-    def file(self, root: str, filename: str) -> None:
+    def file(self, entry: FileEntry) -> None:
         self.file_count += 1
 
-        fullpath = os.path.join(root, filename)
+        if self.finisher:
+            self.size_total += entry.lstat().st_size
+
+        self.ctx.current_entry = entry
+
+        fullpath = entry.path
+        local_vars = self.local_vars
+        local_vars['_'] = entry.name
+        local_vars['p'] = fullpath
+
+        # only compute the more expensive variables when they are used
+        names = self.fmt_names
+        if 'ap' in names or 'apq' in names:
+            abspath = entry.abspath()
+            local_vars['ap'] = abspath
+            local_vars['apq'] = shlex.quote(abspath)
+        if 'pq' in names:
+            local_vars['pq'] = shlex.quote(fullpath)
+        if 'q' in names:
+            local_vars['q'] = shlex.quote(entry.name)
+
+        out = []
+        for literal_text, code, format_spec in self.fmt_segments:
+            out.append(literal_text)
+            if code is not None:
+                value = eval(code, self.global_vars, local_vars)  # pylint: disable=W0123
+                out.append(format(value, format_spec))
+        sys.stdout.write("".join(out))
+
+    def finish(self) -> None:
+        if self.finisher:
+            print("-" * 72)
+            print("{:>12}  {} files in total".format(self.ctx.sizehr(self.size_total), self.file_count))
 
-        byte_size = os.lstat(fullpath).st_size
 
-        self.size_total += byte_size
+class RawPrinterAction(Action):
+    """Prints the plain path followed by 'terminator', same as
+    PrinterAction("{fullpath()}\\n"), but writes raw bytes, so that
+    paths are never decoded"""
 
-        self.ctx.current_file = fullpath
+    accepts_bytes = True
+
+    def __init__(self, terminator: bytes = b"\n") -> None:
+        super().__init__()
+        self._terminator = terminator
+        self._out = sys.stdout.buffer
 
-        local_vars = {
-            '_': os.path.basename(filename),
-            'p': fullpath,
-            'ap': os.path.abspath(fullpath),
-            'apq': shlex.quote(os.path.abspath(fullpath)),
-            'pq': shlex.quote(fullpath),
-            'q': shlex.quote(filename),
-        }
+    def raw_file(self, path: bytes) -> None:
+        self._out.write(path + self._terminator)
 
-        fmt = string.Formatter()
-        for (literal_text, field_name, format_spec, _) in fmt.parse(self.fmt_str):
-            if literal_text is not None:
-                sys.stdout.write(literal_text)
+    def file(self, entry: FileEntry) -> None:
+        self.raw_file(os.fsencode(entry.path))
 
-            if field_name is not None:
-                assert format_spec is not None
-                value = eval(field_name, self.global_vars, local_vars)  # pylint: disable=W0123
-                sys.stdout.write(format(value, format_spec))
+    def directory(self, entry: FileEntry) -> None:
+        self.raw_file(os.fsencode(entry.path))
 
     def finish(self) -> None:
-        if self.finisher:
-            print("-" * 72)
-            print("{:>12}  {} files in total".format(self.ctx.sizehr(self.size_total), self.file_count))
+        self._out.flush()
 
 
 class MultiAction(Action):
@@ -99,103 +169,283 @@ class MultiAction(Action):
         super().__init__()
 
         self.actions: list[Action] = []
+        self.accepts_bytes = True
 
     def add(self, action: Action) -> None:
         self.actions.append(action)
+        self.accepts_bytes = all(action.accepts_bytes for action in self.actions)
+
+    def raw_file(self, path: bytes) -> None:
+        for action in self.actions:
+            action.raw_file(path)
 
-    def file(self, root: str, filename: str) -> None:
+    def file(self, entry: FileEntry) -> None:
         for action in self.actions:
-            action.file(root, filename)
+            action.file(entry)
 
-    def directory(self, root: str, filename: str) -> None:
+    def directory(self, entry: FileEntry) -> None:
         for action in self.actions:
-            action.directory(root, filename)
+            action.directory(entry)
 
     def finish(self) -> None:
         for action in self.actions:
             action.finish()
 
+    def exit_status(self) -> int:
+        return max((action.exit_status() for action in self.actions), default=0)
+
+
+def _arg_size(arg: str) -> int:
+    # the string, its terminating \0 and the argv pointer
+    return len(os.fsencode(arg)) + 1 + 8
+
+
+def max_command_size() -> int:
+    """The number of bytes available for the argv of a child process,
+    computed the same way as xargs does it"""
+
+    try:
+        arg_max = os.sysconf("SC_ARG_MAX")
+    except (ValueError, OSError):
+        arg_max = 128 * 1024
+
+    env_size = sum(len(key) + len(value) + 2 + 8 for key, value in os.environb.items())
+
+    # POSIX suggests to leave 2048 bytes of headroom
+    return max(4096, arg_max - env_size - 2048)
+
 
 class ExecAction(Action):
+    """Runs a command for each file ('{}') or for batches of files
+    ('{}+'). Batches are split so that they fit into the argv limit
+    of the system. With 'jobs' > 1 up to 'jobs' commands run
+    concurrently. Failing commands are reported on stderr."""
 
-    def __init__(self, exec_str: str):
+    def __init__(self, exec_str: str, jobs: int = 1, command_size: Optional[int] = None) -> None:
         super().__init__()
 
         self.on_file_cmd = None
         self.on_multi_cmd = None
-        self.all_files: list[str] = []
+
+        self.jobs = jobs
+        self.command_size = command_size if command_size is not None else max_command_size()
+
+        self.batch: list[str] = []
+        self.batch_size = 0
+        self.failed = 0
+
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.slots: Optional[threading.BoundedSemaphore] = None
+        self.lock = threading.Lock()
 
         cmd = shlex.split(exec_str)
 
         if "{}+" in cmd:
             self.on_multi_cmd = cmd
+            self.multi_cmd_size = sum(_arg_size(arg) for arg in cmd if arg != "{}+")
         elif "{}" in cmd:
             self.on_file_cmd = cmd
         else:
             pass  # FIXME
 
-    def file(self, root: str, filename: str) -> None:
+        if self.jobs > 1:
+            self.executor = ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="ExecAction")
+            self.slots = threading.BoundedSemaphore(self.jobs)
+
+    def file(self, entry: FileEntry) -> None:
         if self.on_file_cmd:
-            cmd = replace_item(self.on_file_cmd, "{}", [os.path.join(root, filename)])
-            subprocess.call(cmd)
+            cmd = replace_item(self.on_file_cmd, "{}", [entry.path])
+            self._run(cmd, 1)
 
         if self.on_multi_cmd:
-            self.all_files.append(os.path.join(root, filename))
+            arg_size = _arg_size(entry.path)
+            if self.batch and self.multi_cmd_size + self.batch_size + arg_size > self.command_size:
+                self._flush()
+
+            self.batch.append(entry.path)
+            self.batch_size += arg_size
 
-    def directory(self, root: str, filename: str) -> None:
+    def directory(self, entry: FileEntry) -> None:
         pass
 
+    def _flush(self) -> None:
+        assert self.on_multi_cmd is not None
+        multi_cmd = replace_item(self.on_multi_cmd, "{}+", self.batch)
+        self._run(multi_cmd, len(self.batch))
+        self.batch = []
+        self.batch_size = 0
+
+    def _run(self, cmd: list[str], file_count: int) -> None:
+        if self.executor is None:
+            self._call(cmd, file_count)
+        else:
+            assert self.slots is not None
+            # Don't queue up more commands than can run at once
+            self.slots.acquire()
+            future = self.executor.submit(self._call, cmd, file_count)
+            future.add_done_callback(self._release_slot)
+
+    def _release_slot(self, future: 'Future[None]') -> None:
+        assert self.slots is not None
+        self.slots.release()
+
+    def _call(self, cmd: list[str], file_count: int) -> None:
+        try:
+            returncode = subprocess.call(cmd)
+        except OSError as err:
+            sys.stderr.write("{}: {}\n".format(cmd[0], err))
+            returncode = 127
+
+        if returncode != 0:
+            with self.lock:
+                self.failed += 1
+            if file_count == 1:
+                sys.stderr.write("{}: exited with status {}\n".format(shlex.join(cmd), returncode))
+            else:
+                sys.stderr.write("{}: exited with status {} for a batch of {} files\n".format(
+                    cmd[0], returncode, file_count))
+
     def finish(self) -> None:
-        if self.on_multi_cmd:
-            multi_cmd = replace_item(self.on_multi_cmd, "{}+", self.all_files)
-            subprocess.call(multi_cmd)
+        if self.on_multi_cmd and self.batch:
+            self._flush()
 
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
 
-class ExprSorterAction(Action):
+    def exit_status(self) -> int:
+        return 1 if self.failed else 0
 
-    def __init__(self, expr: str, reverse: bool, find_action: Action) -> None:
+
+# A file buffered by ExprSorterAction: (sort key, sequence number, file)
+SortRecord = Tuple[Any, int, FileEntry]
+
+
+def _read_run(fin: IO[bytes]) -> Iterator[SortRecord]:
+    fin.seek(0)
+    unpickler = pickle.Unpickler(fin)
+    while True:
+        try:
+            key, seq, root, name = unpickler.load()
+        except EOFError:
+            return
+        yield key, seq, FileEntry(root, name)
+
+
+class ExprSorterAction(Action):
+    """Sorts the files by 'expr' before passing them on to
+    'find_action'. With 'head' or 'tail' only that many files are
+    kept in memory. Otherwise sorted runs are spilled to temporary
+    files once the buffered files exceed 'memory_limit' bytes. The
+    runs are then merged in finish()."""
+
+    # Rough estimate of the memory used by a buffered file, in
+    # addition to the length of its path
+    RECORD_SIZE = 512
+
+    def __init__(self, expr: Optional[str], reverse: bool, find_action: Action,
+                 head: Optional[int] = None, tail: Optional[int] = None,
+                 memory_limit: int = 512 * 1000 * 1000) -> None:
         super().__init__()
+        assert head is None or tail is None
+
         self.expr = expr
         self.find_action = find_action
         self.reverse = reverse
+        self.head = head
+        self.tail = tail
+        self.memory_limit = memory_limit
+
+        self.code = compile(expr, "<sort>", "eval") if expr else None
 
-        self.files: list[Tuple[str, str]] = []
+        self.seq = 0
+        self.records: list[SortRecord] = []
+        self.records_size = 0
+        self.runs: list[IO[bytes]] = []
 
         self.ctx = Context()
         self.global_vars = globals().copy()
         self.global_vars.update(self.ctx.get_hash())
+        self.local_vars: Dict[str, Any] = {}
 
-    def file(self, root: str, filename: str) -> None:
-        self.files.append((root, filename))
+    def _record(self, entry: FileEntry) -> SortRecord:
+        seq = self.seq
+        self.seq += 1
 
-    def directory(self, root: str, filename: str) -> None:
+        if self.code is None:
+            return (seq, 0, entry)
+
+        self.ctx.current_entry = entry
+        local_vars = self.local_vars
+        local_vars['p'] = entry.path
+        local_vars['_'] = entry.name
+        key = eval(self.code, self.global_vars, local_vars)  # pylint: disable=W0123
+
+        # Files with the same key keep their order, also when reversed
+        return (key, -seq if self.reverse else seq, entry)
+
+    def file(self, entry: FileEntry) -> None:
+        self.records.append(self._record(entry))
+
+        if self.head is not None or self.tail is not None:
+            limit = self.head if self.head is not None else self.tail
+            assert limit is not None
+            if len(self.records) >= 2 * limit + 1024:
+                self._truncate()
+        else:
+            self.records_size += self.RECORD_SIZE + len(entry.path)
+            if self.records_size > self.memory_limit:
+                self._spill()
+
+    def directory(self, entry: FileEntry) -> None:
         pass
 
+    def _truncate(self) -> None:
+        self.records.sort(reverse=self.reverse)
+        if self.head is not None:
+            del self.records[self.head:]
+        elif self.tail is not None:
+            del self.records[:max(0, len(self.records) - self.tail)]
+
+    def _spill(self) -> None:
+        self.records.sort(reverse=self.reverse)
+
+        fout = tempfile.TemporaryFile(prefix="dt-find-sort-")
+        pickler = pickle.Pickler(fout, protocol=pickle.HIGHEST_PROTOCOL)
+        for key, seq, entry in self.records:
+            pickler.dump((key, seq, entry.root, entry.name))
+            pickler.clear_memo()
+        fout.flush()
+        self.runs.append(fout)
+
+        self.records = []
+        self.records_size = 0
+
     def finish(self) -> None:
-        files3: list[Tuple[str, str, str]] = []
-        if self.expr:
-            for root, filename in self.files:
-                fullpath = os.path.join(root, filename)
-                self.ctx.current_file = fullpath
-                local_vars = {
-                    'p': fullpath,
-                    '_': os.path.basename(filename)
-                }
-                key = eval(self.expr, self.global_vars, local_vars)  # pylint: disable=W0123
-
-                files3.append((key, root, filename))
-
-            files3 = sorted(files3, key=lambda x: x[0], reverse=self.reverse)
-            files = [(b, c) for _, b, c in files3]
+        if self.head is not None or self.tail is not None:
+            self._truncate()
         else:
-            if self.reverse:
-                files = list(reversed(self.files))
-            else:
-                files = self.files
+            self.records.sort(reverse=self.reverse)
+
+        records: Iterable[SortRecord]
+        if self.runs:
+            records = heapq.merge(*[_read_run(run) for run in self.runs], self.records,
+                                  reverse=self.reverse)
+        else:
+            records = self.records
+
+        for _, _, entry in records:
+            self.find_action.file(entry)
+
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.records = []
 
-        for root, filename in files:
-            self.find_action.file(root, filename)
         self.find_action.finish()
 
+    def exit_status(self) -> int:
+        return self.find_action.exit_status()
+
 
 # EOF #
@@ -0,0 +1,425 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import TYPE_CHECKING, IO, Dict, Optional, Sequence, Tuple
+
+import itertools
+import logging
+import operator
+import os
+import sqlite3
+import stat
+import threading
+from collections import OrderedDict
+
+import numpy
+import numpy.typing as npt
+
+from dirtoo.filter.content import ContentPattern, is_binary, open_content
+from dirtoo.find.file_index import FileIndex, _subtree_range
+
+if TYPE_CHECKING:
+    from dirtoo.filesystem.file_info import FileInfo
+
+logger = logging.getLogger(__name__)
+
+
+Trigrams = npt.NDArray[numpy.uint32]
+
+# (id, size, mtime, binary) of an indexed file
+IndexedFile = Tuple[int, int, float, bool]
+
+
+def trigrams(data: bytes) -> Trigrams:
+    """The distinct trigrams of 'data' with ASCII letters lowercased,
+    each packed into an int"""
+
+    arr = numpy.frombuffer(data.lower(), dtype=numpy.uint8)
+    if len(arr) < 3:
+        return numpy.zeros(0, dtype=numpy.uint32)
+
+    codes = (arr[:-2].astype(numpy.uint32) << 16) | (arr[1:-1].astype(numpy.uint32) << 8) | arr[2:]
+    return numpy.unique(codes)
+
+
+class ContentUpdateStats:
+
+    def __init__(self) -> None:
+        self.indexed = 0
+        self.binary = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.skipped = 0
+
+    def write(self, fout: IO[str]) -> None:
+        fout.write("indexed:   {}\n".format(self.indexed))
+        fout.write("binary:    {}\n".format(self.binary))
+        fout.write("unchanged: {}\n".format(self.unchanged))
+        fout.write("removed:   {}\n".format(self.removed))
+        fout.write("skipped:   {}\n".format(self.skipped))
+
+
+class ContentCandidates:
+    """The files of a ContentIndex that can contain a pattern. Files
+    that aren't in the index or changed since it was updated can
+    contain anything and have to be searched."""
+
+    def __init__(self, index: 'ContentIndex', ids: Sequence[int]) -> None:
+        self._index = index
+        self._ids = set(ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def may_match(self, fileinfo: 'FileInfo', skip_binary: bool) -> bool:
+        indexed = self._index.lookup(fileinfo.dirname()).get(fileinfo.basename())
+        if indexed is None:
+            return True
+
+        file_id, size, mtime, binary = indexed
+        if size != fileinfo.size() or mtime != fileinfo.mtime():
+            return True
+        elif binary:
+            return not skip_binary
+        else:
+            return file_id in self._ids
+
+
+class ContentIndex:
+    """Trigram index of the contents of the text files below a set of
+    root directories, stored alongside the FileIndex. Files are only
+    read again when their size or mtime changed.
+
+    Changed files get a new id and their trigrams are appended as a
+    new segment of posting lists, ids of removed files stay in the
+    posting lists until the segments are merged. They are harmless,
+    as lookups only go through the ids that are still in the index."""
+
+    # larger files aren't indexed and always searched
+    MAX_FILE_SIZE = 16 * 1024 * 1024
+
+    # number of (trigram, id) pairs collected before they are written
+    FLUSH_SIZE = 8 * 1024 * 1024
+
+    # segments are merged when there are more than this
+    MAX_SEGMENTS = 8
+
+    # directories whose files lookup() keeps around
+    LOOKUP_CACHE_SIZE = 64
+
+    @staticmethod
+    def default_filename() -> str:
+        return FileIndex.default_filename()
+
+    def __init__(self, filename: str) -> None:
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # lookups come from the threads of match_concurrently()
+        self._db = sqlite3.connect(filename, isolation_level=None, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._lookup_cache: OrderedDict[str, Dict[str, IndexedFile]] = OrderedDict()
+
+        self._pending: list[Tuple[int, Trigrams]] = []
+        self._pending_size = 0
+
+        self._init_db()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _init_db(self) -> None:
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS content_roots ("
+                         "path TEXT PRIMARY KEY)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS content_files ("
+                         "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                         "dir TEXT, "
+                         "name TEXT, "
+                         "size INTEGER, "
+                         "mtime REAL, "
+                         "binary INTEGER)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS content_postings ("
+                         "trigram INTEGER, "
+                         "segment INTEGER, "
+                         "ids BLOB, "
+                         "PRIMARY KEY (trigram, segment)) WITHOUT ROWID")
+        self._db.execute("CREATE INDEX IF NOT EXISTS content_files_dir ON content_files (dir)")
+
+    def roots(self) -> Sequence[str]:
+        with self._lock:
+            return [path for (path,) in self._db.execute("SELECT path FROM content_roots ORDER BY path")]
+
+    def root_for(self, directory: str) -> Optional[str]:
+        abspath = os.path.abspath(directory)
+        for root in self.roots():
+            if abspath == root or abspath.startswith(_subtree_range(root)[0]):
+                return root
+        return None
+
+    def file_count(self, directory: str) -> int:
+        abspath = os.path.abspath(directory)
+        lower, upper = _subtree_range(abspath)
+        with self._lock:
+            (count,) = self._db.execute("SELECT count(*) FROM content_files "
+                                        "WHERE dir = ? OR (dir >= ? AND dir < ?)",
+                                        (abspath, lower, upper)).fetchone()
+        return int(count)
+
+    def _delete_subtree(self, path: str) -> int:
+        lower, upper = _subtree_range(path)
+        return self._db.execute("DELETE FROM content_files WHERE dir = ? OR (dir >= ? AND dir < ?)",
+                                (path, lower, upper)).rowcount
+
+    def remove(self, directory: str) -> None:
+        abspath = os.path.abspath(directory)
+        with self._lock:
+            self._lookup_cache.clear()
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM content_roots WHERE path = ?", (abspath,))
+            if self.root_for(abspath) is None:
+                self._delete_subtree(abspath)
+            self._db.execute("COMMIT")
+
+    def update(self, directory: str, full: bool = False) -> ContentUpdateStats:
+        """Add the files below 'directory' to the index or bring them up to date"""
+
+        stats = ContentUpdateStats()
+        abspath = os.path.abspath(directory)
+
+        if not os.path.isdir(abspath):
+            logger.warning("ContentIndex: not a directory: %s", abspath)
+            self.remove(abspath)
+            return stats
+
+        root = self.root_for(abspath)
+        with self._lock:
+            self._lookup_cache.clear()
+            self._db.execute("BEGIN")
+            try:
+                if root is None:
+                    lower, upper = _subtree_range(abspath)
+                    self._db.execute("DELETE FROM content_roots WHERE path >= ? AND path < ?", (lower, upper))
+                    self._db.execute("INSERT INTO content_roots (path) VALUES (?)", (abspath,))
+
+                visited = set()
+                stack = [abspath]
+                while stack:
+                    path = stack.pop()
+                    visited.add(path)
+                    self._update_dir(path, full, stack, stats)
+
+                lower, upper = _subtree_range(abspath)
+                for (path,) in self._db.execute("SELECT DISTINCT dir FROM content_files "
+                                                "WHERE dir >= ? AND dir < ?", (lower, upper)).fetchall():
+                    if path not in visited:
+                        stats.removed += self._db.execute("DELETE FROM content_files WHERE dir = ?",
+                                                          (path,)).rowcount
+
+                self._flush()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._pending.clear()
+                self._pending_size = 0
+                self._db.execute("ROLLBACK")
+                raise
+
+            if self._segment_count() > ContentIndex.MAX_SEGMENTS:
+                self._merge_segments()
+
+        return stats
+
+    def _update_dir(self, path: str, full: bool, stack: list[str], stats: ContentUpdateStats) -> None:
+        old: Dict[str, Tuple[int, int, float]] = {
+            name: (file_id, size, mtime)
+            for file_id, name, size, mtime in self._db.execute(
+                "SELECT id, name, size, mtime FROM content_files WHERE dir = ?", (path,))}
+
+        try:
+            with os.scandir(path) as scandir_it:
+                entries = list(scandir_it)
+        except OSError as err:
+            logger.warning("ContentIndex: %s", err)
+            entries = []
+
+        seen = set()
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+
+                # symlinks aren't indexed, they are always searched
+                st = entry.stat(follow_symlinks=False)
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+            except OSError as err:
+                logger.warning("ContentIndex: %s", err)
+                continue
+
+            if st.st_size > ContentIndex.MAX_FILE_SIZE:
+                stats.skipped += 1
+                continue
+
+            seen.add(entry.name)
+            previous = old.get(entry.name)
+            if not full and previous is not None and previous[1:] == (st.st_size, st.st_mtime):
+                stats.unchanged += 1
+                continue
+
+            if previous is not None:
+                self._db.execute("DELETE FROM content_files WHERE id = ?", (previous[0],))
+            self._add_file(path, entry.name, st, stats)
+
+        for name, (file_id, _, _) in old.items():
+            if name not in seen:
+                self._db.execute("DELETE FROM content_files WHERE id = ?", (file_id,))
+                stats.removed += 1
+
+    def _add_file(self, directory: str, name: str, st: os.stat_result, stats: ContentUpdateStats) -> None:
+        try:
+            with open_content(os.path.join(directory, name), ContentIndex.MAX_FILE_SIZE) as data:
+                if data is None:
+                    stats.skipped += 1
+                    return
+                binary = is_binary(data)
+                codes = trigrams(bytes(data)) if not binary else None
+        except (OSError, ValueError) as err:
+            logger.warning("ContentIndex: %s", err)
+            stats.skipped += 1
+            return
+
+        cursor = self._db.execute("INSERT INTO content_files (dir, name, size, mtime, binary) "
+                                  "VALUES (?, ?, ?, ?, ?)",
+                                  (directory, name, st.st_size, st.st_mtime, binary))
+        assert cursor.lastrowid is not None
+
+        if codes is None:
+            stats.binary += 1
+        else:
+            stats.indexed += 1
+            self._pending.append((cursor.lastrowid, codes))
+            self._pending_size += len(codes)
+            if self._pending_size >= ContentIndex.FLUSH_SIZE:
+                self._flush()
+
+    def _flush(self) -> None:
+        """Write the trigrams of the pending files as a new segment"""
+
+        if not self._pending:
+            return
+
+        codes = numpy.concatenate([codes for _, codes in self._pending])
+        ids = numpy.concatenate([numpy.full(len(file_codes), file_id, dtype=numpy.uint32)
+                                 for file_id, file_codes in self._pending])
+        self._pending.clear()
+        self._pending_size = 0
+
+        # a stable sort keeps the ids of each trigram in ascending order
+        order = numpy.argsort(codes, kind="stable")
+        codes, ids = codes[order], ids[order]
+        unique, starts = numpy.unique(codes, return_index=True)
+        ends = numpy.append(starts[1:], len(codes))
+
+        (segment,) = self._db.execute("SELECT coalesce(max(segment), -1) + 1 FROM content_postings").fetchone()
+        self._db.executemany("INSERT INTO content_postings VALUES (?, ?, ?)",
+                             ((int(trigram), segment, ids[start:end].tobytes())
+                              for trigram, start, end in zip(unique.tolist(), starts.tolist(), ends.tolist())))
+
+    def _segment_count(self) -> int:
+        (count,) = self._db.execute("SELECT count(DISTINCT segment) FROM content_postings").fetchone()
+        return int(count)
+
+    def _merge_segments(self) -> None:
+        """Merge all segments into one, dropping the ids of files that
+        are no longer in the index"""
+
+        live = numpy.fromiter((file_id for (file_id,) in self._db.execute("SELECT id FROM content_files")),
+                              dtype=numpy.uint32)
+
+        self._db.execute("BEGIN")
+        try:
+            rows = self._db.execute("SELECT trigram, ids FROM content_postings ORDER BY trigram, segment")
+            merged = [(trigram, b"".join(blob for _, blob in group))
+                      for trigram, group in itertools.groupby(rows, key=operator.itemgetter(0))]
+
+            self._db.execute("DELETE FROM content_postings")
+            for trigram, blob in merged:
+                ids = numpy.frombuffer(blob, dtype=numpy.uint32)
+                ids = ids[numpy.isin(ids, live, assume_unique=True)]
+                if len(ids) > 0:
+                    self._db.execute("INSERT INTO content_postings VALUES (?, 0, ?)", (trigram, ids.tobytes()))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def _postings(self, trigram: int) -> npt.NDArray[numpy.uint32]:
+        blobs = [blob for (blob,) in self._db.execute(
+            "SELECT ids FROM content_postings WHERE trigram = ? ORDER BY segment", (trigram,))]
+        return numpy.frombuffer(b"".join(blobs), dtype=numpy.uint32)
+
+    def candidates(self, pattern: ContentPattern) -> Optional[ContentCandidates]:
+        """The files that contain all the trigrams 'pattern' requires,
+        None when the pattern doesn't require any"""
+
+        literals = [literal for literal in pattern.required_literals() if len(literal) >= 3]
+        if not literals:
+            return None
+
+        codes = numpy.unique(numpy.concatenate([trigrams(literal) for literal in literals]))
+
+        with self._lock:
+            # start with the rarest trigrams, so that the intersection
+            # stays small
+            sizes = {trigram: size for trigram, size in self._db.execute(
+                "SELECT trigram, sum(length(ids)) FROM content_postings "
+                f"WHERE trigram IN ({', '.join('?' * len(codes))}) GROUP BY trigram", codes.tolist())}
+
+            if len(sizes) < len(codes):
+                return ContentCandidates(self, [])
+
+            result: Optional[npt.NDArray[numpy.uint32]] = None
+            for trigram in sorted(sizes, key=lambda trigram: sizes[trigram]):
+                ids = self._postings(trigram)
+                result = ids if result is None else numpy.intersect1d(result, ids, assume_unique=True)
+                if len(result) == 0:
+                    break
+
+        assert result is not None
+        return ContentCandidates(self, result.tolist())
+
+    def lookup(self, directory: str) -> Dict[str, IndexedFile]:
+        """The indexed files in 'directory' by name"""
+
+        with self._lock:
+            files = self._lookup_cache.get(directory)
+            if files is None:
+                files = {name: (file_id, size, mtime, bool(binary))
+                         for file_id, name, size, mtime, binary in self._db.execute(
+                             "SELECT id, name, size, mtime, binary FROM content_files WHERE dir = ?",
+                             (directory,))}
+                self._lookup_cache[directory] = files
+                while len(self._lookup_cache) > ContentIndex.LOOKUP_CACHE_SIZE:
+                    self._lookup_cache.popitem(last=False)
+            else:
+                self._lookup_cache.move_to_end(directory)
+            return files
+
+
+# EOF #
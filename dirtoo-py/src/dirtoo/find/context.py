@@ -26,20 +26,39 @@ import pwd
 import grp
 import stat
 import datetime
+import functools
 import re
-import hashlib
 import ngram  # pylint: disable=E0401
 
 import bytefmt
 
-from dirtoo.fuzzy import fuzzy
-from dirtoo.find.util import replace_item, size_in_bytes, name_match
+from dirtoo.fuzzy import FuzzyNeedle
+from dirtoo.find.file_entry import FileEntry
+from dirtoo.find.util import replace_item, name_match
+from dirtoo.hash_cache import HashCache, default_hash_cache
+
+
+# the expression is evaluated once per file, mostly with the same text
+_fuzzy_needle = functools.lru_cache(maxsize=16)(FuzzyNeedle)
 
 
 class Context:  # pylint: disable=R0904,R0915
 
     def __init__(self) -> None:
-        self.current_file: Optional[str] = None
+        self.current_entry: Optional[FileEntry] = None
+
+        self._uid2owner: Dict[int, str] = {}
+        self._gid2group: Dict[int, str] = {}
+
+        self._hash_cache: Optional[HashCache] = None
+
+    @property
+    def current_file(self) -> Optional[str]:
+        return self.current_entry.path if self.current_entry is not None else None
+
+    def _lstat(self) -> os.stat_result:
+        assert self.current_entry is not None
+        return self.current_entry.lstat()
 
     def get_hash(self) -> Dict[str, Union[Callable[[], Any],
                                           Callable[[Any], Any]]]:
@@ -138,8 +157,8 @@ class Context:  # pylint: disable=R0904,R0915
         return random.random() < p
 
     def basename(self) -> str:
-        assert self.current_file is not None
-        return os.path.basename(self.current_file)
+        assert self.current_entry is not None
+        return self.current_entry.name
 
     def fullpath(self) -> str:
         assert self.current_file is not None
@@ -163,34 +182,24 @@ class Context:  # pylint: disable=R0904,R0915
         _, ext = os.path.splitext(self.current_file)
         return ext
 
-    def sha1(self) -> str:
-        assert self.current_file is not None
-
-        sha1 = hashlib.sha1()
-        with open(self.current_file, 'rb') as fin:
-            data = fin.read(65536)
-            while data:
-                sha1.update(data)
-                data = fin.read(65536)
+    def _hash(self, algorithm: str) -> str:
+        assert self.current_entry is not None
 
-        return sha1.hexdigest()
+        if self._hash_cache is None:
+            self._hash_cache = default_hash_cache()
 
-    def md5(self) -> str:
-        assert self.current_file is not None
+        # The cache has to be keyed by the symlink target, not the link
+        st = None if self.current_entry.is_symlink() else self.current_entry.lstat()
+        return self._hash_cache.get(self.current_entry.path, algorithm, st)
 
-        md5 = hashlib.md5()
-        with open(self.current_file, 'rb') as fin:
-            data = fin.read(65536)
-            while data:
-                md5.update(data)
-                data = fin.read(65536)
+    def sha1(self) -> str:
+        return self._hash("sha1")
 
-        return md5.hexdigest()
+    def md5(self) -> str:
+        return self._hash("md5")
 
     def age(self) -> float:
-        assert self.current_file is not None
-
-        a = os.path.getmtime(self.current_file)
+        a = self.mtime()
         b = time.time()
         return b - a
 
@@ -260,9 +269,7 @@ class Context:  # pylint: disable=R0904,R0915
         return sec / 60 / 60 / 24 / 7 / 30.4368 / 12
 
     def daysago(self) -> float:
-        assert self.current_file is not None
-
-        a = os.path.getmtime(self.current_file)
+        a = self.mtime()
         b = time.time()
         return (b - a) / (60 * 60 * 24)
 
@@ -275,8 +282,7 @@ class Context:  # pylint: disable=R0904,R0915
         return cast(str, bytefmt.humanize(s, style=style, compact=compact))  # Why does this fail?
 
     def size(self) -> int:
-        assert self.current_file is not None
-        return size_in_bytes(self.current_file)
+        return self._lstat().st_size
 
     def name(self, glob: str) -> bool:
         assert self.current_file is not None
@@ -302,9 +308,8 @@ class Context:  # pylint: disable=R0904,R0915
 
     def fuzzy(self, text: str, threshold: float = 0.5, n: int = 3) -> bool:
         assert self.current_file is not None
-        neddle = text.lower()
         haystack = os.path.basename(self.current_file).lower()
-        return fuzzy(neddle, haystack, n=n) >= threshold
+        return _fuzzy_needle(text.lower(), n).score(haystack) >= threshold
 
     def ascii(self) -> bool:
         assert self.current_file is not None
@@ -316,64 +321,62 @@ class Context:  # pylint: disable=R0904,R0915
         return True
 
     def atime(self) -> float:
-        assert self.current_file is not None
-        return os.lstat(self.current_file).st_atime
+        return self._lstat().st_atime
 
     def ctime(self) -> float:
-        assert self.current_file is not None
-        return os.lstat(self.current_file).st_ctime
+        return self._lstat().st_ctime
 
     def mtime(self) -> float:
-        assert self.current_file is not None
-        return os.lstat(self.current_file).st_mtime
+        return self._lstat().st_mtime
 
     def uid(self) -> int:
-        assert self.current_file is not None
-        return os.lstat(self.current_file).st_uid
+        return self._lstat().st_uid
 
     def gid(self) -> int:
-        assert self.current_file is not None
-        return os.lstat(self.current_file).st_gid
+        return self._lstat().st_gid
 
     def owner(self) -> str:
-        assert self.current_file is not None
-        return pwd.getpwuid(os.lstat(self.current_file).st_uid).pw_name
+        uid = self._lstat().st_uid
+        owner = self._uid2owner.get(uid)
+        if owner is None:
+            owner = pwd.getpwuid(uid).pw_name
+            self._uid2owner[uid] = owner
+        return owner
 
     def group(self) -> str:
-        assert self.current_file is not None
-        return grp.getgrgid(os.lstat(self.current_file).st_gid).gr_name
+        gid = self._lstat().st_gid
+        group = self._gid2group.get(gid)
+        if group is None:
+            group = grp.getgrgid(gid).gr_name
+            self._gid2group[gid] = group
+        return group
 
     def isblk(self) -> bool:
-        assert self.current_file is not None
-        return stat.S_ISBLK(os.lstat(self.current_file).st_mode)
+        return stat.S_ISBLK(self._lstat().st_mode)
 
     def islnk(self) -> bool:
-        assert self.current_file is not None
-        return stat.S_ISLNK(os.lstat(self.current_file).st_mode)
+        assert self.current_entry is not None
+        return self.current_entry.is_symlink()
 
     def isdir(self) -> bool:
-        assert self.current_file is not None
-        return stat.S_ISDIR(os.lstat(self.current_file).st_mode)
+        assert self.current_entry is not None
+        return self.current_entry.is_dir(follow_symlinks=False)
 
     def ischr(self) -> bool:
-        assert self.current_file is not None
-        return stat.S_ISCHR(os.lstat(self.current_file).st_mode)
+        return stat.S_ISCHR(self._lstat().st_mode)
 
     def isfifo(self) -> bool:
-        assert self.current_file is not None
-        return stat.S_ISFIFO(os.lstat(self.current_file).st_mode)
+        return stat.S_ISFIFO(self._lstat().st_mode)
 
     def isreg(self) -> bool:
-        assert self.current_file is not None
-        return stat.S_ISREG(os.lstat(self.current_file).st_mode)
+        assert self.current_entry is not None
+        return self.current_entry.is_file()
 
     def mode(self) -> int:
-        assert self.current_file is not None
-        return stat.S_IMODE(os.lstat(self.current_file).st_mode)
+        return stat.S_IMODE(self._lstat().st_mode)
 
     def modehr(self) -> str:  # pylint: disable=R0912
-        assert self.current_file is not None
-        mode = os.lstat(self.current_file).st_mode
+        mode = self._lstat().st_mode
 
         s = ""
 
@@ -441,8 +444,7 @@ class Context:  # pylint: disable=R0904,R0915
         return s
 
     def ino(self) -> int:
-        assert self.current_file is not None
-        return os.lstat(self.current_file).st_ino
+        return self._lstat().st_ino
 
     def kB(self, s: int) -> int:  # noqa: N802
         return s * 1000
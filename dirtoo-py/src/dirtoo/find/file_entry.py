@@ -0,0 +1,135 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import IO, Optional, Union
+
+import os
+import stat
+
+
+class SyscallStats:
+    """Counts the filesystem calls done by find_files()"""
+
+    def __init__(self) -> None:
+        self.scandir = 0
+        self.lstat = 0
+        self.stat = 0
+        self.access = 0
+
+        # directories skipped by a prune expression or ignore file,
+        # not a syscall, but each one saves at least a scandir()
+        self.pruned = 0
+
+    def total(self) -> int:
+        return self.scandir + self.lstat + self.stat + self.access
+
+    def write(self, fout: IO[str]) -> None:
+        fout.write("scandir: {}\n".format(self.scandir))
+        fout.write("lstat:   {}\n".format(self.lstat))
+        fout.write("stat:    {}\n".format(self.stat))
+        fout.write("access:  {}\n".format(self.access))
+        fout.write("total:   {}\n".format(self.total()))
+        fout.write("pruned:  {}\n".format(self.pruned))
+
+
+class FileEntry:
+    """A single file as produced by the walker. It carries the
+    os.DirEntry along so that the file type can be answered from the
+    directory entry alone and memoizes the lstat() result, so that
+    filter, sorter and action don't stat the same file repeatedly."""
+
+    @staticmethod
+    def from_path(path: str, stats: Optional[SyscallStats] = None) -> 'FileEntry':
+        root, name = os.path.split(path)
+        return FileEntry(root, name, stats=stats)
+
+    def __init__(self, root: str, name: str,
+                 entry: Union['os.DirEntry[str]', 'os.DirEntry[bytes]', None] = None,
+                 stats: Optional[SyscallStats] = None,
+                 cwd: Optional[str] = None,
+                 lstat: Optional[os.stat_result] = None) -> None:
+        self.root = root
+        self.name = name
+        # entries from a bytes walk are only used for their stat data
+        self.path = entry.path if entry is not None and type(entry.path) is str else os.path.join(root, name)
+
+        self._entry = entry
+        self._stats = stats
+        self._cwd = cwd
+
+        self._lstat: Optional[os.stat_result] = lstat
+        self._isdir: Optional[bool] = None
+        self._access: Optional[bool] = None
+
+    def abspath(self) -> str:
+        if self._cwd is None:
+            return os.path.abspath(self.path)
+        else:
+            # same as os.path.abspath(), but without a getcwd() per file
+            return os.path.normpath(os.path.join(self._cwd, self.path))
+
+    def lstat(self) -> os.stat_result:
+        if self._lstat is None:
+            if self._stats is not None:
+                self._stats.lstat += 1
+
+            if self._entry is not None:
+                self._lstat = self._entry.stat(follow_symlinks=False)
+            else:
+                self._lstat = os.lstat(self.path)
+        return self._lstat
+
+    def is_symlink(self) -> bool:
+        if self._entry is not None:
+            return self._entry.is_symlink()
+        else:
+            return stat.S_ISLNK(self.lstat().st_mode)
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        if not self.is_symlink():
+            if self._entry is not None:
+                return self._entry.is_dir(follow_symlinks=False)
+            else:
+                return stat.S_ISDIR(self.lstat().st_mode)
+        elif not follow_symlinks:
+            return False
+        else:
+            if self._isdir is None:
+                if self._stats is not None:
+                    self._stats.stat += 1
+                self._isdir = os.path.isdir(self.path)
+            return self._isdir
+
+    def is_file(self) -> bool:
+        """True if the entry is a regular file, symlinks are not followed"""
+        if self._entry is not None:
+            return self._entry.is_file(follow_symlinks=False)
+        else:
+            return stat.S_ISREG(self.lstat().st_mode)
+
+    def access(self) -> bool:
+        if self._access is None:
+            if self._stats is not None:
+                self._stats.access += 1
+            self._access = os.access(self.path, os.R_OK)
+        return self._access
+
+    def __str__(self) -> str:
+        return "FileEntry({})".format(self.path)
+
+
+# EOF #
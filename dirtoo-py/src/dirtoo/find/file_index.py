@@ -0,0 +1,480 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import IO, Any, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+import functools
+import logging
+import math
+import operator
+import os
+import re
+import sqlite3
+
+import xdg.BaseDirectory
+
+from dirtoo.filter.local_time import local_seconds, local_weekday
+from dirtoo.filter.match_func import (
+    MatchFunc,
+    TrueMatchFunc,
+    FalseMatchFunc,
+    AndMatchFunc,
+    OrMatchFunc,
+    ExcludeMatchFunc,
+    FuzzyMatchFunc,
+    GlobMatchFunc,
+    MultiGlobMatchFunc,
+    RegexMatchFunc,
+    SizeMatchFunc,
+    LengthMatchFunc,
+    DateOpMatchFunc,
+    TimeOpMatchFunc,
+    WeekdayMatchFunc,
+)
+from dirtoo.find.file_entry import FileEntry, SyscallStats
+
+logger = logging.getLogger(__name__)
+
+
+OP2SQL = {
+    operator.lt: "<",
+    operator.le: "<=",
+    operator.gt: ">",
+    operator.ge: ">=",
+    operator.eq: "=",
+}
+
+
+class SqlPredicate(NamedTuple):
+    """A SQL WHERE clause over the 'files' table. When 'exact' is
+    false the clause only narrows down the candidates and the
+    MatchFunc still has to be evaluated on the results."""
+
+    where: str
+    params: Tuple[Any, ...]
+    exact: bool
+
+
+def _glob_to_sql(pattern: str) -> Optional[str]:
+    """Convert a fnmatch pattern into a SQLite GLOB pattern"""
+
+    result = ""
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c != "[":
+            result += c
+        else:
+            # find the end of the set the same way as fnmatch.translate()
+            j = i
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+
+            if j >= n:
+                result += "[[]"
+            else:
+                stuff = pattern[i:j]
+                if stuff.startswith("!"):
+                    stuff = "^" + stuff[1:]
+                elif stuff.startswith("^") or "\\" in stuff:
+                    # fnmatch treats those literally, GLOB doesn't
+                    return None
+                result += "[" + stuff + "]"
+                i = j + 1
+    return result
+
+
+def to_sql(func: MatchFunc) -> Optional[SqlPredicate]:
+    """Translate 'func' into a SQL predicate, returns None when no
+    part of it can be expressed in SQL"""
+
+    if isinstance(func, TrueMatchFunc):
+        return SqlPredicate("1", (), True)
+    elif isinstance(func, FalseMatchFunc):
+        return SqlPredicate("0", (), True)
+    elif isinstance(func, GlobMatchFunc):
+        pattern = _glob_to_sql(func.pattern)
+        if pattern is None:
+            return None
+        column = "name" if func.case_sensitive else "lname"
+        return SqlPredicate(f"{column} GLOB ?", (pattern,), True)
+    elif isinstance(func, MultiGlobMatchFunc):
+        return to_sql(OrMatchFunc(func.children(), adaptive=False))
+    elif isinstance(func, RegexMatchFunc):
+        return SqlPredicate("dt_regex(?, ?, name)", (func.rx.pattern, func.rx.flags), True)
+    elif isinstance(func, FuzzyMatchFunc):
+        ngrams = sorted(func.fuzzy_needle.ngrams)
+        if not ngrams:
+            return None
+        # same as FuzzyNeedle.score(), an n-gram of the needle is an
+        # n-gram of the name when it is a substring of it
+        matches = " + ".join(["(instr(name, ?) > 0)"] * len(ngrams))
+        return SqlPredicate(f"CAST({matches} AS REAL) / ? > ?",
+                            (*ngrams, len(ngrams), func.threshold), True)
+    elif isinstance(func, (SizeMatchFunc, LengthMatchFunc)) and func.compare not in OP2SQL:
+        return None
+    elif isinstance(func, SizeMatchFunc):
+        return SqlPredicate(f"size {OP2SQL[func.compare]} ?", (func.size,), True)
+    elif isinstance(func, LengthMatchFunc):
+        return SqlPredicate(f"length(name) {OP2SQL[func.compare]} ?", (func.length,), True)
+    elif isinstance(func, DateOpMatchFunc):
+        if func.lower == -math.inf:
+            return SqlPredicate("mtime < ?", (func.upper,), True)
+        elif func.upper == math.inf:
+            return SqlPredicate("mtime >= ?", (func.lower,), True)
+        else:
+            return SqlPredicate("mtime >= ? AND mtime < ?", (func.lower, func.upper), True)
+    elif isinstance(func, TimeOpMatchFunc):
+        return SqlPredicate("dt_local_seconds(mtime) >= ? AND dt_local_seconds(mtime) < ?",
+                            (func.lower, func.upper), True)
+    elif isinstance(func, WeekdayMatchFunc):
+        weekdays = [weekday for weekday, match in enumerate(func.weekdays) if match]
+        return SqlPredicate(f"dt_local_weekday(mtime) IN ({', '.join('?' * len(weekdays))})",
+                            tuple(weekdays), True)
+    elif isinstance(func, ExcludeMatchFunc):
+        child = to_sql(func.children()[0])
+        if child is None or not child.exact:
+            return None
+        return SqlPredicate(f"NOT ({child.where})", child.params, True)
+    elif isinstance(func, AndMatchFunc):
+        # Any subset of the children narrows the result down
+        children = [to_sql(child) for child in func.children()]
+        pushed = [child for child in children if child is not None]
+        if not pushed:
+            return None
+        return SqlPredicate(" AND ".join(f"({child.where})" for child in pushed),
+                            sum((child.params for child in pushed), ()),
+                            len(pushed) == len(children) and all(child.exact for child in pushed))
+    elif isinstance(func, OrMatchFunc):
+        # Every child is needed, otherwise matches would get lost
+        pushed = []
+        for func_child in func.children():
+            child = to_sql(func_child)
+            if child is None:
+                return None
+            pushed.append(child)
+        if not pushed:
+            return SqlPredicate("0", (), True)
+        return SqlPredicate(" OR ".join(f"({child.where})" for child in pushed),
+                            sum((child.params for child in pushed), ()),
+                            all(child.exact for child in pushed))
+    else:
+        return None
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_regex(pattern: str, flags: int) -> 're.Pattern[str]':
+    return re.compile(pattern, flags)
+
+
+def _sql_regex(pattern: str, flags: int, text: str) -> bool:
+    return bool(_compile_regex(pattern, flags).search(text))
+
+
+def _subtree_range(path: str) -> Tuple[str, str]:
+    """Bounds for 'lower <= dirs.path < upper' matching everything below 'path'"""
+    prefix = path if path.endswith("/") else path + "/"
+    return prefix, prefix[:-1] + "0"
+
+
+class IndexUpdateStats:
+
+    def __init__(self) -> None:
+        self.dirs_scanned = 0
+        self.dirs_unchanged = 0
+        self.dirs_removed = 0
+        self.files = 0
+
+    def write(self, fout: IO[str]) -> None:
+        fout.write("scanned:   {}\n".format(self.dirs_scanned))
+        fout.write("unchanged: {}\n".format(self.dirs_unchanged))
+        fout.write("removed:   {}\n".format(self.dirs_removed))
+        fout.write("files:     {}\n".format(self.files))
+
+
+class IndexQuery:
+    """The files below a directory that match the pushed down part of
+    a filter. When 'exact' is true all of the filter was handled by
+    the index and the results don't need to be filtered again."""
+
+    def __init__(self, cursor: sqlite3.Cursor, directory: str, abspath: str,
+                 maxdepth: Optional[int], exact: bool,
+                 stats: Optional[SyscallStats], cwd: Optional[str]) -> None:
+        self._cursor = cursor
+        self._directory = directory
+        self._abspath = abspath
+        self._maxdepth = maxdepth
+        self._stats = stats
+        self._cwd = cwd
+        self.exact = exact
+
+    def __iter__(self) -> Iterator[FileEntry]:
+        prefix_len = len(self._abspath)
+        for (path, name, mode, ino, dev, nlink, uid, gid, size,
+             atime, mtime, ctime) in self._cursor:
+            # Rebuild the root the same way walk() would have produced it
+            rel = path[prefix_len:].lstrip("/")
+            root = os.path.join(self._directory, rel) if rel else self._directory
+
+            if self._maxdepth is not None:
+                depth = rel.count("/") + 2 if rel else 1
+                if depth > self._maxdepth:
+                    continue
+
+            st = os.stat_result((mode, ino, dev, nlink, uid, gid, size, int(atime), int(mtime), int(ctime)),
+                                {"st_atime": atime, "st_mtime": mtime, "st_ctime": ctime})
+            yield FileEntry(root, name, stats=self._stats, cwd=self._cwd, lstat=st)
+
+
+class FileIndex:
+    """Persistent SQLite index of the non-directory entries and their
+    lstat() data below a set of root directories. update() only
+    rescans directories whose mtime changed, modifications of a file
+    that don't touch its directory are thus only picked up with
+    'full=True'."""
+
+    @staticmethod
+    def default_filename() -> str:
+        return os.path.join(xdg.BaseDirectory.xdg_cache_home, "dirtoo", "index.sqlite")
+
+    @staticmethod
+    def open_default() -> Optional['FileIndex']:
+        """Open the default index, or return None when none was built yet"""
+        filename = FileIndex.default_filename()
+        if os.path.exists(filename):
+            return FileIndex(filename)
+        else:
+            return None
+
+    def __init__(self, filename: str) -> None:
+        self._db_filename = filename
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(self._db_filename, isolation_level=None)
+        self._db.create_function("dt_regex", 3, _sql_regex, deterministic=True)
+        self._db.create_function("dt_local_seconds", 1, local_seconds)
+        self._db.create_function("dt_local_weekday", 1, local_weekday)
+        self._init_db()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _init_db(self) -> None:
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS roots ("
+                         "path TEXT PRIMARY KEY)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS dirs ("
+                         "id INTEGER PRIMARY KEY, "
+                         "parent_id INTEGER, "
+                         "path TEXT UNIQUE, "
+                         "mtime_ns INTEGER)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS files ("
+                         "dir_id INTEGER, "
+                         "name TEXT, "
+                         "lname TEXT, "
+                         "mode INTEGER, ino INTEGER, dev INTEGER, nlink INTEGER, "
+                         "uid INTEGER, gid INTEGER, size INTEGER, "
+                         "atime REAL, mtime REAL, ctime REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS dirs_parent_id ON dirs (parent_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_dir_id ON files (dir_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_size ON files (size)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_mtime ON files (mtime)")
+
+    def roots(self) -> Sequence[str]:
+        return [path for (path,) in self._db.execute("SELECT path FROM roots ORDER BY path")]
+
+    def root_for(self, directory: str) -> Optional[str]:
+        """The indexed root containing 'directory', if any"""
+        abspath = os.path.abspath(directory)
+        for root in self.roots():
+            if abspath == root or abspath.startswith(_subtree_range(root)[0]):
+                return root
+        return None
+
+    def covers(self, directory: str) -> bool:
+        return self.root_for(directory) is not None
+
+    def file_count(self, directory: str) -> int:
+        abspath = os.path.abspath(directory)
+        lower, upper = _subtree_range(abspath)
+        (count,) = self._db.execute("SELECT count(*) FROM files JOIN dirs ON files.dir_id = dirs.id "
+                                    "WHERE dirs.path = ? OR (dirs.path >= ? AND dirs.path < ?)",
+                                    (abspath, lower, upper)).fetchone()
+        return int(count)
+
+    def _delete_subtree(self, path: str) -> int:
+        lower, upper = _subtree_range(path)
+        where = "path = ? OR (path >= ? AND path < ?)"
+        self._db.execute(f"DELETE FROM files WHERE dir_id IN (SELECT id FROM dirs WHERE {where})",
+                         (path, lower, upper))
+        return self._db.execute(f"DELETE FROM dirs WHERE {where}", (path, lower, upper)).rowcount
+
+    def remove(self, directory: str) -> None:
+        abspath = os.path.abspath(directory)
+        self._db.execute("BEGIN")
+        self._db.execute("DELETE FROM roots WHERE path = ?", (abspath,))
+        if self.root_for(abspath) is None:
+            self._delete_subtree(abspath)
+        self._db.execute("COMMIT")
+
+    def _get_dir(self, path: str, parent_id: Optional[int]) -> int:
+        row = self._db.execute("SELECT id FROM dirs WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            self._db.execute("UPDATE dirs SET parent_id = ? WHERE id = ?", (parent_id, row[0]))
+            return int(row[0])
+        else:
+            cursor = self._db.execute("INSERT INTO dirs (parent_id, path, mtime_ns) VALUES (?, ?, 0)",
+                                      (parent_id, path))
+            assert cursor.lastrowid is not None
+            return cursor.lastrowid
+
+    def update(self, directory: str, full: bool = False) -> IndexUpdateStats:
+        """Add 'directory' to the index or bring it up to date"""
+
+        stats = IndexUpdateStats()
+        abspath = os.path.abspath(directory)
+
+        if not os.path.isdir(abspath):
+            logger.warning("FileIndex: not a directory: %s", abspath)
+            self.remove(abspath)
+            return stats
+
+        self._db.execute("BEGIN")
+        try:
+            root = self.root_for(abspath)
+            if root is None:
+                # directories that were roots before become part of this one
+                lower, upper = _subtree_range(abspath)
+                self._db.execute("DELETE FROM roots WHERE path >= ? AND path < ?", (lower, upper))
+                self._db.execute("INSERT INTO roots (path) VALUES (?)", (abspath,))
+                parent_id = None
+            else:
+                row = self._db.execute("SELECT parent_id FROM dirs WHERE path = ?", (abspath,)).fetchone()
+                parent_id = row[0] if row is not None else None
+
+            stack = [(self._get_dir(abspath, parent_id), abspath)]
+            while stack:
+                dir_id, path = stack.pop()
+                self._update_dir(dir_id, path, full, stack, stats)
+
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+        return stats
+
+    def _update_dir(self, dir_id: int, path: str, full: bool,
+                    stack: list[Tuple[int, str]], stats: IndexUpdateStats) -> None:
+        try:
+            # stat() before scandir(), so that changes happening
+            # during the scan get picked up by the next update
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError as err:
+            logger.warning("FileIndex: %s", err)
+            stats.dirs_removed += self._delete_subtree(path)
+            return
+
+        (old_mtime_ns,) = self._db.execute("SELECT mtime_ns FROM dirs WHERE id = ?", (dir_id,)).fetchone()
+        if not full and old_mtime_ns == mtime_ns:
+            stats.dirs_unchanged += 1
+            stack.extend(self._db.execute("SELECT id, path FROM dirs WHERE parent_id = ?", (dir_id,)))
+            return
+
+        try:
+            with os.scandir(path) as scandir_it:
+                entries = list(scandir_it)
+        except OSError as err:
+            logger.warning("FileIndex: %s", err)
+            stats.dirs_removed += self._delete_subtree(path)
+            return
+
+        stats.dirs_scanned += 1
+
+        dirnames: list[str] = []
+        rows: list[Tuple[Any, ...]] = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                st = entry.stat(follow_symlinks=False)
+            except OSError as err:
+                logger.warning("FileIndex: %s", err)
+                continue
+
+            try:
+                entry.name.encode("utf-8")
+            except UnicodeEncodeError:
+                logger.warning("FileIndex: skipping undecodable filename: %r", entry.path)
+                continue
+
+            if is_dir:
+                dirnames.append(entry.name)
+            else:
+                rows.append((dir_id, entry.name, entry.name.lower(),
+                             st.st_mode, st.st_ino, st.st_dev, st.st_nlink, st.st_uid, st.st_gid, st.st_size,
+                             st.st_atime, st.st_mtime, st.st_ctime))
+
+        self._db.execute("DELETE FROM files WHERE dir_id = ?", (dir_id,))
+        self._db.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        stats.files += len(rows)
+
+        new_dirs = {os.path.join(path, dirname) for dirname in dirnames}
+        for old_id, old_path in self._db.execute("SELECT id, path FROM dirs WHERE parent_id = ?",
+                                                 (dir_id,)).fetchall():
+            if old_path not in new_dirs:
+                stats.dirs_removed += self._delete_subtree(old_path)
+
+        for subdir in sorted(new_dirs, reverse=True):
+            stack.append((self._get_dir(subdir, dir_id), subdir))
+
+        self._db.execute("UPDATE dirs SET mtime_ns = ? WHERE id = ?", (mtime_ns, dir_id))
+
+    def query(self, directory: str, func: Optional[MatchFunc] = None,
+              maxdepth: Optional[int] = None,
+              stats: Optional[SyscallStats] = None,
+              cwd: Optional[str] = None) -> IndexQuery:
+        """Look up the files below 'directory', with as much of 'func'
+        as possible evaluated by SQLite"""
+
+        abspath = os.path.abspath(directory)
+        lower, upper = _subtree_range(abspath)
+
+        predicate = to_sql(func) if func is not None else None
+        where = "(dirs.path = ? OR (dirs.path >= ? AND dirs.path < ?))"
+        params: Tuple[Any, ...] = (abspath, lower, upper)
+        if predicate is not None:
+            where += f" AND ({predicate.where})"
+            params += predicate.params
+
+        cursor = self._db.execute("SELECT dirs.path, name, mode, ino, dev, nlink, uid, gid, size, "
+                                  "atime, mtime, ctime "
+                                  "FROM files JOIN dirs ON files.dir_id = dirs.id "
+                                  f"WHERE {where}", params)
+
+        return IndexQuery(cursor, directory, abspath, maxdepth,
+                          predicate is not None and predicate.exact,
+                          stats, cwd)
+
+
+# EOF #
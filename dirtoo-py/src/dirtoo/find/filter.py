@@ -15,13 +15,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import cast, Dict, Callable
+from typing import cast, Dict, Callable, Optional
 from abc import ABC, abstractmethod
 
-import os
-
 from dirtoo.find.context import Context
+from dirtoo.find.file_entry import FileEntry
 from dirtoo.filter.filter_expr_parser import FilterExprParser
+from dirtoo.filter.match_func import COST_METADATA, BytesNameFunc, MatchFunc, TrueMatchFunc, explain
+from dirtoo.filter.match_func_compiler import CompiledMatchFunc, compile_match_func
 from dirtoo.filesystem.lazy_file_info import LazyFileInfo
 from dirtoo.filesystem.file_info import FileInfo
 
@@ -29,56 +30,123 @@ from dirtoo.filesystem.file_info import FileInfo
 class Filter(ABC):
 
     @abstractmethod
-    def match_file(self, root: str, filename: str) -> bool:
+    def match_file(self, entry: FileEntry) -> bool:
         pass
 
+    def match_func(self) -> Optional[MatchFunc]:
+        """The MatchFunc equivalent of this filter, if there is one,
+        used to push the filter down into a FileIndex query"""
+        return None
+
+    def prune_func(self) -> Optional[Callable[[FileEntry], bool]]:
+        """Returns a function telling which directories the walk
+        shouldn't descend into, if the filter has any"""
+        return None
+
+    def reads_content(self) -> bool:
+        """True if the filter reads the contents or the metadata of the
+        files, in which case it is worth evaluating it in multiple
+        threads"""
+        return False
+
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        """Returns a function matching the undecoded basename, if that
+        alone decides the filter, used by the bytes mode of find_files()"""
+        return None
+
 
 class NoFilter(Filter):
 
     def __init__(self) -> None:
         pass
 
-    def match_file(self, root: str, filename: str) -> bool:
+    def match_file(self, entry: FileEntry) -> bool:
         return True
 
+    def match_func(self) -> Optional[MatchFunc]:
+        return TrueMatchFunc()
+
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        return lambda name: True
+
 
 class ExprFilter(Filter):
 
     def __init__(self, expr: str) -> None:
         self.expr = expr
+        self.code = compile(expr, "<filter>", "eval")
         self.local_vars: Dict[str, str] = {}
         self.ctx = Context()
         self.global_vars = globals().copy()
         self.global_vars.update(self.ctx.get_hash())
 
-    def match_file(self, root: str, filename: str) -> bool:
-        fullpath = os.path.join(root, filename)
-
-        self.ctx.current_file = fullpath
-        local_vars = {
-            'p': fullpath,
-            '_': filename
-        }
-        result = eval(self.expr, self.global_vars, local_vars)  # pylint: disable=W0123
+    def match_file(self, entry: FileEntry) -> bool:
+        self.ctx.current_entry = entry
+        self.local_vars['p'] = entry.path
+        self.local_vars['_'] = entry.name
+        result = eval(self.code, self.global_vars, self.local_vars)  # pylint: disable=W0123
         return bool(result)
 
 
 class SimpleFilter(Filter):
 
     @staticmethod
-    def from_string(text: str) -> 'SimpleFilter':
+    def from_string(text: str, compiled: bool = True) -> 'SimpleFilter':
         parser = FilterExprParser()
-        filter_expr = parser.parse(text)
-        return SimpleFilter(filter_expr)
+        filter_expr, prune_expr = parser.parse_with_prune(text)
+        return SimpleFilter(filter_expr, prune_expr, compiled=compiled)
+
+    def __init__(self, expr: Callable[[FileInfo], bool],
+                 prune: Optional[Callable[[FileInfo], bool]] = None,
+                 compiled: bool = True) -> None:
+        """With 'compiled' MatchFunc trees are turned into a single
+        function after their warm-up, which is faster, explain()
+        shows the order they were compiled in"""
 
-    def __init__(self, expr: Callable[[FileInfo], bool]) -> None:
         self._expr = expr
+        self._prune = prune
+
+        # CompiledMatchFunc.function changes after the warm-up, so
+        # it's looked up for each call
+        self._compiled_expr: Optional[CompiledMatchFunc] = None
+        self._compiled_prune: Optional[CompiledMatchFunc] = None
+        if compiled and isinstance(expr, MatchFunc):
+            self._compiled_expr = compile_match_func(expr)
+        if compiled and isinstance(prune, MatchFunc):
+            self._compiled_prune = compile_match_func(prune)
+
+    def explain(self) -> str:
+        if isinstance(self._expr, MatchFunc):
+            return explain(self._expr)
+        else:
+            return repr(self._expr) + "\n"
+
+    def match_func(self) -> Optional[MatchFunc]:
+        return self._expr if isinstance(self._expr, MatchFunc) else None
+
+    def match_file(self, entry: FileEntry) -> bool:
+        fileinfo = LazyFileInfo.from_file_entry(entry)
+        if self._compiled_expr is not None:
+            return bool(self._compiled_expr.function(cast(FileInfo, fileinfo)))
+        return bool(self._expr(cast(FileInfo, fileinfo)))
 
-    def match_file(self, root: str, filename: str) -> bool:
-        path = os.path.join(root, filename)
+    def prune_func(self) -> Optional[Callable[[FileEntry], bool]]:
+        return self.prune_dir if self._prune is not None else None
 
-        fileinfo = LazyFileInfo.from_path(path)
-        return bool(self._expr(cast(FileInfo, fileinfo)))
+    def reads_content(self) -> bool:
+        return isinstance(self._expr, MatchFunc) and self._expr.cost() >= COST_METADATA
+
+    def bytes_name_func(self) -> Optional[BytesNameFunc]:
+        return self._expr.bytes_name_func() if isinstance(self._expr, MatchFunc) else None
+
+    def prune_dir(self, entry: FileEntry) -> bool:
+        if self._prune is None:
+            return False
+
+        fileinfo = LazyFileInfo.from_file_entry(entry)
+        if self._compiled_prune is not None:
+            return bool(self._compiled_prune.function(cast(FileInfo, fileinfo)))
+        return bool(self._prune(cast(FileInfo, fileinfo)))
 
 
 # EOF #
@@ -0,0 +1,234 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+
+def translate_pattern(pattern: str) -> str:
+    """Translate a .gitignore glob into a regex, '*' and '?' don't
+    match '/' while '**' matches across directories"""
+
+    result = ""
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            result += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            result += "/.*"
+            i += 3
+        elif pattern.startswith("**", i):
+            result += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            result += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            result += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                result += "\\["
+                i += 1
+            else:
+                stuff = pattern[i + 1:j].replace("\\", "\\\\")
+                if stuff[0] in "!^":
+                    stuff = "^" + stuff[1:]
+                result += "[" + stuff + "]"
+                i = j + 1
+        elif pattern[i] == "\\" and i + 1 < n:
+            result += re.escape(pattern[i + 1])
+            i += 2
+        else:
+            result += re.escape(pattern[i])
+            i += 1
+    return result
+
+
+class IgnoreRule(NamedTuple):
+
+    regex: str
+    negate: bool
+    dir_only: bool
+
+    # anchored rules match the path relative to the ignore file,
+    # the others only the basename
+    anchored: bool
+
+
+def parse_rule(line: str) -> Optional[IgnoreRule]:
+    line = line.rstrip("\n")
+
+    # trailing whitespace is ignored unless escaped
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+
+    if not line or line.startswith("#"):
+        return None
+
+    negate = False
+    if line.startswith("!"):
+        negate = True
+        line = line[1:]
+    elif line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    anchored = "/" in line
+    line = line.lstrip("/")
+
+    return IgnoreRule(translate_pattern(line), negate, dir_only, anchored)
+
+
+class IgnoreFile:
+    """The rules of a single .gitignore file, 'base' is the directory
+    containing it. Without negated rules all rules are combined into
+    a few regular expressions, so that a path is checked in one go."""
+
+    @staticmethod
+    def from_file(base: str, filename: str) -> 'IgnoreFile':
+        with open(filename, encoding="utf-8", errors="replace") as fin:
+            return IgnoreFile(base, fin.readlines())
+
+    def __init__(self, base: str, lines: Sequence[str]) -> None:
+        self.base = base
+        self.rules = [rule for rule in (parse_rule(line) for line in lines) if rule is not None]
+
+        self._sequential = any(rule.negate for rule in self.rules)
+        if self._sequential:
+            self._compiled = [(re.compile(rule.regex + r"\Z"), rule) for rule in self.rules]
+        else:
+            def combine(anchored: bool, dir_only: bool) -> Optional['re.Pattern[str]']:
+                regexes = [rule.regex for rule in self.rules
+                           if rule.anchored == anchored and (dir_only or not rule.dir_only)]
+                if not regexes:
+                    return None
+                return re.compile("(?:" + "|".join(regexes) + r")\Z")
+
+            self._name_rx = combine(False, False)
+            self._name_dir_rx = combine(False, True)
+            self._path_rx = combine(True, False)
+            self._path_dir_rx = combine(True, True)
+
+    def match(self, relpath: str, name: str, is_dir: bool) -> Optional[bool]:
+        """True when ignored, False when explicitly included and None
+        when no rule applies"""
+
+        if self._sequential:
+            # the last matching rule wins
+            for rx, rule in reversed(self._compiled):
+                if rule.dir_only and not is_dir:
+                    continue
+                if rx.match(relpath if rule.anchored else name):
+                    return not rule.negate
+            return None
+        else:
+            name_rx = self._name_dir_rx if is_dir else self._name_rx
+            path_rx = self._path_dir_rx if is_dir else self._path_rx
+            if name_rx is not None and name_rx.match(name):
+                return True
+            if path_rx is not None and path_rx.match(relpath):
+                return True
+            return None
+
+
+def _normpath(path: str) -> str:
+    # Unlike os.path.normpath() this keeps the paths in the same form
+    # as walk() produces them, just without the trailing slash
+    return path.rstrip("/") or "/"
+
+
+class IgnoreMatcher:
+    """Applies the .gitignore and .ignore files found below 'top'.
+    Files are loaded lazily when a directory is first seen. Rules in
+    deeper directories take precedence, as do .ignore files over
+    .gitignore files in the same directory."""
+
+    FILENAMES = (".ignore", ".gitignore")
+
+    # never descend into these, same as git itself
+    ALWAYS_IGNORED = frozenset([".git"])
+
+    def __init__(self, top: str, filenames: Sequence[str] = FILENAMES) -> None:
+        self._top = _normpath(top)
+        self._filenames = filenames
+        self._rules: Dict[str, Tuple[IgnoreFile, ...]] = {}
+
+    def _load(self, directory: str) -> Tuple[IgnoreFile, ...]:
+        result = []
+        for filename in self._filenames:
+            path = os.path.join(directory, filename)
+            try:
+                result.append(IgnoreFile.from_file(directory, path))
+            except FileNotFoundError:
+                pass
+            except OSError as err:
+                logger.warning("IgnoreMatcher: %s", err)
+        return tuple(result)
+
+    def rules_for(self, directory: str) -> Tuple[IgnoreFile, ...]:
+        """The ignore files that apply to entries of 'directory', deepest first"""
+
+        rules = self._rules.get(directory)
+        if rules is None:
+            if directory == self._top or not directory.startswith(self._top.rstrip("/") + "/"):
+                parent_rules: Tuple[IgnoreFile, ...] = ()
+            else:
+                parent_rules = self.rules_for(os.path.dirname(directory))
+
+            own_rules = self._load(directory)
+            rules = own_rules + parent_rules if own_rules else parent_rules
+            self._rules[directory] = rules
+        return rules
+
+    def is_ignored(self, root: str, name: str, is_dir: bool) -> bool:
+        if is_dir and name in self.ALWAYS_IGNORED:
+            return True
+
+        root = _normpath(root)
+        for ignore_file in self.rules_for(root):
+            if root == ignore_file.base:
+                relpath = name
+            else:
+                relpath = root[len(ignore_file.base.rstrip("/")) + 1:] + "/" + name
+
+            result = ignore_file.match(relpath, name, is_dir)
+            if result is not None:
+                return result
+        return False
+
+
+# EOF #
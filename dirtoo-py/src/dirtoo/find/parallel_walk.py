@@ -0,0 +1,271 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Any, Callable, Generator, Optional, Tuple, Union
+
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+WalkResult = Tuple[str, list[str], list[Any]]
+
+
+class _ScanResult:
+    """The content of a single directory as read by a worker thread"""
+
+    def __init__(self, path: str, depth: int) -> None:
+        self.path = path
+        self.depth = depth
+        self.dirs: list[str] = []
+        self.nondirs: list[Any] = []
+
+        # Subdirectories to recurse into for a bottom-up walk, this
+        # includes symlinks to directories when followlinks is set
+        self.walk_into: list[str] = []
+
+        self.error: Optional[OSError] = None
+        self.skipped = False
+
+
+def _scan(path: str, depth: int, topdown: bool, followlinks: bool, want_entries: bool) -> _ScanResult:
+    result = _ScanResult(path, depth)
+
+    # Same as walk() this checks for symlinks again, as the caller
+    # might have replaced the directory in the meantime.
+    if topdown and depth > 1 and not followlinks and os.path.islink(path):
+        result.skipped = True
+        return result
+
+    try:
+        with os.scandir(path) as scandir_it:
+            entries = list(scandir_it)
+    except OSError as error:
+        result.error = error
+        return result
+
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+
+        try:
+            is_symlink = entry.is_symlink()
+        except OSError:
+            is_symlink = False
+
+        if is_dir and not is_symlink:
+            result.dirs.append(entry.name)
+        else:
+            result.nondirs.append(entry if want_entries else entry.name)
+
+        if is_dir and (followlinks or not is_symlink):
+            result.walk_into.append(entry.name)
+
+    return result
+
+
+def _prune(result: _ScanResult, prune: Callable[[str, str], bool]) -> None:
+    pruned = {name for name in result.walk_into if prune(result.path, name)}
+    if pruned:
+        result.dirs = [name for name in result.dirs if name not in pruned]
+        result.walk_into = [name for name in result.walk_into if name not in pruned]
+        # followed symlinks to directories end up in nondirs
+        result.nondirs = [entry for entry in result.nondirs
+                          if (entry if isinstance(entry, str) else entry.name) not in pruned]
+
+
+class _Node:
+    """Bookkeeping for the unordered bottom-up walk"""
+
+    def __init__(self, result: _ScanResult, parent: Optional['_Node']) -> None:
+        self.result = result
+        self.parent = parent
+        self.pending = 0
+
+
+def parallel_walk(top: Union[str, os.PathLike[str]], topdown: bool = True,
+                  onerror: Optional[Callable[[OSError], None]] = None,
+                  followlinks: bool = False,
+                  maxdepth: Optional[int] = None,
+                  jobs: int = 4,
+                  ordered: bool = False,
+                  queue_size: int = 1024,
+                  entries: bool = False,
+                  prune: Optional[Callable[[str, str], bool]] = None) -> Generator[WalkResult, None, None]:
+    """Multi-threaded variant of dirtoo.find.walk.walk()
+
+    The os.scandir() calls for sibling subdirectories are distributed
+    over a pool of 'jobs' threads, while the results are yielded in
+    the calling thread. The 'topdown', 'onerror', 'followlinks' and
+    'maxdepth' arguments behave as in walk(), 'onerror' is always
+    called from the calling thread. With topdown the caller can still
+    prune 'dirnames' in-place, subdirectories are only scheduled once
+    their parent has been yielded.
+
+    When 'ordered' is true results are produced in exactly the same
+    order as walk() would produce them, otherwise they are produced in
+    the order the directory reads finish, which is faster, but not
+    reproducible. At most 'queue_size' finished directory reads are
+    buffered before the worker threads block. With 'entries' the
+    filenames are returned as os.DirEntry objects. 'prune' is called
+    from the calling thread and behaves as in walk().
+    """
+
+    if maxdepth is None:
+        maxdepth = sys.maxsize
+
+    top = os.fspath(top)
+
+    if ordered:
+        return _ordered_walk(top, topdown, onerror, followlinks, maxdepth, jobs, entries, prune)
+    else:
+        return _unordered_walk(top, topdown, onerror, followlinks, maxdepth, jobs, queue_size, entries, prune)
+
+
+def _ordered_walk(top: str, topdown: bool,
+                  onerror: Optional[Callable[[OSError], None]],
+                  followlinks: bool,
+                  maxdepth: int,
+                  jobs: int,
+                  entries: bool,
+                  prune: Optional[Callable[[str, str], bool]]) -> Generator[WalkResult, None, None]:
+    executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="parallel_walk")
+
+    def submit(path: str, depth: int) -> 'Future[_ScanResult]':
+        return executor.submit(_scan, path, depth, topdown, followlinks, entries)
+
+    def recurse(future: 'Future[_ScanResult]') -> Generator[WalkResult, None, None]:
+        result = future.result()
+
+        if result.skipped:
+            return
+
+        if result.error is not None:
+            if onerror is not None:
+                onerror(result.error)
+            return
+
+        if prune is not None:
+            _prune(result, prune)
+
+        if topdown:
+            yield result.path, result.dirs, result.nondirs
+
+            if result.depth < maxdepth:
+                # Read all siblings at once, but consume them depth-first
+                children = [submit(os.path.join(result.path, dirname), result.depth + 1)
+                            for dirname in result.dirs]
+                for child in children:
+                    yield from recurse(child)
+        else:
+            if result.depth < maxdepth:
+                children = [submit(os.path.join(result.path, dirname), result.depth + 1)
+                            for dirname in result.walk_into]
+                for child in children:
+                    yield from recurse(child)
+
+            yield result.path, result.dirs, result.nondirs
+
+    try:
+        yield from recurse(submit(top, 1))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _unordered_walk(top: str, topdown: bool,
+                    onerror: Optional[Callable[[OSError], None]],
+                    followlinks: bool,
+                    maxdepth: int,
+                    jobs: int,
+                    queue_size: int,
+                    entries: bool,
+                    prune: Optional[Callable[[str, str], bool]]) -> Generator[WalkResult, None, None]:
+    results: 'queue.Queue[Tuple[_ScanResult, Optional[_Node]]]' = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="parallel_walk")
+
+    def work(path: str, depth: int, parent: Optional[_Node]) -> None:
+        if stop.is_set():
+            return
+
+        result = _scan(path, depth, topdown, followlinks, entries)
+
+        # Don't block forever on a full queue when the consumer went away
+        while not stop.is_set():
+            try:
+                results.put((result, parent), timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    in_flight = 0
+
+    def submit(path: str, depth: int, parent: Optional[_Node]) -> None:
+        nonlocal in_flight
+        in_flight += 1
+        executor.submit(work, path, depth, parent)
+
+    def complete(node: Optional[_Node]) -> Generator[WalkResult, None, None]:
+        # A bottom-up node is finished when all its children are
+        while node is not None and node.pending == 0:
+            yield node.result.path, node.result.dirs, node.result.nondirs
+            node = node.parent
+            if node is not None:
+                node.pending -= 1
+
+    try:
+        submit(top, 1, None)
+
+        while in_flight > 0:
+            result, parent = results.get()
+            in_flight -= 1
+
+            if result.skipped or result.error is not None:
+                if result.error is not None and onerror is not None:
+                    onerror(result.error)
+
+                if not topdown and parent is not None:
+                    parent.pending -= 1
+                    yield from complete(parent)
+                continue
+
+            if prune is not None:
+                _prune(result, prune)
+
+            if topdown:
+                yield result.path, result.dirs, result.nondirs
+
+                if result.depth < maxdepth:
+                    for dirname in result.dirs:
+                        submit(os.path.join(result.path, dirname), result.depth + 1, None)
+            else:
+                node = _Node(result, parent)
+                if result.depth < maxdepth:
+                    node.pending = len(result.walk_into)
+                    for dirname in result.walk_into:
+                        submit(os.path.join(result.path, dirname), result.depth + 1, node)
+                yield from complete(node)
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+# EOF #
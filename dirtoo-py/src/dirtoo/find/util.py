@@ -15,16 +15,25 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import TYPE_CHECKING, cast, Sequence, Any
+from typing import TYPE_CHECKING, cast, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Any
 
+import collections
+import logging
 import os
 import fnmatch
+from concurrent.futures import Future, ThreadPoolExecutor
 
+from dirtoo.find.file_entry import FileEntry, SyscallStats
 from dirtoo.find.walk import walk
+from dirtoo.find.parallel_walk import parallel_walk
 
 if TYPE_CHECKING:
     from dirtoo.find.action import Action
+    from dirtoo.find.file_index import FileIndex
     from dirtoo.find.filter import Filter
+    from dirtoo.find.ignore import IgnoreMatcher
+
+logger = logging.getLogger(__name__)
 
 
 def size_in_bytes(filename: str) -> int:
@@ -45,11 +54,174 @@ def replace_item(lst: Sequence[Any], needle: Any, replacements: Sequence[Any]) -
     return result
 
 
-def find_files(directory: str, filter_op: 'Filter', action: 'Action', topdown: bool, maxdepth: int) -> None:
-    for root, dirs, files in walk(directory, topdown=topdown, maxdepth=maxdepth):
-        for f in files:
-            if filter_op.match_file(cast(str, root), cast(str, f)):
-                action.file(cast(str, root), cast(str, f))
+def root_pruner(directory: str, prune: Callable[[str, str], bool]) -> Callable[[str], bool]:
+    """Returns a function telling if a directory below 'directory' lies
+    in a pruned subtree. Used for results that don't come from a walk,
+    such as the ones from a FileIndex, each directory is only checked
+    once."""
+
+    pruned_roots: Dict[str, bool] = {directory: False, directory.rstrip("/"): False}
+
+    def is_pruned(root: str) -> bool:
+        result = pruned_roots.get(root)
+        if result is None:
+            parent, name = os.path.split(root)
+            if not name:
+                result = False
+            else:
+                result = is_pruned(parent) or prune(parent, name)
+            pruned_roots[root] = result
+        return result
+
+    return is_pruned
+
+
+def match_concurrently(filter_op: 'Filter', entries: Iterable[FileEntry], jobs: int) -> Iterator[FileEntry]:
+    """Yields the 'entries' that match 'filter_op', evaluated by 'jobs'
+    threads. Meant for filters that read the file contents, where the
+    threads overlap the I/O. The order of 'entries' is kept and only
+    a few entries per thread are in flight."""
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="match") as executor:
+        pending: collections.deque[Tuple[FileEntry, Future[bool]]] = collections.deque()
+        for entry in entries:
+            pending.append((entry, executor.submit(filter_op.match_file, entry)))
+            if len(pending) >= jobs * 4:
+                entry, future = pending.popleft()
+                if future.result():
+                    yield entry
+
+        while pending:
+            entry, future = pending.popleft()
+            if future.result():
+                yield entry
+
+
+def find_files(directory: str, filter_op: 'Filter', action: 'Action', topdown: bool, maxdepth: Optional[int],
+               jobs: int = 1, ordered: bool = False, stats: Optional[SyscallStats] = None,
+               index: Optional['FileIndex'] = None,
+               prune: Optional[Callable[[FileEntry], bool]] = None,
+               ignore: Optional['IgnoreMatcher'] = None,
+               bytes_mode: bool = False) -> None:
+    """Passes the files below 'directory' that match 'filter_op' to
+    'action'. Directories for which 'prune' returns true, that are
+    ignored by 'ignore' or pruned by 'filter_op' itself are skipped
+    along with everything below them.
+
+    With 'bytes_mode' the directory is walked with bytes paths, names
+    are only decoded when the filter can't be decided from the raw
+    basename or the action can't take raw paths."""
+
+    cwd = os.getcwd()
+
+    prune_funcs = [func for func in (filter_op.prune_func(), prune) if func is not None]
+
+    def prune_dir(root: str, name: str) -> bool:
+        if ignore is not None and ignore.is_ignored(root, name, True):
+            result = True
+        else:
+            dir_entry = FileEntry(root, name, stats=stats, cwd=cwd)
+            result = any(func(dir_entry) for func in prune_funcs)
+
+        if result and stats is not None:
+            stats.pruned += 1
+        return result
+
+    prune_callback = prune_dir if prune_funcs or ignore is not None else None
+
+    if index is not None:
+        if index.covers(directory):
+            query = index.query(directory, filter_op.match_func(), maxdepth=maxdepth, stats=stats, cwd=cwd)
+            is_pruned = root_pruner(directory, prune_callback) if prune_callback is not None else None
+            for file_entry in query:
+                if is_pruned is not None and is_pruned(file_entry.root):
+                    continue
+                if ignore is not None and ignore.is_ignored(file_entry.root, file_entry.name, False):
+                    continue
+                if query.exact or filter_op.match_file(file_entry):
+                    action.file(file_entry)
+            return
+        else:
+            logger.info("%s is not indexed, falling back to walking the directory", directory)
+
+    if bytes_mode:
+        _find_files_bytes(directory, filter_op, action, topdown, maxdepth, jobs, ordered, stats, cwd,
+                          prune_callback, ignore)
+        return
+
+    walker: Iterator[Tuple[Any, Any, Any]]
+    if jobs > 1:
+        walker = parallel_walk(directory, topdown=topdown, maxdepth=maxdepth, jobs=jobs, ordered=ordered,
+                               entries=True, prune=prune_callback)
+    else:
+        walker = walk(directory, topdown=topdown, maxdepth=maxdepth, entries=True, prune=prune_callback)
+
+    def file_entries() -> Iterator[FileEntry]:
+        for root, dirs, files in walker:
+            if stats is not None:
+                stats.scandir += 1
+
+            for entry in cast(list['os.DirEntry[str]'], files):
+                if ignore is not None and ignore.is_ignored(cast(str, root), entry.name, False):
+                    continue
+
+                yield FileEntry(cast(str, root), entry.name, entry, stats=stats, cwd=cwd)
+
+    if jobs > 1 and filter_op.reads_content():
+        for file_entry in match_concurrently(filter_op, file_entries(), jobs):
+            action.file(file_entry)
+    else:
+        for file_entry in file_entries():
+            if filter_op.match_file(file_entry):
+                action.file(file_entry)
+
+
+def _find_files_bytes(directory: str, filter_op: 'Filter', action: 'Action', topdown: bool,
+                      maxdepth: Optional[int], jobs: int, ordered: bool, stats: Optional[SyscallStats],
+                      cwd: str, prune_callback: Optional[Callable[[str, str], bool]],
+                      ignore: Optional['IgnoreMatcher']) -> None:
+    def prune_bytes(root: bytes, name: bytes) -> bool:
+        assert prune_callback is not None
+        return prune_callback(os.fsdecode(root), os.fsdecode(name))
+
+    prune = prune_bytes if prune_callback is not None else None
+
+    # walk() and parallel_walk() work with bytes just like os.walk(),
+    # but are only annotated for str
+    walker: Iterator[Tuple[Any, Any, Any]]
+    if jobs > 1:
+        walker = parallel_walk(cast(Any, os.fsencode(directory)), topdown=topdown, maxdepth=maxdepth,
+                               jobs=jobs, ordered=ordered, entries=True, prune=cast(Any, prune))
+    else:
+        walker = walk(cast(Any, os.fsencode(directory)), topdown=topdown, maxdepth=maxdepth,
+                      entries=True, prune=cast(Any, prune))
+
+    name_func = filter_op.bytes_name_func()
+    raw = name_func is not None and ignore is None and action.accepts_bytes
+
+    for root, dirs, files in walker:
+        if stats is not None:
+            stats.scandir += 1
+
+        str_root: Optional[str] = None
+        for entry in cast(list['os.DirEntry[bytes]'], files):
+            if name_func is not None and not name_func(entry.name):
+                continue
+
+            if raw:
+                action.raw_file(entry.path)
+                continue
+
+            if str_root is None:
+                str_root = os.fsdecode(root)
+            name = os.fsdecode(entry.name)
+
+            if ignore is not None and ignore.is_ignored(str_root, name, False):
+                continue
+
+            file_entry = FileEntry(str_root, name, entry, stats=stats, cwd=cwd)
+            if name_func is not None or filter_op.match_file(file_entry):
+                action.file(file_entry)
 
 
 # EOF #
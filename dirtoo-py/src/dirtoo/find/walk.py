@@ -14,13 +14,15 @@ from os import scandir, path, name, listdir, PathLike, DirEntry
 def walk(top: Union[str, PathLike[str]], topdown: bool = True,
          onerror: Optional[Callable[[OSError], None]] = None,
          followlinks: bool = False,
-         maxdepth: Optional[int] = None) -> Generator[Tuple[Union[str, PathLike[str]],
-                                                            list[Union[str, PathLike[str]]],
-                                                            list[Union[str, PathLike[str]]]],
-                                                      None, None]:
+         maxdepth: Optional[int] = None,
+         prune: Optional[Callable[[str, str], bool]] = None,
+         entries: bool = False) -> Generator[Tuple[Union[str, PathLike[str]],
+                                                   list[Union[str, PathLike[str]]],
+                                                   list[Union[str, PathLike[str]]]],
+                                             None, None]:
     if maxdepth is None:
         maxdepth = sys.maxsize
-    return _walk(top, topdown, onerror, followlinks, maxdepth, depth=1)
+    return _walk(top, topdown, onerror, followlinks, maxdepth, depth=1, want_entries=entries, prune=prune)
 
 
 # This is the os.walk() function from Python-3.5.2, modified such that
@@ -30,10 +32,12 @@ def _walk(top: Union[str, PathLike[str]], topdown: bool,
           onerror: Optional[Callable[[OSError], None]],
           followlinks: bool,
           maxdepth: int,
-          depth: int) -> Generator[Tuple[Union[str, PathLike[str]],
-                                         list[Union[str, PathLike[str]]],
-                                         list[Union[str, PathLike[str]]]],
-                                   None, None]:
+          depth: int,
+          prune: Optional[Callable[[str, str], bool]] = None,
+          want_entries: bool = False) -> Generator[Tuple[Union[str, PathLike[str]],
+                                                         list[Union[str, PathLike[str]]],
+                                                         list[Union[str, PathLike[str]]]],
+                                                   None, None]:
     """Directory tree generator.
 
     For each directory in the directory tree rooted at top (including top
@@ -43,7 +47,10 @@ def _walk(top: Union[str, PathLike[str]], topdown: bool,
 
     dirpath is a string, the path to the directory.  dirnames is a list of
     the names of the subdirectories in dirpath (excluding '.' and '..').
-    filenames is a list of the names of the non-directory files in dirpath.
+    filenames is a list of the names of the non-directory files in dirpath,
+    or of their os.DirEntry objects when 'want_entries' is true.
+    Directories for which 'prune(dirpath, name)' returns true are left
+    out of the result completely and are never read.
     Note that the names in the lists are just names, with no path components.
     To get a full path (which begins with top) to a file or directory in
     dirpath, do os.path.join(dirpath, name).
@@ -129,10 +136,14 @@ def _walk(top: Union[str, PathLike[str]], topdown: bool,
             # os.path.islink().
             is_symlink = False
 
+        if is_dir and (followlinks or not is_symlink) and \
+           prune is not None and prune(top, entry.name):  # type: ignore
+            continue
+
         if is_dir and not is_symlink:
             dirs.append(entry.name)
         else:
-            nondirs.append(entry.name)
+            nondirs.append(entry if want_entries else entry.name)
 
         if not topdown and is_dir:
             # Bottom-up: recurse into sub-directory, but exclude symlinks to
@@ -144,7 +155,8 @@ def _walk(top: Union[str, PathLike[str]], topdown: bool,
 
             if walk_into:
                 if depth < maxdepth:
-                    yield from _walk(entry.path, topdown, onerror, followlinks, maxdepth, depth + 1)
+                    yield from _walk(entry.path, topdown, onerror, followlinks, maxdepth, depth + 1,
+                                     prune, want_entries)
 
     # Yield before recursion if going top down
     if topdown:
@@ -160,7 +172,8 @@ def _walk(top: Union[str, PathLike[str]], topdown: bool,
             # above.
             if followlinks or not islink(new_path):
                 if depth < maxdepth:
-                    yield from _walk(new_path, topdown, onerror, followlinks, maxdepth, depth + 1)
+                    yield from _walk(new_path, topdown, onerror, followlinks, maxdepth, depth + 1,
+                                     prune, want_entries)
     else:
         # Yield after recursion if going bottom up
         yield top, dirs, nondirs  # type: ignore
@@ -15,7 +15,10 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import Set
+from typing import Sequence, Set, Tuple
+
+import numpy
+import numpy.typing as npt
 
 
 def ngram(text: str, n: int = 3) -> Set[str]:
@@ -23,15 +26,119 @@ def ngram(text: str, n: int = 3) -> Set[str]:
     return {"".join(g) for g in zip(*[text[i:] for i in range(n)])}
 
 
+class FuzzyNeedle:
+    """The n-grams of a needle, computed once and reused for every
+    haystack it is compared against"""
+
+    def __init__(self, needle: str, n: int = 3) -> None:
+        self.needle = needle
+        self.n = n
+        self.ngrams = frozenset(ngram(needle, n))
+
+    def score(self, haystack: str) -> float:
+        """The fraction of the needle's n-grams found in 'haystack'"""
+        if not self.ngrams:
+            return 0.0
+
+        # an n-gram is in the n-grams of 'haystack' exactly when it is
+        # a substring of it, which spares building the set
+        matches = 0
+        for k in self.ngrams:
+            if k in haystack:
+                matches += 1
+        return matches / len(self.ngrams)
+
+
 def fuzzy(neddle: str, haystack: str, n: int = 3) -> float:
-    neddle_ngrams = ngram(neddle, n)
-    haystack_ngrams = ngram(haystack, n)
-
-    matches = 0
-    for k in neddle_ngrams:
-        if k in haystack_ngrams:
-            matches += 1
-    return matches / len(neddle_ngrams)
+    return FuzzyNeedle(neddle, n).score(haystack)
+
+
+# bits per character in the packed n-grams of NGramIndex
+_CHAR_BITS = 21
+
+
+def _pack(chars: npt.NDArray[numpy.uint64], n: int) -> npt.NDArray[numpy.uint64]:
+    """Packs the n-gram starting at each position of 'chars' into an int"""
+    count = max(len(chars) - n + 1, 0)
+    codes = numpy.zeros(count, dtype=numpy.uint64)
+    for k in range(n):
+        codes = (codes << numpy.uint64(_CHAR_BITS)) | chars[k:k + count]
+    return codes
+
+
+def _chars(text: str) -> npt.NDArray[numpy.uint64]:
+    # filenames that aren't valid UTF-8 contain lone surrogates
+    return numpy.frombuffer(text.encode("utf-32-le", errors="surrogatepass"),
+                            dtype=numpy.uint32).astype(numpy.uint64)
+
+
+class NGramIndex:
+    """Inverted index from n-grams to the positions of the 'texts'
+    containing them. Only the texts sharing at least one n-gram with
+    the needle are looked at when scoring.
+
+    The n-grams are packed into ints and the index is built with numpy
+    in one go, there is no per n-gram Python code. The packing limits
+    'n' to MAX_N."""
+
+    MAX_N = 64 // _CHAR_BITS
+
+    def __init__(self, texts: Sequence[str], n: int = 3) -> None:
+        if not 0 < n <= NGramIndex.MAX_N:
+            raise ValueError("NGramIndex: n must be between 1 and {}".format(NGramIndex.MAX_N))
+
+        self.n = n
+        self._count = len(texts)
+
+        chars = _chars("".join(texts))
+        lengths = numpy.fromiter(map(len, texts), dtype=numpy.int64, count=len(texts))
+        owners = numpy.repeat(numpy.arange(len(texts), dtype=numpy.int32), lengths)
+        starts = numpy.cumsum(lengths) - lengths
+
+        codes = _pack(chars, n)
+        owners = owners[:len(codes)]
+        # drop the n-grams spanning two texts
+        offsets = numpy.arange(len(codes)) - starts[owners]
+        valid = offsets + n <= lengths[owners]
+        codes, owners = codes[valid], owners[valid]
+
+        # a text is listed once per occurrence of an n-gram, scores()
+        # only counts it once
+        order = numpy.argsort(codes)
+        self._codes = codes[order]
+        self._owners = owners[order]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def scores(self, needle: FuzzyNeedle) -> npt.NDArray[numpy.float64]:
+        """The FuzzyNeedle.score() of each text"""
+
+        assert needle.n == self.n
+
+        if not needle.ngrams:
+            return numpy.zeros(self._count, dtype=numpy.float64)
+
+        grams = _pack(_chars("".join(needle.ngrams)), self.n)[::self.n]
+        lower = numpy.searchsorted(self._codes, grams, side="left")
+        upper = numpy.searchsorted(self._codes, grams, side="right")
+
+        counts = numpy.zeros(self._count, dtype=numpy.int32)
+        for start, end in zip(lower.tolist(), upper.tolist()):
+            # unlike numpy.add.at() this adds only once per repeated position
+            counts[self._owners[start:end]] += 1
+
+        return counts / len(needle.ngrams)
+
+    def rank(self, needle: FuzzyNeedle, threshold: float = 0.0) -> Sequence[Tuple[int, float]]:
+        """The positions and scores of the texts scoring above
+        'threshold', best first"""
+
+        scores = self.scores(needle)
+        ids = numpy.flatnonzero(scores > threshold)
+        # stable, so that texts with equal scores keep their order
+        ids = ids[numpy.argsort(-scores[ids], kind="stable")]
+        return list(zip(ids.tolist(), scores[ids].tolist()))
 
 
 # EOF #
@@ -31,6 +31,7 @@ class PreferencesDialog(QDialog):
         self._layout_group_box: QGroupBox
         self._cache_group_box: QGroupBox
         self._transfer_group_box: QGroupBox
+        self._search_group_box: QGroupBox
 
         self.setWindowTitle("dirtoo Preferences")
         self._make_gui()
@@ -40,6 +41,7 @@ class PreferencesDialog(QDialog):
 
         self._vbox.addWidget(self._make_applications_box())
         self._vbox.addWidget(self._make_transfer_group_box())
+        self._vbox.addWidget(self._make_search_group_box())
         self._vbox.addWidget(self._make_layout_group_box())
         self._vbox.addWidget(self._make_cache_group_box())
 
@@ -110,5 +112,17 @@ class PreferencesDialog(QDialog):
         self._transfer_group_box.setLayout(vbox)
         return self._transfer_group_box
 
+    def _make_search_group_box(self) -> QGroupBox:
+        self._search_group_box = QGroupBox("Search")
+        vbox = QVBoxLayout()
+
+        checkbox = QCheckBox("Search with the dt-index index, misses changes since it was last updated")
+        checkbox.setChecked(settings.value("globals/search_index", False, bool))
+        checkbox.stateChanged.connect(lambda state: settings.set_value("globals/search_index", state))
+        vbox.addWidget(checkbox)
+
+        self._search_group_box.setLayout(vbox)
+        return self._search_group_box
+
 
 # EOF #
@@ -0,0 +1,214 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import atexit
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import xdg.BaseDirectory
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(path: str, algorithm: str = "sha1", blocksize: int = 65536) -> str:
+    hasher = hashlib.new(algorithm)
+    with open(path, 'rb') as fin:
+        buf = fin.read(blocksize)
+        while buf:
+            hasher.update(buf)
+            buf = fin.read(blocksize)
+    return hasher.hexdigest()
+
+
+def _hash_file_worker(path: str, algorithm: str) -> Tuple[str, Optional[str]]:
+    try:
+        return path, hash_file(path, algorithm)
+    except OSError as err:
+        logger.warning("hash_file: %s", err)
+        return path, None
+
+
+class HashCache:
+    """Persistent cache of file content hashes. Entries are keyed by
+    (st_dev, st_ino) and are only valid as long as st_size and
+    st_mtime_ns didn't change. The least recently used entries are
+    evicted once there are more than 'max_entries'."""
+
+    COMMIT_INTERVAL = 256
+
+    @staticmethod
+    def default_filename() -> str:
+        return os.path.join(xdg.BaseDirectory.xdg_cache_home, "dirtoo", "hashes.sqlite")
+
+    def __init__(self, filename: Optional[str] = None, max_entries: int = 1000000) -> None:
+        self._db_filename = filename or HashCache.default_filename()
+        if self._db_filename != ":memory:":
+            os.makedirs(os.path.dirname(self._db_filename), exist_ok=True)
+
+        self._max_entries = max_entries
+        self._pending = 0
+
+        # find, the file transfer and the GUI might use the cache from
+        # different threads
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self._db_filename, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self) -> None:
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS hashes ("
+                         "dev INTEGER, "
+                         "ino INTEGER, "
+                         "algorithm TEXT, "
+                         "size INTEGER, "
+                         "mtime_ns INTEGER, "
+                         "digest TEXT, "
+                         "last_used REAL, "
+                         "PRIMARY KEY (dev, ino, algorithm))")
+        self._db.execute("CREATE INDEX IF NOT EXISTS hashes_last_used ON hashes (last_used)")
+        self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._evict()
+            self._db.commit()
+            self._db.close()
+
+    def lookup(self, st: os.stat_result, algorithm: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT digest FROM hashes "
+                                   "WHERE dev = ? AND ino = ? AND algorithm = ? AND size = ? AND mtime_ns = ?",
+                                   (st.st_dev, st.st_ino, algorithm, st.st_size, st.st_mtime_ns)).fetchone()
+            if row is None:
+                return None
+
+            self._db.execute("UPDATE hashes SET last_used = ? WHERE dev = ? AND ino = ? AND algorithm = ?",
+                             (time.time(), st.st_dev, st.st_ino, algorithm))
+            self._modified()
+            return str(row[0])
+
+    def store(self, st: os.stat_result, algorithm: str, digest: str) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (st.st_dev, st.st_ino, algorithm, st.st_size, st.st_mtime_ns, digest, time.time()))
+            self._modified()
+
+    def _modified(self) -> None:
+        self._pending += 1
+        if self._pending >= HashCache.COMMIT_INTERVAL:
+            self._evict()
+            self._db.commit()
+            self._pending = 0
+
+    def _evict(self) -> None:
+        (count,) = self._db.execute("SELECT count(*) FROM hashes").fetchone()
+        if count > self._max_entries:
+            # evict a bit more than needed, so this doesn't run on every commit
+            self._db.execute("DELETE FROM hashes WHERE rowid IN "
+                             "(SELECT rowid FROM hashes ORDER BY last_used LIMIT ?)",
+                             (count - self._max_entries * 9 // 10,))
+
+    def _stat(self, path: str, st: Optional[os.stat_result]) -> os.stat_result:
+        # stat_result objects that didn't come from the OS lack st_mtime_ns
+        if st is None or st.st_mtime_ns is None:
+            return os.stat(path)
+        else:
+            return st
+
+    def get(self, path: str, algorithm: str = "sha1", st: Optional[os.stat_result] = None) -> str:
+        """Returns the hash of 'path', 'st' is its stat() result if
+        already known. Symlinks must be resolved by the caller."""
+
+        st = self._stat(path, st)
+        digest = self.lookup(st, algorithm)
+        if digest is None:
+            digest = hash_file(path, algorithm)
+            self._store_if_unchanged(path, st, algorithm, digest)
+        return digest
+
+    def _store_if_unchanged(self, path: str, st: os.stat_result, algorithm: str, digest: str) -> None:
+        # Don't cache the hash of a file that was modified while hashing it
+        try:
+            st_after = os.stat(path)
+        except OSError:
+            return
+
+        if (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns) == \
+           (st_after.st_dev, st_after.st_ino, st_after.st_size, st_after.st_mtime_ns):
+            self.store(st, algorithm, digest)
+
+    def get_many(self, paths: Iterable[str], algorithm: str = "sha1", jobs: int = 1) -> Dict[str, str]:
+        """Returns the hashes of all 'paths', the ones missing from the
+        cache are computed with 'jobs' processes. Files that can't be
+        read are left out of the result."""
+
+        results: Dict[str, str] = {}
+        missing: Dict[str, os.stat_result] = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError as err:
+                logger.warning("HashCache: %s", err)
+                continue
+
+            digest = self.lookup(st, algorithm)
+            if digest is not None:
+                results[path] = digest
+            else:
+                missing[path] = st
+
+        if jobs > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                hashed = list(executor.map(_hash_file_worker, missing.keys(), [algorithm] * len(missing),
+                                           chunksize=16))
+        else:
+            hashed = [_hash_file_worker(path, algorithm) for path in missing.keys()]
+
+        for path, digest in hashed:
+            if digest is not None:
+                self._store_if_unchanged(path, missing[path], algorithm, digest)
+                results[path] = digest
+
+        return results
+
+
+_default_hash_cache: Optional[HashCache] = None
+_default_hash_cache_lock = threading.Lock()
+
+
+def default_hash_cache() -> HashCache:
+    """The HashCache shared by all users in this process"""
+
+    global _default_hash_cache
+
+    with _default_hash_cache_lock:
+        if _default_hash_cache is None:
+            _default_hash_cache = HashCache()
+            atexit.register(_default_hash_cache.close)
+
+        return _default_hash_cache
+
+
+# EOF #
@@ -15,7 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import hashlib
 import json
@@ -29,16 +29,10 @@ logger = logging.getLogger(__name__)
 
 class MetaDataCache:
 
-    def __init__(self) -> None:
-        self._directory: str = os.path.join(xdg.BaseDirectory.xdg_state_home, "dirtoo", "metadata")
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self._directory: str = directory or os.path.join(xdg.BaseDirectory.xdg_state_home, "dirtoo", "metadata")
         logger.info("MetaDataCache.__init__: %s", self._directory)
 
-        try:
-            for i in range(0, 256):
-                os.makedirs(os.path.join(self._directory, f"{i:02x}"))
-        except FileExistsError:
-            pass
-
     def _make_filename(self, abspath: str) -> str:
         url = "file://" + urllib.parse.quote(abspath)
         digest = hashlib.md5(os.fsencode(url)).hexdigest()
@@ -64,6 +58,7 @@ class MetaDataCache:
         logger.info("MetaDataCache.store_metadata: %s", abspath)
 
         json_filename = self._make_filename(abspath)
+        os.makedirs(os.path.dirname(json_filename), exist_ok=True)
 
         with open(json_filename, "w") as fout:
             json.dump(metadata, fout)
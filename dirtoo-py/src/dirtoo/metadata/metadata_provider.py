@@ -0,0 +1,81 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Any, Callable, Dict, Optional
+
+import logging
+import threading
+import traceback
+
+from dirtoo.filesystem.location import Location
+from dirtoo.metadata.metadata_cache import MetaDataCache
+
+logger = logging.getLogger(__name__)
+
+
+class MetaDataProvider:
+    """Looks up the metadata of files in the MetaDataCache for
+    LazyFileInfo. Entries are only used when their mtime matches the
+    file. With 'compute' missing and outdated entries are created and
+    stored in the cache, at most 'jobs' of them at the same time, no
+    matter how many threads ask for metadata."""
+
+    def __init__(self, cache: MetaDataCache, compute: bool = False, jobs: int = 1,
+                 create_metadata: Optional[Callable[[str], Dict[str, Any]]] = None) -> None:
+        self._cache = cache
+        self._compute = compute
+        self._slots = threading.BoundedSemaphore(jobs)
+        self._create_metadata = create_metadata or self._create_type_specific_metadata
+
+        # QMimeDatabase is created per thread
+        self._local = threading.local()
+
+    def metadata(self, abspath: str, mtime: float) -> Dict[str, Any]:
+        cached_metadata = self._cache.retrieve_metadata(abspath)
+        if isinstance(cached_metadata, dict) and cached_metadata.get("mtime") == mtime:
+            return cached_metadata
+
+        if not self._compute:
+            return {}
+
+        with self._slots:
+            metadata: Dict[str, Any] = {
+                'location': Location.from_path(abspath).as_url(),
+                'path': abspath,
+                'mtime': mtime,
+            }
+            try:
+                metadata.update(self._create_metadata(abspath))
+            except Exception:
+                metadata['type'] = "error"
+                metadata['error_message'] = traceback.format_exc()
+
+            self._cache.store_metadata(abspath, metadata)
+            return metadata
+
+    def _create_type_specific_metadata(self, abspath: str) -> Dict[str, Any]:
+        # imported here, so that only computing metadata requires Qt
+        from PyQt6.QtCore import QMimeDatabase
+        from dirtoo.metadata.metadata import MetaData
+
+        mimedb = getattr(self._local, "mimedb", None)
+        if mimedb is None:
+            mimedb = self._local.mimedb = QMimeDatabase()
+        return MetaData.from_path(abspath, mimedb)
+
+
+# EOF #
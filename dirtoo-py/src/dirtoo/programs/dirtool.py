@@ -15,7 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import Tuple, Sequence, Optional
+from typing import Dict, Tuple, Sequence, Optional
 
 import os
 import sys
@@ -25,6 +25,8 @@ import shutil
 import filecmp
 from itertools import chain
 
+from dirtoo.hash_cache import default_hash_cache
+
 
 # Ownership, permissions are part of the file data, not directory entry
 # File structure:
@@ -145,9 +147,9 @@ class FileInfo:
         return self.filename
 
 
-def fileinfo_from_path(path: str) -> Sequence[FileInfo]:
+def fileinfo_from_path(path: str, checksum: bool = False, jobs: int = 1) -> Sequence[FileInfo]:
     if os.path.isdir(path):
-        return fileinfo_from_directory(path)
+        return fileinfo_from_directory(path, checksum, jobs)
     elif os.path.isfile(path):
         return fileinfo_from_md5sums(path)
     else:
@@ -159,12 +161,17 @@ def fileinfo_from_md5sums(filename: str) -> Sequence[FileInfo]:
         return [FileInfo(*e.split(None, 1)) for e in fin.read().splitlines()]
 
 
-def fileinfo_from_directory(directory: str) -> Sequence[FileInfo]:
-    lst: list[FileInfo] = []
+def fileinfo_from_directory(directory: str, checksum: bool = False, jobs: int = 1) -> Sequence[FileInfo]:
+    paths: list[str] = []
     for path, dirs, files in os.walk(directory):
         for fname in files:
-            lst.append(FileInfo(None, os.path.relpath(os.path.join(path, fname), directory)))
-    return lst
+            paths.append(os.path.join(path, fname))
+
+    md5sums: Dict[str, str] = {}
+    if checksum:
+        md5sums = default_hash_cache().get_many(paths, "md5", jobs=jobs)
+
+    return [FileInfo(md5sums.get(p), os.path.relpath(p, directory)) for p in paths]
 
 
 def compare_directories(finfo1: Sequence[FileInfo],
@@ -177,16 +184,24 @@ def compare_directories(finfo1: Sequence[FileInfo],
         finfo1_set = set(finfo1)
         finfo2_set = set(finfo2)
 
+    # files present on both sides whose content differs, only
+    # available when checksums are known
+    md5sums2 = {f.filename: f.md5sum for f in finfo2_set}
+    changes = [f for f in finfo1_set
+               if f.md5sum is not None and
+               md5sums2.get(f.filename) is not None and
+               f.md5sum != md5sums2[f.filename]]
+
     return (
         sorted(finfo1_set.difference(finfo2_set)),  # removals
         sorted(finfo2_set.difference(finfo1_set)),  # additions
-        []  # changes
+        sorted(changes)  # changes
     )
 
 
-def compare_command(path1: str, path2: str, ignore_case: bool) -> None:
-    finfo1 = fileinfo_from_path(path1)
-    finfo2 = fileinfo_from_path(path2)
+def compare_command(path1: str, path2: str, ignore_case: bool, checksum: bool = False, jobs: int = 1) -> None:
+    finfo1 = fileinfo_from_path(path1, checksum, jobs)
+    finfo2 = fileinfo_from_path(path2, checksum, jobs)
 
     removals, additions, changes = compare_directories(finfo1, finfo2, ignore_case)
 
@@ -290,6 +305,8 @@ def main(argv: Sequence[str]) -> int:
                         help='Another directory')
     parser.add_argument('-c', '--checksum', action='store_true',
                         help="Use checksum for comparism")
+    parser.add_argument('-j', '--jobs', metavar="INT", type=int, default=1,
+                        help="Number of processes used to compute checksums")
     parser.add_argument('-t', '--target', metavar="DIR", action='store',
                         help="Target directory for extract")
     parser.add_argument('-f', '--force', action='store_true',
@@ -301,7 +318,7 @@ def main(argv: Sequence[str]) -> int:
     args = parser.parse_args(argv[1:])
 
     if args.COMMAND == "diff":
-        compare_command(args.FILE1, args.FILE2, args.ignore_case)
+        compare_command(args.FILE1, args.FILE2, args.ignore_case, args.checksum, args.jobs)
     elif args.COMMAND == "extract-diff":
         extract_diff_command(args.FILE1, args.FILE2, args.target, args.dry_run, args.ignore_case)
     elif args.COMMAND == "merge":
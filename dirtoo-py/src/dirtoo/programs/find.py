@@ -22,9 +22,20 @@ import logging
 import sys
 import argparse
 
-from dirtoo.find.action import Action, MultiAction, PrinterAction, ExecAction, ExprSorterAction
+import bytefmt
+
+from dirtoo.find.action import Action, MultiAction, PrinterAction, RawPrinterAction, ExecAction, ExprSorterAction
+from dirtoo.find.content_index import ContentIndex
+from dirtoo.find.file_entry import SyscallStats
+from dirtoo.find.file_index import FileIndex
 from dirtoo.find.filter import Filter, ExprFilter, SimpleFilter, NoFilter
+from dirtoo.find.ignore import IgnoreMatcher
 from dirtoo.find.util import find_files
+from dirtoo.filter.match_func import ContainsMatchFunc
+from dirtoo.filter.match_func_compiler import CompiledMatchFunc
+from dirtoo.filesystem.lazy_file_info import LazyFileInfo
+from dirtoo.metadata.metadata_cache import MetaDataCache
+from dirtoo.metadata.metadata_provider import MetaDataProvider
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +50,8 @@ def parse_args(argv: Sequence[str], simple: bool) -> argparse.Namespace:
 
     parser.add_argument("--debug", action='store_true', default=False,
                         help="Print lots of debugging output")
+    parser.add_argument("--stats", action='store_true', default=False,
+                        help="Print the number of filesystem calls to stderr")
 
     trav_grp = parser.add_argument_group("Traversial Options")
 
@@ -50,6 +63,22 @@ def parse_args(argv: Sequence[str], simple: bool) -> argparse.Namespace:
                           help="Process directory content before the directory itself")
     trav_grp.add_argument("-D", "--maxdepth", metavar="INT", type=int, default=None,
                           help="Maximum recursion depth")
+    trav_grp.add_argument("-j", "--jobs", metavar="INT", type=int, default=1,
+                          help="Number of threads used to read directories")
+    trav_grp.add_argument("--ordered", action='store_true', default=False,
+                          help="Keep the output order of a single-threaded walk when using --jobs")
+    trav_grp.add_argument("--index", action='store_true', default=False,
+                          help="Answer the query from the index built by dt-index where possible, "
+                          "contains: only reads the files that dt-index --content can't rule out")
+    trav_grp.add_argument("--index-file", metavar="FILE", type=str, default=None,
+                          help="Use FILE as index instead of the default (implies --index)")
+    trav_grp.add_argument("--prune", metavar="EXPR", type=str, default=None,
+                          help="Don't descend into directories for which EXPR is true")
+    trav_grp.add_argument("--ignore-files", action='store_true', default=False,
+                          help="Skip files and directories listed in .gitignore and .ignore files")
+    trav_grp.add_argument("--bytes", action='store_true', default=False,
+                          help="Walk, match and print undecoded filenames where possible, "
+                          "faster for large trees")
 
     print_grp = parser.add_argument_group("Print Options")
     print_grp.add_argument("-0", "--null", action="store_true",
@@ -68,14 +97,35 @@ def parse_args(argv: Sequence[str], simple: bool) -> argparse.Namespace:
                           help="Sort filename by EXPR")
     sort_grp.add_argument("-R", "--reverse", default=False, action='store_true',
                           help="Reverse sort order")
+    head_tail_grp = sort_grp.add_mutually_exclusive_group()
+    head_tail_grp.add_argument("--head", metavar="N", type=int, default=None,
+                               help="Only output the first N files of the sort order")
+    head_tail_grp.add_argument("--tail", metavar="N", type=int, default=None,
+                               help="Only output the last N files of the sort order")
+    sort_grp.add_argument("--sort-memory", metavar="SIZE", type=bytefmt.dehumanize, default="512MB",
+                          help="Spill to temporary files when sorting more than SIZE worth of files")
 
     filter_grp = parser.add_argument_group("Filter Options")
     filter_grp.add_argument("-f", "--filter", metavar="EXPR", type=str,
                             help="Filter filename through EXPR")
+    if simple:
+        filter_grp.add_argument("--explain", action='store_true', default=False,
+                                help="Print the evaluation order of QUERY to stderr before and after the search")
+        filter_grp.add_argument("--max-content-size", metavar="SIZE", type=bytefmt.dehumanize, default="1GiB",
+                                help="Skip files larger than SIZE in contains: and the like")
+        filter_grp.add_argument("--binary", action='store_true', default=False,
+                                help="Search binary files in contains: and the like as well")
+        filter_grp.add_argument("--metadata", choices=["none", "cache", "compute"], default="cache",
+                                help="Where width:, duration:, pages: and the like get the metadata from, "
+                                "'cache' uses what dt-metadata stored, 'compute' creates the missing "
+                                "entries as well, in up to --jobs threads")
 
     action_grp = parser.add_argument_group("Action Options")
     action_grp.add_argument("--exec", metavar="CMD",
-                            help="Execute CMD")
+                            help="Execute CMD, '{}' is replaced with the filename, "
+                            "'{}+' with as many filenames as fit on the command line")
+    action_grp.add_argument("--exec-jobs", metavar="INT", type=int, default=1,
+                            help="Number of commands from --exec to run in parallel")
 
     return parser.parse_args(argv[1:])
 
@@ -86,7 +136,10 @@ def create_action(args: argparse.Namespace) -> Action:
     if args.quiet:
         pass
     elif args.null:
-        action.add(PrinterAction("{fullpath()}\0"))
+        if args.bytes:
+            action.add(RawPrinterAction(b"\0"))
+        else:
+            action.add(PrinterAction("{fullpath()}\0"))
     elif args.list:
         if sys.stdout.isatty():
             action.add(PrinterAction(
@@ -103,11 +156,13 @@ def create_action(args: argparse.Namespace) -> Action:
     else:
         if sys.stdout.isatty():
             action.add(PrinterAction("{qfullpath()}\n"))
+        elif args.bytes:
+            action.add(RawPrinterAction(b"\n"))
         else:
             action.add(PrinterAction("{fullpath()}\n"))
 
     if args.exec:
-        action.add(ExecAction(args.exec))
+        action.add(ExecAction(args.exec, jobs=args.exec_jobs))
 
     return action
 
@@ -127,13 +182,15 @@ def create_simple_filter(filter_text: Optional[str]) -> Filter:
 
 
 def create_sorter_wrapper(args: argparse.Namespace, find_action: Action) -> Action:
-    if args.sort is None and not args.reverse:
+    if args.sort is None and not args.reverse and args.head is None and args.tail is None:
         return find_action
     else:
-        return ExprSorterAction(args.sort, args.reverse, find_action)
+        return ExprSorterAction(args.sort, args.reverse, find_action,
+                                head=args.head, tail=args.tail,
+                                memory_limit=args.sort_memory)
 
 
-def main(argv: Sequence[str], simple: bool) -> None:
+def main(argv: Sequence[str], simple: bool) -> int:
     args = parse_args(argv, simple)
 
     if args.debug:
@@ -146,24 +203,75 @@ def main(argv: Sequence[str], simple: bool) -> None:
 
     find_filter: Filter
     if simple:
+        ContainsMatchFunc.MAX_FILE_SIZE = args.max_content_size
+        ContainsMatchFunc.SKIP_BINARY = not args.binary
+
+        if args.metadata != "none":
+            LazyFileInfo.METADATA_PROVIDER = MetaDataProvider(MetaDataCache(), compute=args.metadata == "compute",
+                                                              jobs=args.jobs)
+
         find_filter = SimpleFilter.from_string(" ".join(args.QUERY))
         directories = args.directory or ["."]
+        if args.explain:
+            sys.stderr.write("plan:\n")
+            sys.stderr.write(find_filter.explain())
     else:
         find_filter = create_filter(args.filter)
         directories = args.DIRECTORY or ['.']
 
+    stats = SyscallStats() if args.stats else None
+
+    index: Optional[FileIndex] = None
+    if args.index_file is not None:
+        index = FileIndex(args.index_file)
+    elif args.index:
+        index = FileIndex.open_default()
+        if index is None:
+            logger.warning("no index found at %s, run dt-index first", FileIndex.default_filename())
+
+    content_index: Optional[ContentIndex] = None
+    if index is not None:
+        content_index = ContentIndex(args.index_file or ContentIndex.default_filename())
+        ContainsMatchFunc.CONTENT_INDEX = content_index
+
+    prune_filter = ExprFilter(args.prune) if args.prune else None
+
     for d in directories:
-        find_files(d, find_filter, find_action, topdown=not args.depth, maxdepth=args.maxdepth)
+        find_files(d, find_filter, find_action, topdown=not args.depth, maxdepth=args.maxdepth,
+                   jobs=args.jobs, ordered=args.ordered, stats=stats, index=index,
+                   prune=prune_filter.match_file if prune_filter is not None else None,
+                   ignore=IgnoreMatcher(d) if args.ignore_files else None,
+                   bytes_mode=args.bytes)
 
     find_action.finish()
 
+    if index is not None:
+        index.close()
+
+    if content_index is not None:
+        ContainsMatchFunc.CONTENT_INDEX = None
+        content_index.close()
+
+    LazyFileInfo.METADATA_PROVIDER = None
+
+    if simple and args.explain:
+        assert isinstance(find_filter, SimpleFilter)
+        sys.stderr.write("plan after search, statistics of up to the first {} files:\n"
+                         .format(CompiledMatchFunc.WARMUP_CALLS))
+        sys.stderr.write(find_filter.explain())
+
+    if stats is not None:
+        stats.write(sys.stderr)
+
+    return find_action.exit_status()
+
 
 def search_entrypoint() -> None:
-    main(sys.argv, simple=True)
+    sys.exit(main(sys.argv, simple=True))
 
 
 def find_entrypoint() -> None:
-    main(sys.argv, simple=False)
+    sys.exit(main(sys.argv, simple=False))
 
 
 # EOF #
@@ -15,12 +15,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from typing import Sequence, IO, Optional
+from typing import Sequence, IO, Optional, Tuple
 
 import sys
 import argparse
 
-from dirtoo.fuzzy import fuzzy
+from dirtoo.fuzzy import FuzzyNeedle
 
 
 def parse_args(argv: Sequence[str]) -> argparse.Namespace:
@@ -33,22 +33,33 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
                         help="Prefix the output with line numbers")
     parser.add_argument("-t", "--threshold", metavar="FLOAT", type=float, default=0.5,
                         help="Threshold for fuzzy matched")
+    parser.add_argument("-r", "--rank", action='store_true', default=False,
+                        help="Print the matches best first, prefixed with their score")
     return parser.parse_args(argv[1:])
 
 
-def process_stream(query: str, filename: Optional[str], fin: IO[str],
+def format_line(filename: Optional[str], line_no: int, line: str, args: argparse.Namespace) -> str:
+    if filename is not None:
+        return "{}:{}: {}".format(filename, line_no, line)
+    elif args.line_number:
+        return "{}: {}".format(line_no, line)
+    else:
+        return line
+
+
+def process_stream(needle: FuzzyNeedle, filename: Optional[str], fin: IO[str],
                    fuzzy_options: 'FuzzyOptions',
-                   args: argparse.Namespace) -> None:
+                   args: argparse.Namespace,
+                   ranking: Optional[list[Tuple[float, str]]] = None) -> None:
     for idx, line in enumerate(fin):
         line_no = idx + 1
 
-        if fuzzy(query, line, n=fuzzy_options.n) > fuzzy_options.threshold:
-            if filename is not None:
-                sys.stdout.write("{}:{}: {}".format(filename, line_no, line))
-            elif args.line_number:
-                sys.stdout.write("{}: {}".format(line_no, line))
+        score = needle.score(line)
+        if score > fuzzy_options.threshold:
+            if ranking is not None:
+                ranking.append((score, format_line(filename, line_no, line, args)))
             else:
-                sys.stdout.write(line)
+                sys.stdout.write(format_line(filename, line_no, line, args))
 
 
 class FuzzyOptions:
@@ -69,12 +80,21 @@ def main(argv: Sequence[str]) -> None:
         print("error: ngram size can't be larger than query string", file=sys.stderr)
         return
 
+    needle = FuzzyNeedle(query, fuzzy_options.n)
+    ranking: Optional[list[Tuple[float, str]]] = [] if args.rank else None
+
     if files == []:
-        process_stream(query, None, sys.stdin, fuzzy_options, args)
+        process_stream(needle, None, sys.stdin, fuzzy_options, args, ranking)
     else:
         for filename in files:
             with open(filename) as fin:
-                process_stream(query, filename, fin, fuzzy_options, args)
+                process_stream(needle, filename, fin, fuzzy_options, args, ranking)
+
+    if ranking is not None:
+        # stable, lines with the same score stay in input order
+        ranking.sort(key=lambda item: -item[0])
+        for score, text in ranking:
+            sys.stdout.write("{:.2f} {}".format(score, text))
 
 
 def main_entrypoint() -> None:
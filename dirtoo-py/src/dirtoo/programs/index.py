@@ -0,0 +1,101 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Sequence
+
+import argparse
+import logging
+import sys
+
+from dirtoo.find.content_index import ContentIndex
+from dirtoo.find.file_index import FileIndex
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build and update the file index used by dt-search --index")
+    parser.add_argument("DIRECTORY", nargs='*',
+                        help="Directories to add to the index, all indexed directories are updated when empty")
+    parser.add_argument("--index-file", metavar="FILE", type=str, default=None,
+                        help="Use FILE as index instead of the default")
+    parser.add_argument("--full", action='store_true', default=False,
+                        help="Rescan all directories, not just the ones whose mtime changed")
+    parser.add_argument("--content", action='store_true', default=False,
+                        help="Also index the contents of the text files in DIRECTORY for contains: and "
+                        "containsre:, they are kept up to date by later updates")
+    parser.add_argument("--remove", action='store_true', default=False,
+                        help="Remove DIRECTORY from the index")
+    parser.add_argument("-l", "--list", action='store_true', default=False,
+                        help="List the indexed directories")
+    parser.add_argument("-v", "--verbose", action='store_true', default=False,
+                        help="Print statistics about the update")
+    parser.add_argument("--debug", action='store_true', default=False,
+                        help="Print lots of debugging output")
+    return parser.parse_args(argv[1:])
+
+
+def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG)
+    else:
+        logging.basicConfig(level=logging.WARNING)
+
+    index = FileIndex(args.index_file or FileIndex.default_filename())
+    content_index = ContentIndex(args.index_file or ContentIndex.default_filename())
+
+    if args.list:
+        for root in index.roots():
+            print("{}  {} files".format(root, index.file_count(root)))
+        for root in content_index.roots():
+            print("{}  {} files with content".format(root, content_index.file_count(root)))
+    elif args.remove:
+        for directory in args.DIRECTORY:
+            index.remove(directory)
+            content_index.remove(directory)
+    else:
+        directories = args.DIRECTORY or index.roots()
+        for directory in directories:
+            stats = index.update(directory, full=args.full)
+            if args.verbose:
+                print("{}:".format(directory))
+                stats.write(sys.stdout)
+
+        if args.content:
+            content_directories = args.DIRECTORY or index.roots()
+        elif not args.DIRECTORY:
+            content_directories = content_index.roots()
+        else:
+            # directories with indexed contents stay up to date
+            content_directories = [directory for directory in args.DIRECTORY
+                                   if content_index.root_for(directory) is not None]
+
+        for directory in content_directories:
+            content_stats = content_index.update(directory, full=args.full)
+            if args.verbose:
+                print("{} (content):".format(directory))
+                content_stats.write(sys.stdout)
+
+    content_index.close()
+    index.close()
+
+
+def main_entrypoint() -> None:
+    main(sys.argv)
+
+
+# EOF #
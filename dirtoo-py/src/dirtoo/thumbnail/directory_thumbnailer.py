@@ -69,6 +69,9 @@ class DirectoryThumbnailerTask(QObject):
         if hasattr(self._stream, 'sig_file_added'):
             self._stream.sig_file_added.connect(self._file_collection.add_fileinfo)
 
+        if hasattr(self._stream, 'sig_files_added'):
+            self._stream.sig_files_added.connect(self._file_collection.add_fileinfos)
+
         if hasattr(self._stream, 'sig_file_removed'):
             self._stream.sig_file_removed.connect(self._file_collection.remove_file)
 
@@ -0,0 +1,123 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import io
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+from dirtoo.filter.content import LiteralPattern, MultiPattern, RegexPattern, MMAP_THRESHOLD, open_content
+from dirtoo.filter.match_func import ContainsMatchFunc
+from dirtoo.find.filter import SimpleFilter
+from dirtoo.find.util import find_files
+
+from tests.test_find import CollectAction
+
+
+class ContentTestCase(unittest.TestCase):
+
+    def test_literal(self) -> None:
+        data = "Hello World\nGrüße\n".encode("utf-8")
+        self.assertTrue(LiteralPattern("world", case_sensitive=False).search(data))
+        self.assertFalse(LiteralPattern("world", case_sensitive=True).search(data))
+        self.assertTrue(LiteralPattern("GRÜSSE".lower(), case_sensitive=False).search("grüsse".encode()))
+        self.assertTrue(LiteralPattern("GRÜßE", case_sensitive=False).search(data))
+        self.assertTrue(LiteralPattern("ü", case_sensitive=True).search(data))
+        self.assertTrue(LiteralPattern("123", case_sensitive=False).search(b"x123"))
+
+    def test_regex(self) -> None:
+        data = b"first line\nsecond line\n"
+        self.assertTrue(RegexPattern("^second", case_sensitive=True).search(data))
+        self.assertTrue(RegexPattern("FIRST line$", case_sensitive=False).search(data))
+        self.assertFalse(RegexPattern("first.*second", case_sensitive=True).search(data))
+        self.assertTrue(RegexPattern(r"\w+ü", case_sensitive=True).search("grün".encode()))
+
+        # '.' and negated classes match characters, not bytes, and
+        # nothing reaches across lines
+        data = "café au lait\nsecond line\n".encode("utf-8")
+        self.assertTrue(RegexPattern(r"caf.\ au", case_sensitive=True).search(data))
+        self.assertTrue(RegexPattern(r"^.{12}$", case_sensitive=True).search(data))
+        self.assertTrue(RegexPattern(r"caf[^x] au", case_sensitive=True).search(data))
+        self.assertFalse(RegexPattern(r"lait[^x]*second", case_sensitive=True).search(data))
+        self.assertFalse(RegexPattern(r"lait\Z", case_sensitive=True).search(data))
+        self.assertFalse(RegexPattern(r"lait[\n]second", case_sensitive=True).search(data))
+        self.assertTrue(RegexPattern(r"lait$", case_sensitive=True).search(data))
+        self.assertIsNotNone(RegexPattern(r"^second (line|row)$", case_sensitive=True)._rx)
+        self.assertIsNone(RegexPattern(r"caf.", case_sensitive=True)._rx)
+
+    def test_line_endings(self) -> None:
+        def text_mode_search(pattern: str, data: bytes) -> bool:
+            with io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="replace") as fin:
+                return any(re.search(pattern, line, re.MULTILINE) is not None for line in fin)
+
+        for newline in ["\n", "\r\n", "\r"]:
+            data = newline.join(["foo", "line2", "café", "x\x0cy", ""]).encode("utf-8")
+            self.assertTrue(RegexPattern("line2$", case_sensitive=True).search(data), repr(newline))
+            self.assertTrue(RegexPattern("é$", case_sensitive=True).search(data), repr(newline))
+            for pattern in ["line2$", "^line2$", "é$", "^café", "^line", "o$", "foo\\s", "2\\r",
+                            "x\x0cy$", "^y", "foo$|^caf"]:
+                self.assertEqual(RegexPattern(pattern, case_sensitive=True).search(data),
+                                 text_mode_search(pattern, data), (pattern, newline))
+
+            self.assertTrue(LiteralPattern("line2\n", case_sensitive=True).search(data), repr(newline))
+            self.assertTrue(LiteralPattern("LINE2\n", case_sensitive=False).search(data), repr(newline))
+            self.assertFalse(LiteralPattern("line2\r", case_sensitive=True).search(data), repr(newline))
+
+    def test_multi_pattern(self) -> None:
+        data = b"x" * 10000 + b"Foo" + b"x" * 100000 + b"bar\nbaz"
+        patterns = [LiteralPattern("foo", case_sensitive=False), LiteralPattern("Foo", case_sensitive=True),
+                    LiteralPattern("foo", case_sensitive=True), LiteralPattern("xbar", case_sensitive=True),
+                    RegexPattern("^baz", case_sensitive=True), LiteralPattern("grün", case_sensitive=False)]
+        self.assertEqual(MultiPattern(patterns).search(data), [pattern.search(data) for pattern in patterns])
+        self.assertEqual(MultiPattern(patterns).search(data), [True, True, False, True, True, False])
+        self.assertEqual(MultiPattern(patterns).search(b""), [False] * len(patterns))
+
+    def test_contains(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            def write(name: str, content: bytes) -> None:
+                with open(os.path.join(tmpdir, name), "wb") as fout:
+                    fout.write(content)
+
+            write("small.txt", b"needle\n")
+            write("large.txt", b"x" * MMAP_THRESHOLD * 2 + b"\nneedle\n")
+            write("binary.bin", b"\0needle")
+            write("other.txt", b"haystack\n")
+
+            def search(query: str) -> list[str]:
+                action = CollectAction()
+                find_files(tmpdir, SimpleFilter.from_string(query), action, topdown=True, maxdepth=None, jobs=2)
+                return sorted(entry.name for entry in action.entries)
+
+            self.assertEqual(search("contains:NEEDLE"), ["large.txt", "small.txt"])
+            self.assertEqual(search("containsre:^needle$"), ["large.txt", "small.txt"])
+
+            # all contains: terms are resolved with a single read per file
+            with mock.patch("dirtoo.filter.match_func.open_content", wraps=open_content) as open_mock:
+                self.assertEqual(search("contains:needle -contains:xxx OR contains:haystack"),
+                                 ["other.txt", "small.txt"])
+                self.assertEqual(open_mock.call_count, 4)
+
+            with mock.patch.object(ContainsMatchFunc, "SKIP_BINARY", False):
+                self.assertEqual(search("Contains:needle"), ["binary.bin", "large.txt", "small.txt"])
+
+            with mock.patch.object(ContainsMatchFunc, "MAX_FILE_SIZE", MMAP_THRESHOLD):
+                self.assertEqual(search("contains:needle"), ["small.txt"])
+
+
+# EOF #
@@ -0,0 +1,113 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dirtoo.filter.content import LiteralPattern, RegexPattern
+from dirtoo.filter.match_func import ContainsMatchFunc
+from dirtoo.find.content_index import ContentIndex
+from dirtoo.find.filter import SimpleFilter
+from dirtoo.find.util import find_files
+
+from tests.test_find import CollectAction
+
+
+def write_file(path: str, content: bytes) -> None:
+    with open(path, "wb") as fout:
+        fout.write(content)
+
+
+class ContentIndexTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmpdir.name, "root")
+        os.makedirs(os.path.join(self.root, "sub"))
+        write_file(os.path.join(self.root, "a.txt"), b"Hello World\n")
+        write_file(os.path.join(self.root, "b.txt"), b"goodbye world\n")
+        write_file(os.path.join(self.root, "sub", "c.txt"), b"error: timeout\n")
+        write_file(os.path.join(self.root, "sub", "d.bin"), b"\0timeout")
+
+        self.index = ContentIndex(os.path.join(self.tmpdir.name, "index.sqlite"))
+
+    def tearDown(self) -> None:
+        ContainsMatchFunc.CONTENT_INDEX = None
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def find(self, query: str, index: bool) -> list[str]:
+        ContainsMatchFunc.CONTENT_INDEX = self.index if index else None
+        action = CollectAction()
+        find_files(self.root, SimpleFilter.from_string(query), action, topdown=True, maxdepth=None)
+        return sorted(entry.name for entry in action.entries)
+
+    def test_candidates(self) -> None:
+        stats = self.index.update(self.root)
+        self.assertEqual(stats.indexed, 3)
+        self.assertEqual(stats.binary, 1)
+
+        candidates = self.index.candidates(LiteralPattern("WORLD", False))
+        assert candidates is not None
+        self.assertEqual(len(candidates), 2)
+
+        candidates = self.index.candidates(RegexPattern("err.r: time(out)+", True))
+        assert candidates is not None
+        self.assertEqual(len(candidates), 1)
+
+        self.assertIsNone(self.index.candidates(LiteralPattern("wo", False)))
+        self.assertIsNone(self.index.candidates(RegexPattern("a|b", True)))
+
+    def test_search(self) -> None:
+        self.index.update(self.root)
+        for query in ["contains:world", "contains:World", "contains:timeout", "contains:nothing",
+                      "containsre:^good", "contains:world OR contains:error", "contains:hello contains:world"]:
+            self.assertEqual(self.find(query, True), self.find(query, False), query)
+
+        with mock.patch("dirtoo.filter.match_func.open_content") as open_content:
+            self.assertEqual(self.find("contains:nothing", True), [])
+            self.assertEqual(open_content.call_count, 0)
+
+    def test_update(self) -> None:
+        self.index.update(self.root)
+
+        # changed files are searched until the next update
+        write_file(os.path.join(self.root, "a.txt"), b"something else\n")
+        write_file(os.path.join(self.root, "sub", "new.txt"), b"something new\n")
+        self.assertEqual(self.find("contains:something", True), ["a.txt", "new.txt"])
+
+        os.remove(os.path.join(self.root, "b.txt"))
+        stats = self.index.update(self.root)
+        self.assertEqual(stats.indexed, 2)
+        self.assertEqual(stats.unchanged, 2)
+        self.assertEqual(stats.removed, 1)
+        self.assertEqual(self.find("contains:something", True), ["a.txt", "new.txt"])
+        self.assertEqual(self.find("contains:world", True), [])
+
+    def test_merge_segments(self) -> None:
+        with mock.patch.object(ContentIndex, "MAX_SEGMENTS", 1):
+            self.index.update(self.root)
+            write_file(os.path.join(self.root, "a.txt"), b"Hello again!\n")
+            self.index.update(self.root)
+        self.assertEqual(self.index._segment_count(), 1)
+        self.assertEqual(self.find("contains:hello", True), ["a.txt"])
+        self.assertEqual(self.find("contains:world", True), ["b.txt"])
+
+
+# EOF #
@@ -42,6 +42,9 @@ class ExprTestCase(unittest.TestCase):
             "5 // 2",
             "float('5.234')",
             "int(5.234)",
+            "5 >= 3",
+            "5 <= 3",
+            "2 < 3 <= 4",
         ]
 
         parser = Parser()
@@ -0,0 +1,336 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dirtoo.filecollection.columns import evaluate
+from dirtoo.filecollection.compact_file_store import CompactFileStore
+from dirtoo.filecollection.file_collection import FileCollection
+from dirtoo.filecollection.filter import Filter
+from dirtoo.filecollection.grouper import DirectoryGrouper
+from dirtoo.filecollection.sort_order import SortOrder
+from dirtoo.filecollection.sorter import Sorter, name_key
+from dirtoo.filter.filter_expr_parser import FilterExprParser
+from dirtoo.filesystem.file_info import FileInfo
+from dirtoo.filesystem.location import Location
+from dirtoo.sort import numeric_sort_key
+
+
+class FileCollectionTestCase(unittest.TestCase):
+
+    def test_add_fileinfos(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ["c", "a", "b", "d"]:
+                with open(os.path.join(tmpdir, name), "w"):
+                    pass
+
+            batches: list[list[FileInfo]] = []
+            collection = FileCollection()
+            collection.sig_files_added.connect(batches.append)
+
+            collection.add_fileinfo(FileInfo.from_path(os.path.join(tmpdir, "d")))
+            collection.add_fileinfos([FileInfo.from_path(os.path.join(tmpdir, name)) for name in "cab"])
+
+            self.assertEqual([fi.basename() for fi in collection.get_fileinfos()], ["a", "b", "c", "d"])
+            self.assertEqual([[fi.basename() for fi in batch] for batch in batches], [["c", "a", "b"]])
+            self.assertIsNotNone(collection.get_fileinfo(Location.from_path(os.path.join(tmpdir, "a"))))
+
+    def test_set_filter(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.mkdir(os.path.join(tmpdir, "dir.txt"))
+            for idx, name in enumerate(["a.txt", "B.TXT", ".txt", "c.png", "long_name.png", "d"]):
+                path = os.path.join(tmpdir, name)
+                with open(path, "wb") as fout:
+                    fout.write(b"x" * idx * 100)
+                os.utime(path, (0, 86400 * 365 * (30 + idx)))
+
+            collection = FileCollection()
+            collection.set_fileinfos(FileInfo.from_path(os.path.join(tmpdir, name))
+                                     for name in sorted(os.listdir(tmpdir)))
+            collection.update_metadata(Location.from_path(os.path.join(tmpdir, "c.png")), {"width": 640})
+
+            parser = FilterExprParser()
+            for query in ["", "*.txt", "-*.txt", "size:>150", "*.png OR size:<150", "len:<6 -*.png",
+                          "date:>2003", "date:<=2002-06", "weekday:<3", "width:>320", "-width:>320",
+                          "type:dir", "c* OR *.txt size:<1", "glob:*.TXT", "fuzzy:long_nam",
+                          "fuzzy:nam -*.txt", "time:>=12", "time:<10:30 OR time:>23", "date:*-01",
+                          "time:*:*:0?"]:
+                filt = Filter()
+                filt.set_match_func(parser.parse(query))
+                collection.set_filter(filt)
+                result = [fi.is_excluded for fi in collection.get_fileinfos()]
+
+                for fi in collection.get_fileinfos():
+                    filt.apply(fi)
+                self.assertEqual(result, [fi.is_excluded for fi in collection.get_fileinfos()], query)
+
+    def test_refine_filter(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ["foo.txt", "foobar.txt", "foo.png", "bar.txt"]:
+                with open(os.path.join(tmpdir, name), "w"):
+                    pass
+
+            collection = FileCollection()
+            collection.set_fileinfos(FileInfo.from_path(os.path.join(tmpdir, name))
+                                     for name in sorted(os.listdir(tmpdir)))
+
+            parser = FilterExprParser()
+            filt = Filter()
+
+            def visible(query: str) -> list[str]:
+                filt.set_match_func(parser.parse(query), query)
+                collection.set_filter(filt)
+                return [fi.basename() for fi in collection.get_fileinfos() if not fi.is_excluded]
+
+            with mock.patch("dirtoo.filecollection.filter.evaluate", wraps=evaluate) as evaluate_mock:
+                self.assertEqual(visible("foo"), ["foo.png", "foo.txt", "foobar.txt"])
+                self.assertEqual(visible("foo *.txt"), ["foo.txt", "foobar.txt"])
+                self.assertEqual(len(evaluate_mock.call_args.args[2]), 3)
+
+                self.assertEqual(visible("foob *.txt"), ["foobar.txt"])
+                self.assertEqual(len(evaluate_mock.call_args.args[2]), 2)
+
+                # going back is answered from the cache
+                evaluate_mock.reset_mock()
+                self.assertEqual(visible("foo"), ["foo.png", "foo.txt", "foobar.txt"])
+                evaluate_mock.assert_not_called()
+
+                self.assertEqual(visible("bar OR foo"), ["bar.txt", "foo.png", "foo.txt", "foobar.txt"])
+                self.assertEqual(len(evaluate_mock.call_args.args), 2)
+
+    def test_filter_contents(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, content in [("a.txt", "hello"), ("b.txt", "world"), ("c.png", "hello")]:
+                with open(os.path.join(tmpdir, name), "w") as fout:
+                    fout.write(content)
+
+            collection = FileCollection()
+            collection.set_fileinfos(FileInfo.from_path(os.path.join(tmpdir, name))
+                                     for name in sorted(os.listdir(tmpdir)))
+
+            parser = FilterExprParser()
+            filt = Filter()
+
+            def visible(query: str) -> list[str]:
+                filt.set_match_func(parser.parse(query), query)
+                collection.set_filter(filt)
+                return [fi.basename() for fi in collection.get_fileinfos() if not fi.is_excluded]
+
+            self.assertEqual(visible("*.txt"), ["a.txt", "b.txt"])
+            self.assertEqual(visible("*.txt contains:hello"), ["a.txt"])
+
+            # the contents are looked at again, without the collection
+            # being told about the change
+            with open(os.path.join(tmpdir, "b.txt"), "w") as fout:
+                fout.write("hello world")
+            self.assertEqual(visible("*.txt contains:hello"), ["a.txt", "b.txt"])
+            self.assertEqual(visible("contains:hello"), ["a.txt", "b.txt", "c.png"])
+
+    def test_compact_store(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.mkdir(os.path.join(tmpdir, "dir"))
+            for idx, name in enumerate(["a.txt", "B.TXT", ".hidden", "c.png", "dir/d.png", "dir/e.txt"]):
+                path = os.path.join(tmpdir, name)
+                with open(path, "wb") as fout:
+                    fout.write(b"x" * idx * 100)
+                os.utime(path, (0, 86400 * 365 * (30 + idx) + 0.5))
+            paths = [os.path.join(dirpath, name)
+                     for dirpath, dirnames, filenames in os.walk(tmpdir)
+                     for name in dirnames + filenames]
+
+            collections = [FileCollection(), FileCollection(CompactFileStore)]
+            for collection in collections:
+                collection.set_fileinfos(FileInfo.from_path(path) for path in paths[:4])
+                collection.add_fileinfos([FileInfo.from_path(path) for path in paths[4:]])
+                collection.remove_file(Location.from_path(os.path.join(tmpdir, "B.TXT")))
+                collection.update_metadata(Location.from_path(os.path.join(tmpdir, "c.png")), {"width": 640})
+
+            def state(collection: FileCollection) -> list[tuple[object, ...]]:
+                return [(fi.location(), fi.abspath(), fi.dirname(), fi.basename(), fi.ext(), fi.isdir(),
+                         fi.stat(), fi.mtime(), fi.get_metadata_keys(), fi.is_excluded, fi.is_hidden, fi.group)
+                        for fi in collection.get_fileinfos()]
+
+            object_collection, compact_collection = collections
+            self.assertEqual(state(object_collection), state(compact_collection))
+
+            parser = FilterExprParser()
+            for query in ["*.txt", "size:>150 OR width:>320", "fuzzy:dir", "a* OR *.png"]:
+                for collection in collections:
+                    filt = Filter()
+                    filt.show_hidden = False
+                    filt.set_match_func(parser.parse(query), query)
+                    collection.set_filter(filt)
+                self.assertEqual(state(object_collection), state(compact_collection), query)
+
+            sorter = Sorter()
+            sorter.set_directories_first(False)
+            sorter.set_sort_reversed(True)
+            for collection in collections:
+                collection.set_sorter(sorter)
+                collection.set_grouper(DirectoryGrouper())
+            self.assertEqual(state(object_collection), state(compact_collection))
+
+            # FileInfo objects stay the same while they are referenced
+            location = Location.from_path(os.path.join(tmpdir, "dir", "e.txt"))
+            fileinfo = compact_collection.get_fileinfo(location)
+            assert fileinfo is not None
+            self.assertIs(compact_collection[compact_collection.index(fileinfo)], fileinfo)
+
+            modified = FileInfo.from_path(os.path.join(tmpdir, "dir", "e.txt"))
+            compact_collection.modify_file(modified)
+            self.assertIs(compact_collection.get_fileinfo(location), modified)
+            self.assertEqual(len(compact_collection), len(object_collection))
+
+    def test_reclaim_rows(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            names = ["file{}.txt".format(idx) for idx in range(20)]
+            os.mkdir(os.path.join(tmpdir, "dir"))
+            for name in names:
+                with open(os.path.join(tmpdir, name), "w"):
+                    pass
+
+            def location(name: str) -> Location:
+                return Location.from_path(os.path.join(tmpdir, name))
+
+            with mock.patch.object(SortOrder, "COMPACT_MIN_DEAD", 4):
+                for store in [None, CompactFileStore]:
+                    collection = FileCollection(store)
+                    collection.set_fileinfos(FileInfo.from_path(os.path.join(tmpdir, name))
+                                             for name in names + ["dir"])
+                    collection.update_metadata(location("file3.txt"), {"width": 640})
+
+                    for step in range(200):
+                        name = names[step % len(names)]
+                        if step % 7 == 0:
+                            collection.remove_file(location(name))
+                            collection.add_fileinfo(FileInfo.from_path(os.path.join(tmpdir, name)))
+                        else:
+                            collection.modify_file(FileInfo.from_path(os.path.join(tmpdir, name)))
+
+                    # removed and replaced files don't leave rows behind forever
+                    order = collection._store._order  # type: ignore
+                    self.assertLessEqual(order._count, 2 * len(collection))
+
+                    fileinfos = collection.get_fileinfos()
+                    self.assertEqual([fi.basename() for fi in fileinfos],
+                                     ["dir"] + sorted(names, key=numeric_sort_key))
+                    self.assertEqual([collection.index(fi) for fi in fileinfos], list(range(len(fileinfos))))
+                    for name in names:
+                        fileinfo = collection.get_fileinfo(location(name))
+                        assert fileinfo is not None
+                        self.assertEqual(fileinfo.basename(), name)
+
+                    filt = Filter()
+                    filt.set_match_func(FilterExprParser().parse("file1*"), "file1*")
+                    collection.set_filter(filt)
+                    self.assertEqual([fi.basename() for fi in collection.get_fileinfos() if not fi.is_excluded],
+                                     ["file1.txt"] + ["file{}.txt".format(idx) for idx in range(10, 20)])
+
+    def test_set_sorter(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            names = ["img10.jpg", "img9.jpg", "IMG2.jpg", "b.mkv", "a.mkv", "c.mkv", "dir1", "Dir10", "dir2"]
+            for idx, name in enumerate(names):
+                path = os.path.join(tmpdir, name)
+                if name.lower().startswith("dir"):
+                    os.mkdir(path)
+                else:
+                    with open(path, "wb") as fout:
+                        fout.write(b"x" * (idx % 4) * 100)
+
+            def duration_key(fileinfo: FileInfo) -> object:
+                return fileinfo.get_metadata_or('duration', 0)
+
+            def old_name_key(fileinfo: FileInfo) -> object:
+                return numeric_sort_key(fileinfo.basename().lower())
+
+            for store in [None, CompactFileStore]:
+                collection = FileCollection(store)
+                collection.set_fileinfos(FileInfo.from_path(os.path.join(tmpdir, name)) for name in names[:5])
+                collection.update_metadata(Location.from_path(os.path.join(tmpdir, "b.mkv")), {"duration": 500})
+
+                sorter = Sorter()
+                steps = [(name_key, old_name_key), (FileInfo.size, FileInfo.size),
+                         (duration_key, duration_key), (name_key, old_name_key)]
+                for step, (key_func, expected_key) in enumerate(steps):
+                    sorter.set_key_func(key_func)
+                    sorter.set_directories_first(step != 2)
+                    collection.set_sorter(sorter)
+
+                    collection.add_fileinfo(FileInfo.from_path(os.path.join(tmpdir, names[5 + step])))
+                    collection.remove_file(Location.from_path(os.path.join(tmpdir, names[step])))
+                    collection.update_metadata(Location.from_path(os.path.join(tmpdir, "a.mkv")),
+                                               {"duration": 100 * step})
+
+                    # files with equal keys may come in any order
+                    fileinfos = collection.get_fileinfos()
+                    keys = [((not fi.isdir()) if step != 2 else False, expected_key(fi)) for fi in fileinfos]
+                    self.assertEqual(keys, sorted(keys), (store, step))
+                    self.assertEqual(len(fileinfos), 5)
+                    self.assertEqual([collection.index(fi) for fi in fileinfos], list(range(len(fileinfos))))
+
+    def test_update_metadata(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            names = ["video{}.mkv".format(idx) for idx in range(40)]
+            for name in names:
+                with open(os.path.join(tmpdir, name), "w"):
+                    pass
+
+            calls: list[str] = []
+
+            def duration_key(fileinfo: FileInfo) -> object:
+                calls.append(fileinfo.basename())
+                return fileinfo.get_metadata_or('duration', 0)
+
+            for store in [None, CompactFileStore]:
+                collection = FileCollection(store)
+                collection.set_fileinfos(FileInfo.from_path(os.path.join(tmpdir, name)) for name in names)
+
+                def update(name: str, metadata: dict[str, object]) -> None:
+                    collection.update_metadata(Location.from_path(os.path.join(tmpdir, name)), metadata)
+
+                def durations() -> list[object]:
+                    return [fi.get_metadata_or('duration', 0) for fi in collection.get_fileinfos()]
+
+                sorter = Sorter()
+                sorter.set_key_func(duration_key, ['duration'])
+                collection.set_sorter(sorter)
+
+                # moved one by one
+                update("video7.mkv", {"duration": 70})
+                update("video3.mkv", {"duration": 30})
+                self.assertEqual(durations()[-2:], [30, 70])
+
+                # moved all at once
+                for idx, name in enumerate(names):
+                    update(name, {"duration": (idx * 7) % 40})
+                self.assertEqual(durations(), sorted(durations()))
+                self.assertEqual([collection.index(fi) for fi in collection.get_fileinfos()], list(range(40)))
+
+                # metadata the key doesn't look at leaves it alone
+                calls.clear()
+                update("video5.mkv", {"width": 640})
+                self.assertEqual(calls, [])
+
+                update("video5.mkv", {"duration": 1000})
+                self.assertEqual(calls, ["video5.mkv"])
+                self.assertEqual(collection[39].basename(), "video5.mkv")
+
+
+# EOF #
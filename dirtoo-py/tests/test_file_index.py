@@ -0,0 +1,123 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Optional
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from dirtoo.find.file_entry import SyscallStats
+from dirtoo.find.file_index import FileIndex, _glob_to_sql, to_sql
+from dirtoo.find.filter import Filter, SimpleFilter
+from dirtoo.find.util import find_files
+from dirtoo.filter.filter_expr_parser import FilterExprParser
+
+from tests.test_find import CollectAction
+
+
+def write_file(path: str, size: int) -> None:
+    with open(path, "wb") as fout:
+        fout.write(b"x" * size)
+
+
+class FileIndexTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmpdir.name, "root")
+        os.makedirs(os.path.join(self.root, "sub", "deep"))
+        write_file(os.path.join(self.root, "a.txt"), 10)
+        write_file(os.path.join(self.root, "B.TXT"), 2000)
+        write_file(os.path.join(self.root, "sub", "c.png"), 3000)
+        write_file(os.path.join(self.root, "sub", "deep", "d.txt"), 5)
+        os.symlink("sub", os.path.join(self.root, "link"))
+
+        self.index = FileIndex(os.path.join(self.tmpdir.name, "index.sqlite"))
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def find(self, query: str, index: Optional[FileIndex], maxdepth: Optional[int] = None,
+             stats: Optional[SyscallStats] = None) -> list[str]:
+        action = CollectAction()
+        filter_op: Filter = SimpleFilter.from_string(query)
+        find_files(self.root, filter_op, action, topdown=True, maxdepth=maxdepth,
+                   stats=stats, index=index)
+        return sorted(entry.path for entry in action.entries)
+
+    def test_query(self) -> None:
+        self.index.update(self.root)
+        self.assertTrue(self.index.covers(os.path.join(self.root, "sub")))
+        self.assertFalse(self.index.covers(self.tmpdir.name))
+
+        for query in ["", "*.txt", "*.TXT", "glob:b*", "Glob:b*", "size:>100", "-size:>100 txt",
+                      "regex:^[a-c]", "*.png OR size:<6", "length:5", "date:>2000", "date:<2000",
+                      "weekday:>=0 *.txt", "prune:deep *.txt", "prune:sub", "fuzzy:d.tx", "fuzzy:B.TX",
+                      "time:>=12", "weekday:6 OR date:*-01"]:
+            expected = self.find(query, None)
+            self.assertEqual(self.find(query, self.index), expected, query)
+
+        self.assertEqual(self.find("*.txt", self.index, maxdepth=1),
+                         self.find("*.txt", None, maxdepth=1))
+
+    def test_no_syscalls(self) -> None:
+        self.index.update(self.root)
+        stats = SyscallStats()
+        self.assertEqual(len(self.find("size:>100 date:>2000", self.index, stats=stats)), 2)
+        self.assertEqual(stats.total(), 0)
+
+    def test_incremental_update(self) -> None:
+        stats = self.index.update(self.root)
+        self.assertEqual(stats.dirs_scanned, 3)
+        self.assertEqual(stats.files, 5)
+
+        stats = self.index.update(self.root)
+        self.assertEqual(stats.dirs_scanned, 0)
+        self.assertEqual(stats.dirs_unchanged, 3)
+
+        write_file(os.path.join(self.root, "sub", "new.txt"), 1)
+        shutil.rmtree(os.path.join(self.root, "sub", "deep"))
+        stats = self.index.update(self.root)
+        self.assertEqual(stats.dirs_scanned, 1)
+        self.assertEqual(stats.dirs_removed, 1)
+        self.assertEqual(self.find("*.txt", self.index), self.find("*.txt", None))
+
+    def test_fallback(self) -> None:
+        self.index.update(os.path.join(self.root, "sub"))
+        self.assertFalse(self.index.covers(self.root))
+        self.assertEqual(self.find("*.txt", self.index), self.find("*.txt", None))
+
+        # indexing the parent directory absorbs the existing root
+        self.index.update(self.root)
+        self.assertEqual(self.index.roots(), [self.root])
+
+    def test_to_sql(self) -> None:
+        self.assertEqual(_glob_to_sql("*.[!ab]?"), "*.[^ab]?")
+        self.assertEqual(_glob_to_sql("a[b"), "a[[]b")
+        self.assertIsNone(_glob_to_sql("[^a]"))
+
+        parser = FilterExprParser()
+        predicate = to_sql(parser.parse("*.txt contains:foo"))
+        assert predicate is not None
+        self.assertFalse(predicate.exact)
+        self.assertIsNone(to_sql(parser.parse("*.txt OR contains:foo")))
+
+
+# EOF #
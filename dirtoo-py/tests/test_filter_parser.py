@@ -15,9 +15,33 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+from typing import Any
+
+import datetime
+import os
 import unittest
+from unittest import mock
 
+from dirtoo.filesystem.file_info import FileInfo
 from dirtoo.filter.filter_expr_parser import FilterExprParser
+from dirtoo.filter.local_time import local_seconds, local_weekday, seconds_of_day
+from dirtoo.filter.match_func import MatchFunc, AndMatchFunc, GlobMatchFunc, MultiGlobMatchFunc, explain
+from dirtoo.filter.match_func_compiler import CompiledMatchFunc, compile_match_func
+
+
+class CountingMatchFunc(MatchFunc):
+
+    def __init__(self, result: bool, cost: float) -> None:
+        self._result = result
+        self._cost = cost
+        self.calls = 0
+
+    def __call__(self, fileinfo: Any) -> bool:
+        self.calls += 1
+        return self._result
+
+    def cost(self) -> float:
+        return self._cost
 
 
 class UtilTestCase(unittest.TestCase):
@@ -70,4 +94,117 @@ class UtilTestCase(unittest.TestCase):
             self.assertEqual(result, expected)
             parser.parse(text)
 
+    def test_filter_plan(self) -> None:
+        parser = FilterExprParser()
+        func = parser.parse("contains:foo *.txt -size:>5MB")
+        self.assertEqual(explain(func),
+                         "OR  cost=111\n"
+                         "  AND  cost=111\n"
+                         "    *.txt  cost=1\n"
+                         "    -size:>5MB  cost=10\n"
+                         "    contains:foo  cost=100\n")
+
+    def test_adaptive_and(self) -> None:
+        always = CountingMatchFunc(True, 1)
+        never = CountingMatchFunc(False, 2)
+        func = AndMatchFunc([always, never])
+        fileinfo = FileInfo.from_path("x")
+        for _ in range(AndMatchFunc.REPLAN_INTERVAL * 2):
+            self.assertFalse(func(fileinfo))
+        self.assertEqual(func.children(), [never, always])
+        self.assertLess(always.calls, AndMatchFunc.REPLAN_INTERVAL + 1)
+
+    def test_replan_while_evaluating(self) -> None:
+        first = CountingMatchFunc(True, 1)
+        last = CountingMatchFunc(True, 3)
+
+        class ReplanningMatchFunc(CountingMatchFunc):
+
+            def __call__(self, fileinfo: Any) -> bool:
+                # as another thread sharing the tree would, moving the
+                # first child to the end
+                stats = func.child_stats()[0]
+                stats.evaluated, stats.passed = 1000, 1000
+                func._replan()
+                return super().__call__(fileinfo)
+
+        func = AndMatchFunc([first, ReplanningMatchFunc(True, 2), last])
+        self.assertTrue(func(FileInfo.from_path("x")))
+        self.assertEqual((first.calls, last.calls), (1, 1))
+        self.assertEqual(func.children()[-1], first)
+
+    def test_compiled(self) -> None:
+        directory = os.path.dirname(__file__)
+        fileinfos = [FileInfo.from_path(os.path.join(directory, name)) for name in sorted(os.listdir(directory))]
+
+        parser = FilterExprParser()
+        for query in ["", "*.py", "-*.py", "Glob:TEST_*", "*.rar OR *.7z", "regex:^test_f size:>1000",
+                      "size:<2000 OR length:<12 *.py", "date:>2000 weekday:<7", "date:<=2000-01",
+                      "type:dir", "*.py OR size:>1000 -length:12", "time:<12:30 date:>=2000-01-01",
+                      "weekday:>=5 OR time:>23", "date:*-01 time:*:00"]:
+            with mock.patch.object(CompiledMatchFunc, "WARMUP_CALLS", 0):
+                compiled = compile_match_func(parser.parse(query))
+            self.assertIsNotNone(compiled.source, query)
+            self.assertEqual([compiled(fi) for fi in fileinfos],
+                             [parser.parse(query)(fi) for fi in fileinfos], query)
+
+    def test_compile_after_warm_up(self) -> None:
+        always = CountingMatchFunc(True, 1)
+        never = CountingMatchFunc(False, 2)
+        tree = AndMatchFunc([always, never])
+        compiled = compile_match_func(tree)
+        fileinfo = FileInfo.from_path("x")
+
+        for _ in range(CompiledMatchFunc.WARMUP_CALLS):
+            self.assertIsNone(compiled.source)
+            self.assertFalse(compiled.function(fileinfo))
+
+        # compiled in the order the tree arrived at
+        self.assertIsNotNone(compiled.source)
+        self.assertEqual(tree.children(), [never, always])
+        calls = always.calls
+        for _ in range(100):
+            self.assertFalse(compiled.function(fileinfo))
+        self.assertEqual(always.calls, calls)
+        self.assertEqual(never.calls, CompiledMatchFunc.WARMUP_CALLS + 100)
+
+        # nothing to wait for without AndMatchFunc/OrMatchFunc
+        self.assertIsNotNone(compile_match_func(GlobMatchFunc("*.py")).source)
+
+    def test_local_time(self) -> None:
+        # before 1970, around now and after the end of local_days()
+        for mtime in [-86400 * 400 + 0.25, 0.0, 1616893200.5, 1635638399.0, 1700000000.75, 4102444800.5]:
+            dt = datetime.datetime.fromtimestamp(mtime)
+            self.assertEqual(local_weekday(mtime), dt.weekday(), mtime)
+            self.assertAlmostEqual(local_seconds(mtime), seconds_of_day(dt), places=5, msg=mtime)
+
+    def test_merge_globs(self) -> None:
+        parser = FilterExprParser()
+        func = parser.parse("*.jpg OR *.PNG OR test_* OR G:*.Py OR size:>5")
+        self.assertEqual(len(func.children()), 2)
+
+        multi = func.children()[0]
+        assert isinstance(multi, MultiGlobMatchFunc)
+        self.assertEqual(multi.exts, {".jpg", ".png"})
+        self.assertEqual(multi.case_sensitive_exts, {".Py"})
+
+        for name in ["a.jpg", "b.PNG", ".png", "x.png.gz", "png", "test_a", "Test_b", "a.Py", "a.py", "\u00e4.jpg"]:
+            expected = any(glob._match_name(name) for glob in multi.children() if isinstance(glob, GlobMatchFunc))
+            self.assertEqual(multi._match_name(name), expected, name)
+
+            bytes_func = multi.bytes_name_func()
+            assert bytes_func is not None
+            self.assertEqual(bool(bytes_func(name.encode())), expected, name)
+
+    def test_parse_cache(self) -> None:
+        # the parse is shared, but each call gets MatchFuncs of its own
+        query = r'foo\ bar "a\"b" -size:>5'
+        first = FilterExprParser().parse(query)
+        second = FilterExprParser().parse(query)
+        self.assertIsNot(first, second)
+        self.assertEqual(explain(first), explain(second))
+        self.assertEqual([child.label for child in first.children()[0].children()],
+                         ["foo bar", 'a"b', "-size:>5"])
+
+
 # EOF #
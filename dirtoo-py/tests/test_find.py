@@ -0,0 +1,193 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Any, Optional
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from dirtoo.find.action import compile_format, Action, PrinterAction, ExprSorterAction, ExecAction
+from dirtoo.find.file_entry import FileEntry, SyscallStats
+from dirtoo.find.filter import ExprFilter, SimpleFilter
+from dirtoo.find.util import find_files
+
+
+class CollectAction(Action):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.entries: list[FileEntry] = []
+
+    def file(self, entry: FileEntry) -> None:
+        self.entries.append(entry)
+
+
+class RawCollectAction(CollectAction):
+    """Gets the files through the default Action.raw_file()"""
+
+    accepts_bytes = True
+
+
+class FindTestCase(unittest.TestCase):
+
+    def test_compile_format(self) -> None:
+        segments = compile_format("a{p}b{_:>5}")
+        self.assertEqual([(literal, fmt) for literal, _, fmt in segments],
+                         [("a", ""), ("b", ">5")])
+        self.assertEqual(compile_format("plain")[0][1], None)
+
+    def test_printer_action(self) -> None:
+        action = PrinterAction("{p} [{_:>8}] {q}\n")
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            action.file(FileEntry("dir", "foo.txt"))
+            action.file(FileEntry("dir", "bar baz"))
+        self.assertEqual(out.getvalue(),
+                         "dir/foo.txt [ foo.txt] foo.txt\n"
+                         "dir/bar baz [ bar baz] 'bar baz'\n")
+
+    def test_expr_filter(self) -> None:
+        filt = ExprFilter('iname("*.TXT") and _ != "skip.txt"')
+        self.assertTrue(filt.match_file(FileEntry("dir", "foo.txt")))
+        self.assertFalse(filt.match_file(FileEntry("dir", "skip.txt")))
+        self.assertFalse(filt.match_file(FileEntry("dir", "foo.png")))
+
+    def test_sorter(self) -> None:
+        names = ["c{}".format(i % 7) + "x" * (i % 3) for i in range(3000)]
+
+        def run(expr: Optional[str], reverse: bool, **kwargs: Any) -> list[str]:
+            action = CollectAction()
+            sorter = ExprSorterAction(expr, reverse, action, **kwargs)
+            for name in names:
+                sorter.file(FileEntry("dir", name))
+            sorter.finish()
+            return [entry.name for entry in action.entries]
+
+        by_len = sorted(names, key=len)
+        by_len_reversed = sorted(names, key=len, reverse=True)
+        self.assertEqual(run("len(_)", False), by_len)
+        self.assertEqual(run("len(_)", True), by_len_reversed)
+        self.assertEqual(run(None, True), list(reversed(names)))
+
+        # spill to temporary files after a few hundred files
+        self.assertEqual(run("len(_)", False, memory_limit=100000), by_len)
+        self.assertEqual(run("len(_)", True, memory_limit=100000), by_len_reversed)
+
+        self.assertEqual(run("len(_)", False, head=5), by_len[:5])
+        self.assertEqual(run("len(_)", True, tail=5), by_len_reversed[-5:])
+        self.assertEqual(run(None, False, tail=3), names[-3:])
+        self.assertEqual(run(None, False, tail=0), [])
+
+    def test_exec_action(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out = os.path.join(tmpdir, "out")
+            names = ["file{:03d}".format(i) for i in range(100)]
+
+            # batches are split to fit into 'command_size'
+            action = ExecAction("sh -c 'echo \"$@\" >> {}' sh {{}}+".format(out), command_size=512)
+            for name in names:
+                action.file(FileEntry("", name))
+            action.finish()
+            with open(out) as fin:
+                lines = fin.read().splitlines()
+            self.assertGreater(len(lines), 1)
+            self.assertEqual(" ".join(lines).split(), names)
+            self.assertEqual(action.exit_status(), 0)
+
+            action = ExecAction("touch {}", jobs=4)
+            for name in names:
+                action.file(FileEntry(tmpdir, name))
+            action.finish()
+            self.assertTrue(all(os.path.exists(os.path.join(tmpdir, name)) for name in names))
+
+            action = ExecAction("test -e {}", jobs=2)
+            with contextlib.redirect_stderr(io.StringIO()):
+                action.file(FileEntry(tmpdir, "file000"))
+                action.file(FileEntry(tmpdir, "does-not-exist"))
+                action.finish()
+            self.assertEqual(action.failed, 1)
+            self.assertEqual(action.exit_status(), 1)
+
+    def test_single_stat(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ["a.txt", "b.txt", "c.png"]:
+                with open(os.path.join(tmpdir, name), "w") as fout:
+                    fout.write(name)
+
+            stats = SyscallStats()
+            action = CollectAction()
+            find_files(tmpdir, SimpleFilter.from_string("*.txt"), action,
+                       topdown=True, maxdepth=1, stats=stats)
+            self.assertEqual(sorted(e.name for e in action.entries), ["a.txt", "b.txt"])
+            self.assertEqual(stats.lstat, 0)
+
+            stats = SyscallStats()
+            action = CollectAction()
+            find_files(tmpdir, ExprFilter("size() > 0 and mtime() > 0 and not isdir()"), action,
+                       topdown=True, maxdepth=1, stats=stats)
+            self.assertEqual(len(action.entries), 3)
+            self.assertEqual(stats.scandir, 1)
+            self.assertEqual(stats.lstat, 3)
+
+    def test_prune(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for path in ["a.txt", "node_modules/b.txt", "src/c.txt", "src/build/d.txt", "src/e.log"]:
+                os.makedirs(os.path.join(tmpdir, os.path.dirname(path)), exist_ok=True)
+                with open(os.path.join(tmpdir, path), "w"):
+                    pass
+
+            def find(query: str, **kwargs: Any) -> list[str]:
+                action = CollectAction()
+                find_files(tmpdir, SimpleFilter.from_string(query), action,
+                           topdown=True, maxdepth=None, **kwargs)
+                return sorted(os.path.relpath(e.path, tmpdir) for e in action.entries)
+
+            stats = SyscallStats()
+            self.assertEqual(find("prune:node_modules prune:build", stats=stats),
+                             ["a.txt", "src/c.txt", "src/e.log"])
+            self.assertEqual(stats.pruned, 2)
+            self.assertEqual(stats.scandir, 2)
+
+            self.assertEqual(find("*.txt prune:node_modules"), ["a.txt", "src/build/d.txt", "src/c.txt"])
+            self.assertEqual(find("*.log OR prune:src"), [])
+
+            self.assertEqual(find("*.txt", prune=ExprFilter('_ == "src"').match_file),
+                             ["a.txt", "node_modules/b.txt"])
+
+    def test_bytes_mode(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ["a.txt", "B.TXT", "ä.txt", "Ä.TXT", "c.png"]:
+                with open(os.path.join(tmpdir, name), "w"):
+                    pass
+            with open(os.path.join(os.fsencode(tmpdir), b"\xff.txt"), "w"):
+                pass
+
+            for query in ["*.txt", "?.txt", "regex:^[a-c]", "-*.png size:<1", "Glob:*.TXT"]:
+                results = []
+                for bytes_mode, action in [(False, CollectAction()), (True, CollectAction()),
+                                           (True, RawCollectAction())]:
+                    find_files(tmpdir, SimpleFilter.from_string(query), action,
+                               topdown=True, maxdepth=None, bytes_mode=bytes_mode)
+                    results.append(sorted(entry.path for entry in action.entries))
+                self.assertEqual(results[0], results[1], query)
+                self.assertEqual(results[0], results[2], query)
+
+
+# EOF #
@@ -0,0 +1,51 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import unittest
+
+from dirtoo.fuzzy import FuzzyNeedle, NGramIndex, fuzzy, ngram
+
+
+class FuzzyTestCase(unittest.TestCase):
+
+    def test_fuzzy(self) -> None:
+        self.assertEqual(ngram("abcd"), {"abc", "bcd"})
+        self.assertEqual(fuzzy("hello", "hello world"), 1.0)
+        self.assertAlmostEqual(fuzzy("hello", "help"), 1 / 3)
+        self.assertEqual(fuzzy("ab", "ab"), 0.0)
+
+    def test_ngram_index(self) -> None:
+        texts = ["hello_world.txt", "", "hello", "world", "hellö wörld", "xx", "help.txt",
+                 os.fsdecode(b"foo\xffbar")]
+        for n in [1, 2, 3]:
+            index = NGramIndex(texts, n)
+            for needle in ["hello", "wörld", "txt", "lo_w", "q", "bar", os.fsdecode(b"o\xffb")]:
+                fuzzy_needle = FuzzyNeedle(needle, n)
+                self.assertEqual(list(index.scores(fuzzy_needle)),
+                                 [fuzzy_needle.score(text) for text in texts], (needle, n))
+
+        with self.assertRaises(ValueError):
+            NGramIndex(texts, 4)
+
+    def test_rank(self) -> None:
+        index = NGramIndex(["help", "hello world", "yellow", "hello"])
+        self.assertEqual(index.rank(FuzzyNeedle("hello")), [(1, 1.0), (3, 1.0), (2, 2 / 3), (0, 1 / 3)])
+        self.assertEqual(index.rank(FuzzyNeedle("hello"), 0.5), [(1, 1.0), (3, 1.0), (2, 2 / 3)])
+
+
+# EOF #
@@ -0,0 +1,71 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dirtoo.hash_cache import HashCache
+
+
+class HashCacheTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = HashCache(os.path.join(self.tmpdir.name, "hashes.sqlite"), max_entries=4)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def write(self, name: str, content: bytes) -> str:
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "wb") as fout:
+            fout.write(content)
+        return path
+
+    def test_get(self) -> None:
+        path = self.write("a", b"hello")
+        self.assertEqual(self.cache.get(path, "sha1"), hashlib.sha1(b"hello").hexdigest())
+        self.assertEqual(self.cache.get(path, "md5"), hashlib.md5(b"hello").hexdigest())
+
+        with mock.patch("dirtoo.hash_cache.hash_file") as hash_file:
+            self.assertEqual(self.cache.get(path, "sha1"), hashlib.sha1(b"hello").hexdigest())
+            hash_file.assert_not_called()
+
+        # a different size invalidates the entry
+        self.write("a", b"hello world")
+        self.assertEqual(self.cache.get(path, "sha1"), hashlib.sha1(b"hello world").hexdigest())
+
+    def test_get_many(self) -> None:
+        paths = [self.write("file{}".format(i), str(i).encode()) for i in range(3)]
+        expected = {path: hashlib.sha1(str(i).encode()).hexdigest() for i, path in enumerate(paths)}
+
+        self.assertEqual(self.cache.get_many(paths + ["does-not-exist"], jobs=2), expected)
+        self.assertEqual(self.cache.get_many(paths), expected)
+
+    def test_eviction(self) -> None:
+        paths = [self.write("file{}".format(i), str(i).encode()) for i in range(10)]
+        self.cache.get_many(paths)
+        self.cache._evict()
+        (count,) = self.cache._db.execute("SELECT count(*) FROM hashes").fetchone()
+        self.assertLessEqual(count, 4)
+
+
+# EOF #
@@ -0,0 +1,78 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import unittest
+
+from dirtoo.find.file_entry import SyscallStats
+from dirtoo.find.filter import NoFilter
+from dirtoo.find.ignore import IgnoreFile, IgnoreMatcher
+from dirtoo.find.util import find_files
+
+from tests.test_find import CollectAction
+
+
+class IgnoreTestCase(unittest.TestCase):
+
+    def test_ignore_file(self) -> None:
+        ignore = IgnoreFile("base", ["# comment", "", "*.o", "/build/", "doc/**/*.html", "cache/"])
+
+        self.assertTrue(ignore.match("foo.o", "foo.o", False))
+        self.assertTrue(ignore.match("src/foo.o", "foo.o", False))
+        self.assertIsNone(ignore.match("foo.c", "foo.c", False))
+
+        # anchored to the directory of the ignore file
+        self.assertTrue(ignore.match("build", "build", True))
+        self.assertIsNone(ignore.match("src/build", "build", True))
+        self.assertIsNone(ignore.match("build", "build", False))
+
+        self.assertTrue(ignore.match("doc/index.html", "index.html", False))
+        self.assertTrue(ignore.match("doc/a/b/index.html", "index.html", False))
+        self.assertIsNone(ignore.match("src/index.html", "index.html", False))
+
+        self.assertTrue(ignore.match("src/cache", "cache", True))
+
+    def test_negation(self) -> None:
+        ignore = IgnoreFile("base", ["*.log", "!important.log", "\\!bang"])
+        self.assertTrue(ignore.match("a.log", "a.log", False))
+        self.assertFalse(ignore.match("important.log", "important.log", False))
+        self.assertTrue(ignore.match("!bang", "!bang", False))
+
+    def test_matcher(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for path in ["a.txt", "a.o", ".git/HEAD", "build/b.txt",
+                         "src/c.txt", "src/d.tmp", "src/keep.tmp", "src/gen/e.txt"]:
+                os.makedirs(os.path.join(tmpdir, os.path.dirname(path)), exist_ok=True)
+                with open(os.path.join(tmpdir, path), "w"):
+                    pass
+
+            with open(os.path.join(tmpdir, ".gitignore"), "w") as fout:
+                fout.write("*.o\nbuild/\n*.tmp\n")
+            with open(os.path.join(tmpdir, "src", ".gitignore"), "w") as fout:
+                fout.write("!keep.tmp\n/gen\n")
+
+            stats = SyscallStats()
+            action = CollectAction()
+            find_files(tmpdir, NoFilter(), action, topdown=True, maxdepth=None,
+                       stats=stats, ignore=IgnoreMatcher(tmpdir))
+            self.assertEqual(sorted(os.path.relpath(e.path, tmpdir) for e in action.entries),
+                             [".gitignore", "a.txt", "src/.gitignore", "src/c.txt", "src/keep.tmp"])
+            self.assertEqual(stats.pruned, 3)
+
+
+# EOF #
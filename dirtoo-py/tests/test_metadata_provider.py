@@ -0,0 +1,97 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Any, Dict
+
+import os
+import tempfile
+import unittest
+
+from dirtoo.filesystem.lazy_file_info import LazyFileInfo
+from dirtoo.find.filter import SimpleFilter
+from dirtoo.find.util import find_files
+from dirtoo.metadata.metadata_cache import MetaDataCache
+from dirtoo.metadata.metadata_provider import MetaDataProvider
+
+from tests.test_find import CollectAction
+
+
+class MetaDataProviderTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmpdir.name, "root")
+        os.makedirs(self.root)
+        for name in ["small.mkv", "large.mkv", "large.txt"]:
+            with open(os.path.join(self.root, name), "w") as fout:
+                fout.write(name)
+
+        self.cache = MetaDataCache(os.path.join(self.tmpdir.name, "cache"))
+        self.created: list[str] = []
+
+    def tearDown(self) -> None:
+        LazyFileInfo.METADATA_PROVIDER = None
+        self.tmpdir.cleanup()
+
+    def create_metadata(self, abspath: str) -> Dict[str, Any]:
+        self.created.append(os.path.basename(abspath))
+        width = 1920 if os.path.basename(abspath).startswith("large") else 320
+        return {'type': 'video', 'width': width, 'height': width * 9 // 16}
+
+    def find(self, query: str, compute: bool, jobs: int = 1) -> list[str]:
+        LazyFileInfo.METADATA_PROVIDER = MetaDataProvider(self.cache, compute=compute, jobs=jobs,
+                                                          create_metadata=self.create_metadata)
+        action = CollectAction()
+        find_files(self.root, SimpleFilter.from_string(query), action, topdown=True, maxdepth=None, jobs=jobs)
+        return sorted(entry.name for entry in action.entries)
+
+    def test_cached_only(self) -> None:
+        self.assertEqual(self.find("width:>1000", compute=False), [])
+        self.assertEqual(self.created, [])
+
+    def test_compute(self) -> None:
+        # only the files that pass the cheaper glob get their metadata
+        self.assertEqual(self.find("*.mkv width:>1000", compute=True), ["large.mkv"])
+        self.assertEqual(sorted(self.created), ["large.mkv", "small.mkv"])
+
+        # afterwards it comes from the cache
+        self.assertEqual(self.find("*.mkv height:<1000", compute=False), ["small.mkv"])
+        self.assertEqual(self.find("*.mkv height:<1000", compute=True, jobs=4), ["small.mkv"])
+        self.assertEqual(len(self.created), 2)
+
+    def test_outdated(self) -> None:
+        self.find("*.mkv width:>1000", compute=True)
+
+        path = os.path.join(self.root, "small.mkv")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+        self.assertEqual(self.find("*.mkv width:>1000", compute=False), ["large.mkv"])
+        self.assertEqual(self.find("*.mkv width:>1000", compute=True), ["large.mkv"])
+        self.assertEqual(sorted(self.created), ["large.mkv", "small.mkv", "small.mkv"])
+
+    def test_error(self) -> None:
+        def fail(abspath: str) -> Dict[str, Any]:
+            raise RuntimeError("broken file")
+
+        provider = MetaDataProvider(self.cache, compute=True, create_metadata=fail)
+        path = os.path.join(self.root, "small.mkv")
+        metadata = provider.metadata(path, os.stat(path).st_mtime)
+        self.assertEqual(metadata['type'], "error")
+        self.assertIn("broken file", metadata['error_message'])
+
+
+# EOF #
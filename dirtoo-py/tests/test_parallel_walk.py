@@ -0,0 +1,123 @@
+# dirtoo - File and directory manipulation tools for Python
+# Copyright (C) 2026 Ingo Ruhnke <grumbel@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Any, Iterable, Tuple
+
+import os
+import tempfile
+import unittest
+
+from dirtoo.find.walk import walk
+from dirtoo.find.parallel_walk import parallel_walk
+
+
+def make_tree(root: str, depth: int, width: int) -> None:
+    for i in range(width):
+        with open(os.path.join(root, "file{}.txt".format(i)), "w"):
+            pass
+
+    if depth > 0:
+        for i in range(width):
+            subdir = os.path.join(root, "dir{}".format(i))
+            os.mkdir(subdir)
+            make_tree(subdir, depth - 1, width)
+
+    os.symlink(".", os.path.join(root, "loop"))
+
+
+def normalize(results: Iterable[Tuple[Any, Any, Any]]) -> list[Tuple[str, list[str], list[str]]]:
+    return [(os.fspath(root), sorted(dirs), sorted(files)) for root, dirs, files in results]
+
+
+class ParallelWalkTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        make_tree(self.root, depth=3, width=3)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_ordered(self) -> None:
+        for topdown in [True, False]:
+            for maxdepth in [None, 1, 2]:
+                expected = normalize(walk(self.root, topdown=topdown, maxdepth=maxdepth))
+                result = normalize(parallel_walk(self.root, topdown=topdown, maxdepth=maxdepth,
+                                                 jobs=4, ordered=True))
+                self.assertEqual(result, expected)
+
+    def test_unordered(self) -> None:
+        for topdown in [True, False]:
+            for maxdepth in [None, 1, 2]:
+                expected = normalize(walk(self.root, topdown=topdown, maxdepth=maxdepth))
+                result = normalize(parallel_walk(self.root, topdown=topdown, maxdepth=maxdepth,
+                                                 jobs=4, ordered=False))
+                self.assertEqual(sorted(result), sorted(expected))
+
+    def test_unordered_bottomup(self) -> None:
+        seen: set[str] = set()
+        for root, dirs, files in parallel_walk(self.root, topdown=False, jobs=4):
+            for d in dirs:
+                self.assertIn(os.path.join(root, d), seen)
+            seen.add(root)
+
+    def test_prune(self) -> None:
+        for ordered in [True, False]:
+            roots = []
+            for root, dirs, files in parallel_walk(self.root, topdown=True, jobs=4, ordered=ordered):
+                roots.append(root)
+                dirs[:] = [d for d in dirs if d != "dir0"]
+            self.assertFalse(any(os.path.basename(r) == "dir0" for r in roots))
+            self.assertIn(os.path.join(self.root, "dir1"), roots)
+
+    def test_prune_callback(self) -> None:
+        def prune(root: str, name: str) -> bool:
+            return name in ("dir0", "loop")
+
+        for topdown in [True, False]:
+            expected = normalize(walk(self.root, topdown=topdown, followlinks=True, prune=prune))
+            self.assertFalse(any("dir0" in root or "loop" in root for root, _, _ in expected))
+            self.assertFalse(any("dir0" in dirs for _, dirs, _ in expected))
+            for ordered in [True, False]:
+                result = normalize(parallel_walk(self.root, topdown=topdown, followlinks=True,
+                                                 jobs=4, ordered=ordered, prune=prune))
+                self.assertEqual(sorted(result), sorted(expected))
+
+    def test_followlinks(self) -> None:
+        for ordered in [True, False]:
+            result = normalize(parallel_walk(self.root, topdown=False, followlinks=True,
+                                             maxdepth=2, jobs=4, ordered=ordered))
+            expected = normalize(walk(self.root, topdown=False, followlinks=True, maxdepth=2))
+            self.assertEqual(sorted(result), sorted(expected))
+
+    def test_onerror(self) -> None:
+        for ordered in [True, False]:
+            errors: list[OSError] = []
+            result = list(parallel_walk(os.path.join(self.root, "does-not-exist"),
+                                        onerror=errors.append, jobs=2, ordered=ordered))
+            self.assertEqual(result, [])
+            self.assertEqual(len(errors), 1)
+
+    def test_early_exit(self) -> None:
+        for ordered in [True, False]:
+            gen = parallel_walk(self.root, jobs=2, ordered=ordered, queue_size=1)
+            next(gen)
+            gen.close()
+
+
+# EOF #
@@ -17,7 +17,7 @@
 
 import unittest
 
-from dirtoo.sort import numeric_sorted
+from dirtoo.sort import numeric_sort_key, numeric_sort_text, numeric_sorted
 
 
 class UtilTestCase(unittest.TestCase):
@@ -40,5 +40,13 @@ class UtilTestCase(unittest.TestCase):
         for lhs, rhs in tests:
             self.assertEqual(numeric_sorted(lhs), rhs)
 
+    def test_numeric_sort_text(self) -> None:
+        words = ['', 'a', 'a0', 'a00', 'a9', 'a09', 'a10', 'a9b', 'a9.5', '9', '10', '010', 'b', 'a b',
+                 'a1b2', 'a1b10', 'a01b2', 'z', '100000000000000000000', '99999999999999999999']
+        for lhs in words:
+            for rhs in words:
+                self.assertEqual(numeric_sort_text(lhs) < numeric_sort_text(rhs),
+                                 numeric_sort_key(lhs) < numeric_sort_key(rhs), (lhs, rhs))
+
 
 # EOF #